@@ -25,10 +25,18 @@ contract Voting {
     uint public minDuration = 1 minutes;
     uint public maxDuration = 365 days;
 
+    bytes32 public constant BALLOT_TYPEHASH =
+        keccak256("Ballot(uint256 pollID,uint256[] answerIDs,uint256 nonce)");
+    bytes32 public immutable DOMAIN_SEPARATOR;
+    mapping(address => uint) public nonces;
+    // газ на один бюллетень с одним ответом в voteBatch, с запасом на правило 63/64
+    uint private constant BALLOT_GAS_RESERVE = 120000;
+
     event PollCreated(uint indexed id, address creator, bytes question, uint startTime, uint endTime);
     event PollCanceled(uint indexed id);
     event Voted(address indexed voter, uint indexed pollID, uint[] answerIDs, uint timestamp);
     event ScheduleUpdated(uint indexed pollID, uint newStartTime);
+    event BallotRejected(uint indexed pollID, address indexed voter, uint index);
 
     modifier onlyCreator(uint _pollID) {
         require(msg.sender == _polls[_pollID].creator, "Not creator");
@@ -58,6 +66,13 @@ contract Voting {
 
     constructor() {
         nextPollID = 1;
+        DOMAIN_SEPARATOR = keccak256(abi.encode(
+            keccak256("EIP712Domain(string name,string version,uint256 chainId,address verifyingContract)"),
+            keccak256("Voting"),
+            keccak256("1"),
+            block.chainid,
+            address(this)
+        ));
     }
 
     function createPoll(
@@ -96,8 +111,84 @@ contract Voting {
         external 
         pollActive(_pollID)
     {
+        _vote(_pollID, msg.sender, _answerIDs);
+    }
+
+    // голос, подписанный избирателем (EIP-712) и отправленный ретранслятором
+    function voteBySig(
+        uint _pollID,
+        uint[] calldata _answerIDs,
+        address _voter,
+        bytes calldata _signature
+    )
+        external
+        pollActive(_pollID)
+    {
+        require(_recoverBallot(_pollID, _answerIDs, nonces[_voter], _signature) == _voter, "Invalid signature");
+        nonces[_voter]++;
+        _vote(_pollID, _voter, _answerIDs);
+    }
+
+    // пачка подписанных бюллетеней в одной транзакции; ошибочный бюллетень
+    // не откатывает остальные, а отмечается событием BallotRejected
+    function voteBatch(
+        uint[] calldata _pollIDs,
+        address[] calldata _voters,
+        uint[][] calldata _answerIDs,
+        bytes[] calldata _signatures
+    )
+        external
+    {
+        require(
+            _voters.length == _pollIDs.length &&
+            _answerIDs.length == _pollIDs.length &&
+            _signatures.length == _pollIDs.length,
+            "Length mismatch"
+        );
+        for (uint i = 0; i < _pollIDs.length; i++) {
+            // при нехватке газа откатывается вся пачка, а не отклоняется бюллетень:
+            // внешний вызов получает лишь 63/64 оставшегося газа
+            require(gasleft() > BALLOT_GAS_RESERVE, "Out of gas for ballot");
+            try this.voteBySig(_pollIDs[i], _answerIDs[i], _voters[i], _signatures[i]) {
+            } catch (bytes memory reason) {
+                // все отказы voteBySig несут причину; пустые данные — это кончившийся газ
+                require(reason.length > 0, "Out of gas for ballot");
+                emit BallotRejected(_pollIDs[i], _voters[i], i);
+            }
+        }
+    }
+
+    function _recoverBallot(
+        uint _pollID,
+        uint[] calldata _answerIDs,
+        uint _nonce,
+        bytes calldata _signature
+    )
+        internal
+        view
+        returns (address)
+    {
+        require(_signature.length == 65, "Invalid signature length");
+        bytes32 structHash = keccak256(abi.encode(
+            BALLOT_TYPEHASH,
+            _pollID,
+            keccak256(abi.encodePacked(_answerIDs)),
+            _nonce
+        ));
+        bytes32 digest = keccak256(abi.encodePacked("\x19\x01", DOMAIN_SEPARATOR, structHash));
+
+        bytes32 r = bytes32(_signature[0:32]);
+        bytes32 s = bytes32(_signature[32:64]);
+        uint8 v = uint8(_signature[64]);
+        require(uint(s) <= 0x7FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF5D576E7357A4501DDFE92F46681B20A0, "Invalid signature s");
+        address signer = ecrecover(digest, v, r, s);
+        require(signer != address(0), "Invalid signature");
+        return signer;
+    }
+
+    function _vote(uint _pollID, address _voter, uint[] calldata _answerIDs) internal {
         Poll storage poll = _polls[_pollID];
-        require(poll.userVotes[msg.sender].length == 0, "Already voted");
+        require(poll.userVotes[_voter].length == 0, "Already voted");
         require(_answerIDs.length > 0, "No answers selected");
         
         if (!poll.multipleChoices) {
@@ -108,12 +199,12 @@ contract Voting {
             require(_answerIDs[i] < poll.answers.length, "Invalid answer ID");
         }
 
-        poll.userVotes[msg.sender] = _answerIDs;
+        poll.userVotes[_voter] = _answerIDs;
         for (uint i = 0; i < _answerIDs.length; i++) {
             poll.votes[_answerIDs[i]]++;
         }
         
-        emit Voted(msg.sender, _pollID, _answerIDs, block.timestamp);
+        emit Voted(_voter, _pollID, _answerIDs, block.timestamp);
     }
 
     function cancelPoll(uint _pollID) 
@@ -0,0 +1,197 @@
+// SPDX-License-Identifier: MIT
+pragma solidity >=0.8.0 <0.9.0;
+
+// Voting с компактным хранилищем: расписание и флаги лежат в одном слоте,
+// вопрос и ответы хранятся только в событии PollCreated (в storage — их хеш),
+// выбранные ответы голосующего — битовая маска uint16.
+contract VotingV2 {
+
+    struct Poll {
+        address creator;
+        uint32 startTime;
+        uint32 endTime;
+        uint8 answersCount;
+        bool multipleChoices;
+        bool canceled;
+    }
+
+    mapping(uint => Poll) private _polls;
+    mapping(uint => bytes32) public contentHash;
+    mapping(uint => uint64[16]) private _votes;
+    mapping(uint => mapping(address => uint16)) private _userVotes;
+    uint public nextPollID = 1;
+
+    uint public constant maxAnswers = 16;
+    uint public constant maxQuestionLength = 256;
+    uint public constant maxAnswerLength = 128;
+    uint public constant minDuration = 1 minutes;
+    uint public constant maxDuration = 365 days;
+
+    event PollCreated(
+        uint indexed id,
+        address creator,
+        bytes question,
+        bytes[] answers,
+        bool multipleChoices,
+        uint startTime,
+        uint endTime
+    );
+    event PollCanceled(uint indexed id);
+    event Voted(address indexed voter, uint indexed pollID, uint16 answers);
+    event ScheduleUpdated(uint indexed pollID, uint newStartTime);
+
+    modifier onlyCreator(uint _pollID) {
+        require(msg.sender == _polls[_pollID].creator, "Not creator");
+        _;
+    }
+
+    modifier pollExists(uint _pollID) {
+        require(_polls[_pollID].startTime != 0, "Poll does not exist");
+        _;
+    }
+
+    modifier validSchedule(uint _startTime, uint _duration) {
+        require(_startTime > block.timestamp, "Start time must be future");
+        require(_duration >= minDuration, "Duration too short");
+        require(_duration <= maxDuration, "Duration too long");
+        require(_startTime + _duration <= type(uint32).max, "Schedule out of range");
+        _;
+    }
+
+    function createPoll(
+        bytes calldata _question,
+        bytes[] calldata _answers,
+        bool _multipleChoices,
+        uint _startTime,
+        uint _duration
+    )
+        external
+        validSchedule(_startTime, _duration)
+    {
+        require(_question.length <= maxQuestionLength, "Invalid question length");
+        require(_answers.length > 1 && _answers.length <= maxAnswers, "Invalid answers count");
+
+        for (uint i = 0; i < _answers.length; i++) {
+            require(_answers[i].length <= maxAnswerLength, "Invalid answer length");
+        }
+
+        uint pollID = nextPollID++;
+        uint endTime = _startTime + _duration;
+        _polls[pollID] = Poll({
+            creator: msg.sender,
+            startTime: uint32(_startTime),
+            endTime: uint32(endTime),
+            answersCount: uint8(_answers.length),
+            multipleChoices: _multipleChoices,
+            canceled: false
+        });
+        contentHash[pollID] = keccak256(abi.encode(_question, _answers));
+
+        emit PollCreated(pollID, msg.sender, _question, _answers, _multipleChoices, _startTime, endTime);
+    }
+
+    // бит i маски означает выбор ответа i
+    function vote(uint _pollID, uint16 _answers) external {
+        Poll memory poll = _polls[_pollID];
+        require(poll.startTime != 0, "Poll does not exist");
+        require(block.timestamp >= poll.startTime, "Poll not started");
+        require(block.timestamp <= poll.endTime, "Poll ended");
+        require(!poll.canceled, "Poll canceled");
+        require(_userVotes[_pollID][msg.sender] == 0, "Already voted");
+        // сначала пустая маска и диапазон, и только потом проверка одного бита:
+        // _answers - 1 не переполняется, а лишние старшие биты уже отсеяны
+        require(_answers != 0, "No answers selected");
+        require(uint(_answers) >> poll.answersCount == 0, "Invalid answer ID");
+        if (!poll.multipleChoices) {
+            require(_answers & (_answers - 1) == 0, "Only single choice allowed");
+        }
+
+        _userVotes[_pollID][msg.sender] = _answers;
+        uint64[16] storage votes = _votes[_pollID];
+        for (uint i = 0; i < poll.answersCount; i++) {
+            if (uint(_answers) & (1 << i) != 0) {
+                votes[i]++;
+            }
+        }
+
+        emit Voted(msg.sender, _pollID, _answers);
+    }
+
+    function cancelPoll(uint _pollID)
+        external
+        onlyCreator(_pollID)
+        pollExists(_pollID)
+    {
+        Poll storage poll = _polls[_pollID];
+        require(block.timestamp < poll.startTime, "Already started");
+        poll.canceled = true;
+        emit PollCanceled(_pollID);
+    }
+
+    function updatePollSchedule(
+        uint _pollID,
+        uint _newStartTime,
+        uint _newDuration
+    )
+        external
+        onlyCreator(_pollID)
+        validSchedule(_newStartTime, _newDuration)
+        pollExists(_pollID)
+    {
+        Poll storage poll = _polls[_pollID];
+        require(block.timestamp < poll.startTime, "Already started");
+
+        poll.startTime = uint32(_newStartTime);
+        poll.endTime = uint32(_newStartTime + _newDuration);
+        emit ScheduleUpdated(_pollID, _newStartTime);
+    }
+
+    function getPollInfo(uint _pollID)
+        external
+        view
+        pollExists(_pollID)
+        returns (
+            address creator,
+            uint startTime,
+            uint endTime,
+            bytes32 content,
+            uint answersCount,
+            bool multipleChoices,
+            bool canceled
+        )
+    {
+        Poll memory poll = _polls[_pollID];
+        return (
+            poll.creator,
+            poll.startTime,
+            poll.endTime,
+            contentHash[_pollID],
+            poll.answersCount,
+            poll.multipleChoices,
+            poll.canceled
+        );
+    }
+
+    function getResults(uint _pollID)
+        external
+        view
+        pollExists(_pollID)
+        returns (uint[] memory results)
+    {
+        uint count = _polls[_pollID].answersCount;
+        uint64[16] storage votes = _votes[_pollID];
+        results = new uint[](count);
+        for (uint i = 0; i < count; i++) {
+            results[i] = votes[i];
+        }
+    }
+
+    function getUserVotes(uint _pollID, address _user)
+        external
+        view
+        pollExists(_pollID)
+        returns (uint16)
+    {
+        return _userVotes[_pollID][_user];
+    }
+}
@@ -1,4 +1,23 @@
 require("@nomicfoundation/hardhat-toolbox");
+const fs = require("fs");
+const path = require("path");
+const { task } = require("hardhat/config");
+const { TASK_COMPILE } = require("hardhat/builtin-tasks/task-names");
+
+// ABI, которым пользуется бот; генерируется из артефакта, руками не правится
+const BOT_ABI = path.join(__dirname, "contracts", "ContractABI.json");
+
+task("export-abi", "Writes the Voting ABI used by the bot to contracts/ContractABI.json")
+  .setAction(async (_, hre) => {
+    const artifact = await hre.artifacts.readArtifact("Voting");
+    fs.writeFileSync(BOT_ABI, JSON.stringify(artifact.abi, null, 4));
+  });
+
+task(TASK_COMPILE).setAction(async (args, hre, runSuper) => {
+  const result = await runSuper(args);
+  await hre.run("export-abi");
+  return result;
+});
 
 module.exports = {
   solidity: {
@@ -10,9 +29,12 @@ module.exports = {
       },
     },
   },
+  gasReporter: {
+    enabled: process.env.REPORT_GAS === "1",
+  },
   networks: {
     hardhat: {
       chainId: 31337,
     },
   },
-};
\ No newline at end of file
+};
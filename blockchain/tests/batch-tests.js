@@ -0,0 +1,88 @@
+const { expect } = require("chai");
+const { ethers } = require("hardhat");
+const { time } = require("@nomicfoundation/hardhat-network-helpers");
+const { anyValue } = require("@nomicfoundation/hardhat-chai-matchers/withArgs");
+
+const BALLOT_TYPES = {
+  Ballot: [
+    { name: "pollID", type: "uint256" },
+    { name: "answerIDs", type: "uint256[]" },
+    { name: "nonce", type: "uint256" },
+  ],
+};
+
+describe("Voting voteBatch Tests", function () {
+  let voting, relayer, voters, domain;
+
+  async function signBallot(signer, pollID, answerIDs, nonce) {
+    return signer.signTypedData(domain, BALLOT_TYPES, { pollID, answerIDs, nonce });
+  }
+
+  beforeEach(async function () {
+    let signers;
+    [relayer, ...signers] = await ethers.getSigners();
+    voters = signers.slice(0, 3);
+    const Voting = await ethers.getContractFactory("Voting");
+    voting = await Voting.deploy();
+    await voting.waitForDeployment();
+
+    const { chainId } = await ethers.provider.getNetwork();
+    domain = { name: "Voting", version: "1", chainId, verifyingContract: await voting.getAddress() };
+
+    const startTime = BigInt(await time.latest()) + 60n;
+    await voting.createPoll(
+      ethers.toUtf8Bytes("Test"),
+      ["A", "B"].map(a => ethers.toUtf8Bytes(a)),
+      false,
+      startTime,
+      3600n
+    );
+    await time.increase(60);
+  });
+
+  it("Should reject one bad ballot and still count the rest", async function () {
+    const answers = [[0], [1], [1]];
+    const signatures = [
+      await signBallot(voters[0], 1, answers[0], 0),
+      // подписан чужой nonce: бюллетень отклоняется, остальные проходят
+      await signBallot(voters[1], 1, answers[1], 5),
+      await signBallot(voters[2], 1, answers[2], 0),
+    ];
+
+    const tx = await voting.connect(relayer).voteBatch(
+      [1, 1, 1], voters.map(v => v.address), answers, signatures
+    );
+    await expect(tx).to.emit(voting, "BallotRejected").withArgs(1, voters[1].address, 1);
+    await expect(tx).to.emit(voting, "Voted").withArgs(voters[0].address, 1, [0], anyValue);
+
+    expect(await voting.getResults(1)).to.deep.equal([1n, 1n]);
+    expect(await voting.getUserVotes(1, voters[1].address)).to.deep.equal([]);
+    expect(await voting.nonces(voters[0].address)).to.equal(1n);
+    expect(await voting.nonces(voters[1].address)).to.equal(0n);
+  });
+
+  it("Should revert the whole batch instead of rejecting ballots when gas runs short", async function () {
+    const answers = [[0], [1], [1]];
+    const signatures = await Promise.all(voters.map((v, i) => signBallot(v, 1, answers[i], 0)));
+    const args = [[1, 1, 1], voters.map(v => v.address), answers, signatures];
+
+    // лимит, которого хватает на первый бюллетень, но не на все три
+    await expect(
+      voting.connect(relayer).voteBatch(...args, { gasLimit: 200000 })
+    ).to.be.reverted;
+    expect(await voting.getResults(1)).to.deep.equal([0n, 0n]);
+    expect(await voting.nonces(voters[0].address)).to.equal(0n);
+
+    const gas = await voting.connect(relayer).voteBatch.estimateGas(...args);
+    const tx = await voting.connect(relayer).voteBatch(...args, { gasLimit: gas });
+    await expect(tx).not.to.emit(voting, "BallotRejected");
+    expect(await voting.getResults(1)).to.deep.equal([1n, 2n]);
+  });
+
+  it("Should revert the whole batch on mismatched lengths", async function () {
+    const signature = await signBallot(voters[0], 1, [0], 0);
+    await expect(
+      voting.voteBatch([1, 1], [voters[0].address], [[0]], [signature])
+    ).to.be.revertedWith("Length mismatch");
+  });
+});
@@ -0,0 +1,80 @@
+const { expect } = require("chai");
+const { ethers } = require("hardhat");
+const { time } = require("@nomicfoundation/hardhat-network-helpers");
+
+// Сравнение газа Voting (V1) и VotingV2 по каждой операции.
+// Запуск: npx hardhat test tests/gas-benchmark.js
+// Для сводки hardhat-gas-reporter: REPORT_GAS=1 npx hardhat test tests/gas-benchmark.js
+
+const toBytes = (items) => items.map(a => ethers.toUtf8Bytes(a));
+const mask = (ids) => ids.reduce((m, id) => m | (1 << id), 0);
+
+async function gasOf(txPromise) {
+  const receipt = await (await txPromise).wait();
+  return receipt.gasUsed;
+}
+
+describe("Gas Benchmark: Voting vs VotingV2", function () {
+  let v1, v2, owner, users;
+  const rows = {};
+
+  function record(operation, version, gas) {
+    rows[operation] = rows[operation] || { operation };
+    rows[operation][version] = gas;
+  }
+
+  before(async function () {
+    [owner, ...users] = await ethers.getSigners();
+    v1 = await (await ethers.getContractFactory("Voting")).deploy();
+    v2 = await (await ethers.getContractFactory("VotingV2")).deploy();
+    await v1.waitForDeployment();
+    await v2.waitForDeployment();
+  });
+
+  it("Measures createPoll, vote, updatePollSchedule and cancelPoll", async function () {
+    const question = ethers.toUtf8Bytes("Which option do you prefer for the next release?");
+    const twoAnswers = toBytes(["Yes", "No"]);
+    const fiveAnswers = toBytes(["Option A", "Option B", "Option C", "Option D", "Option E"]);
+    const now = BigInt(await time.latest());
+    const start = now + 600n;
+    const duration = 3600n;
+
+    for (const [version, voting] of [["V1", v1], ["V2", v2]]) {
+      record("createPoll (2 answers)", version,
+        await gasOf(voting.createPoll(question, twoAnswers, false, start, duration)));
+      record("createPoll (5 answers)", version,
+        await gasOf(voting.createPoll(question, fiveAnswers, true, start, duration)));
+      await voting.createPoll(question, twoAnswers, false, start, duration);
+      await voting.createPoll(question, twoAnswers, false, start, duration);
+      record("updatePollSchedule", version,
+        await gasOf(voting.updatePollSchedule(3, start + 60n, duration)));
+      record("cancelPoll", version, await gasOf(voting.cancelPoll(4)));
+    }
+
+    await time.increaseTo(start + 60n);
+
+    const votes = [
+      ["vote (single choice, first voter)", 1, [0], users[0]],
+      ["vote (single choice, next voter)", 1, [0], users[1]],
+      ["vote (3 of 5 answers)", 2, [0, 2, 4], users[0]],
+    ];
+    for (const [operation, pollID, answerIDs, voter] of votes) {
+      record(operation, "V1", await gasOf(v1.connect(voter).vote(pollID, answerIDs)));
+      record(operation, "V2", await gasOf(v2.connect(voter).vote(pollID, mask(answerIDs))));
+    }
+
+    expect(await v1.getResults(2)).to.deep.equal(await v2.getResults(2));
+    expect(await v2.getUserVotes(2, users[0].address)).to.equal(mask([0, 2, 4]));
+
+    const table = Object.values(rows).map(r => ({
+      ...r,
+      saved: `${(100 - Number(r.V2 * 100n / r.V1))}%`,
+    }));
+    console.log("\n--- GAS BENCHMARK ---");
+    console.table(table.map(r => ({ ...r, V1: r.V1.toString(), V2: r.V2.toString() })));
+
+    for (const r of table) {
+      expect(r.V2 < r.V1, `${r.operation}: V2 should use less gas`).to.equal(true);
+    }
+  });
+});
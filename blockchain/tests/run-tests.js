@@ -8,9 +8,21 @@ function runTests() {
     console.log("\n--- RUNNING FUNCTIONAL TESTS ---");
     execSync("npx hardhat test tests/func-tests.js", { stdio: "inherit" });
 
+    console.log("\n--- RUNNING SIGNATURE TESTS ---");
+    execSync("npx hardhat test tests/signature-tests.js", { stdio: "inherit" });
+
+    console.log("\n--- RUNNING BATCH TESTS ---");
+    execSync("npx hardhat test tests/batch-tests.js", { stdio: "inherit" });
+
+    console.log("\n--- RUNNING VOTINGV2 TESTS ---");
+    execSync("npx hardhat test tests/v2-tests.js", { stdio: "inherit" });
+
     console.log("\n--- RUNNING LOAD TESTS ---");
     execSync("npx hardhat test tests/load-tests.js", { stdio: "inherit" });
 
+    console.log("\n--- RUNNING GAS BENCHMARK ---");
+    execSync("npx hardhat test tests/gas-benchmark.js", { stdio: "inherit" });
+
     console.log("\n--- ALL TESTS COMPLETED SUCCESSFULLY ✅ ---");
   } catch (error) {
     console.error("❌ One or more test suites failed.");
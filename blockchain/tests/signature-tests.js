@@ -0,0 +1,87 @@
+const { expect } = require("chai");
+const { ethers } = require("hardhat");
+const { time } = require("@nomicfoundation/hardhat-network-helpers");
+
+// порядок группы secp256k1: s и n - s дают две валидные подписи одного сообщения
+const SECP256K1_N = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141n;
+
+const BALLOT_TYPES = {
+  Ballot: [
+    { name: "pollID", type: "uint256" },
+    { name: "answerIDs", type: "uint256[]" },
+    { name: "nonce", type: "uint256" },
+  ],
+};
+
+describe("Voting voteBySig Tests", function () {
+  let voting, relayer, voter, domain;
+
+  async function signBallot(signer, pollID, answerIDs, nonce) {
+    return signer.signTypedData(domain, BALLOT_TYPES, { pollID, answerIDs, nonce });
+  }
+
+  beforeEach(async function () {
+    [relayer, voter] = await ethers.getSigners();
+    const Voting = await ethers.getContractFactory("Voting");
+    voting = await Voting.deploy();
+    await voting.waitForDeployment();
+
+    const { chainId } = await ethers.provider.getNetwork();
+    domain = { name: "Voting", version: "1", chainId, verifyingContract: await voting.getAddress() };
+
+    const startTime = BigInt(await time.latest()) + 60n;
+    await voting.createPoll(
+      ethers.toUtf8Bytes("Test"),
+      ["A", "B", "C"].map(a => ethers.toUtf8Bytes(a)),
+      true,
+      startTime,
+      3600n
+    );
+    await time.increase(60);
+  });
+
+  it("Should count a ballot signed by the voter and sent by the relayer", async function () {
+    expect(await voting.DOMAIN_SEPARATOR()).to.equal(ethers.TypedDataEncoder.hashDomain(domain));
+    const signature = await signBallot(voter, 1, [0, 2], 0);
+
+    await expect(voting.connect(relayer).voteBySig(1, [0, 2], voter.address, signature))
+      .to.emit(voting, "Voted");
+
+    expect(await voting.getUserVotes(1, voter.address)).to.deep.equal([0n, 2n]);
+    expect(await voting.getUserVotes(1, relayer.address)).to.deep.equal([]);
+    expect(await voting.getResults(1)).to.deep.equal([1n, 0n, 1n]);
+    expect(await voting.nonces(voter.address)).to.equal(1n);
+  });
+
+  it("Should reject a replayed ballot", async function () {
+    const signature = await signBallot(voter, 1, [0], 0);
+    await voting.voteBySig(1, [0], voter.address, signature);
+
+    // nonce уже 1, так что та же подпись восстанавливает другой адрес
+    await expect(voting.voteBySig(1, [0], voter.address, signature))
+      .to.be.revertedWith("Invalid signature");
+    expect(await voting.getResults(1)).to.deep.equal([1n, 0n, 0n]);
+  });
+
+  it("Should reject a ballot signed with a wrong nonce", async function () {
+    const signature = await signBallot(voter, 1, [1], 1);
+
+    await expect(voting.voteBySig(1, [1], voter.address, signature))
+      .to.be.revertedWith("Invalid signature");
+    expect(await voting.nonces(voter.address)).to.equal(0n);
+  });
+
+  it("Should reject the malleable high-s twin of a valid signature", async function () {
+    const signature = ethers.Signature.from(await signBallot(voter, 1, [2], 0));
+    const twin = ethers.concat([
+      signature.r,
+      ethers.toBeHex(SECP256K1_N - BigInt(signature.s), 32),
+      ethers.toBeHex(signature.v === 27 ? 28 : 27, 1),
+    ]);
+
+    await expect(voting.voteBySig(1, [2], voter.address, twin))
+      .to.be.revertedWith("Invalid signature s");
+    await expect(voting.voteBySig(1, [2], voter.address, signature.serialized))
+      .to.emit(voting, "Voted");
+  });
+});
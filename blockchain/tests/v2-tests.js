@@ -0,0 +1,49 @@
+const { expect } = require("chai");
+const { ethers } = require("hardhat");
+const { time } = require("@nomicfoundation/hardhat-network-helpers");
+
+const toBytes = (items) => items.map(a => ethers.toUtf8Bytes(a));
+const answers = (n) => toBytes(Array.from({ length: n }, (_, i) => `Answer ${i}`));
+
+describe("VotingV2 answer mask Tests", function () {
+  let voting, owner, voter;
+
+  beforeEach(async function () {
+    [owner, voter] = await ethers.getSigners();
+    voting = await (await ethers.getContractFactory("VotingV2")).deploy();
+    await voting.waitForDeployment();
+
+    const startTime = BigInt(await time.latest()) + 60n;
+    const question = ethers.toUtf8Bytes("Test");
+    await voting.createPoll(question, answers(16), false, startTime, 3600n);
+    await voting.createPoll(question, answers(15), false, startTime, 3600n);
+    await voting.createPoll(question, answers(16), true, startTime, 3600n);
+    await time.increase(60);
+  });
+
+  it("Should accept the last answer of a 16-answer poll", async function () {
+    await expect(voting.connect(voter).vote(1, 1 << 15))
+      .to.emit(voting, "Voted").withArgs(voter.address, 1, 1 << 15);
+    const results = await voting.getResults(1);
+    expect(results.length).to.equal(16);
+    expect(results[15]).to.equal(1n);
+    expect(await voting.getUserVotes(1, voter.address)).to.equal(1 << 15);
+  });
+
+  it("Should reject bit 15 when the poll has 15 answers", async function () {
+    await expect(voting.connect(voter).vote(2, 1 << 15)).to.be.revertedWith("Invalid answer ID");
+  });
+
+  it("Should reject an empty mask before the single-choice check", async function () {
+    await expect(voting.connect(voter).vote(1, 0)).to.be.revertedWith("No answers selected");
+  });
+
+  it("Should reject several bits in a single-choice poll", async function () {
+    await expect(voting.connect(voter).vote(1, (1 << 15) | 1)).to.be.revertedWith("Only single choice allowed");
+  });
+
+  it("Should accept all 16 bits in a multiple-choice poll", async function () {
+    await voting.connect(voter).vote(3, 0xffff);
+    expect(await voting.getResults(3)).to.deep.equal(Array(16).fill(1n));
+  });
+});
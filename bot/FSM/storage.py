@@ -0,0 +1,244 @@
+import asyncio
+import json
+import sqlite3
+import threading
+from typing import Any
+from urllib.parse import urlparse
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+# --- сериализация ---
+
+def _encode_default(value):
+    if isinstance(value, (set, frozenset)):
+        return {"$set": sorted(value) if all(isinstance(v, int) for v in value) else list(value)}
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+def _decode_hook(obj: dict):
+    if len(obj) == 1 and "$set" in obj:
+        return set(obj["$set"])
+    return obj
+
+def pack_data(data: dict[str, Any]) -> str:
+    """Компактный JSON для данных FSM; множества сохраняются как {"$set": [...]}."""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False, default=_encode_default)
+
+def unpack_data(raw: str | bytes | None) -> dict[str, Any]:
+    if not raw:
+        return {}
+    return json.loads(raw, object_hook=_decode_hook)
+
+def _state_name(state: StateType) -> str | None:
+    return state.state if isinstance(state, State) else state
+
+def storage_key(key: StorageKey, prefix: str = "fsm") -> str:
+    """Строковый ключ из StorageKey: одинаковый для всех воркеров бота."""
+    parts = [prefix, str(key.bot_id)]
+    business_connection_id = getattr(key, "business_connection_id", None)
+    if business_connection_id:
+        parts.append(business_connection_id)
+    parts += [str(key.chat_id)]
+    if key.thread_id:
+        parts.append(str(key.thread_id))
+    parts += [str(key.user_id), key.destiny]
+    return ":".join(parts)
+
+# --- SQLite ---
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fsm (
+    key TEXT PRIMARY KEY,
+    state TEXT,
+    data TEXT
+);
+"""
+
+class SQLiteStorage(BaseStorage):
+    """FSM-хранилище в SQLite (WAL): несколько процессов бота на одной машине
+    видят одно и то же состояние, и оно переживает перезапуск."""
+
+    def __init__(self, path: str, busy_timeout_ms: int = 5000):
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=busy_timeout_ms / 1000)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+
+    def _execute(self, sql: str, params: tuple):
+        with self._lock, self._conn:
+            return self._conn.execute(sql, params).fetchone()
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        await asyncio.to_thread(
+            self._execute,
+            "INSERT INTO fsm (key, state) VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET state = excluded.state",
+            (storage_key(key), _state_name(state)),
+        )
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        row = await asyncio.to_thread(self._execute, "SELECT state FROM fsm WHERE key = ?", (storage_key(key),))
+        return row[0] if row else None
+
+    async def set_data(self, key: StorageKey, data: dict[str, Any]) -> None:
+        await asyncio.to_thread(
+            self._execute,
+            "INSERT INTO fsm (key, data) VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET data = excluded.data",
+            (storage_key(key), pack_data(data) if data else None),
+        )
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        row = await asyncio.to_thread(self._execute, "SELECT data FROM fsm WHERE key = ?", (storage_key(key),))
+        return unpack_data(row[0] if row else None)
+
+    async def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+# --- Redis (RESP) ---
+
+class RespError(Exception):
+    pass
+
+def encode_command(*args: str | bytes | int) -> bytes:
+    out = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, str):
+            arg = arg.encode()
+        elif isinstance(arg, int):
+            arg = str(arg).encode()
+        out.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(out)
+
+async def read_reply(reader: asyncio.StreamReader):
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("Connection closed by server")
+    kind, body = line[:1], line[1:-2]
+    if kind == b"+":
+        return body.decode()
+    if kind == b"-":
+        raise RespError(body.decode())
+    if kind == b":":
+        return int(body)
+    if kind == b"$":
+        size = int(body)
+        if size < 0:
+            return None
+        return (await reader.readexactly(size + 2))[:-2]
+    if kind == b"*":
+        size = int(body)
+        if size < 0:
+            return None
+        return [await read_reply(reader) for _ in range(size)]
+    raise RespError(f"Unexpected reply: {line!r}")
+
+class RedisStorage(BaseStorage):
+    """FSM-хранилище поверх протокола Redis (RESP) без сторонних клиентов.
+
+    Состояние и данные лежат под ключами <prefix>:...:state и :data, так что
+    любое число воркеров за балансировщиком разделяет одни и те же сессии.
+    Запросы к одному соединению идут последовательно под asyncio.Lock.
+    """
+
+    def __init__(self, host: str = "localhost", port: int = 6379, db: int = 0,
+                 password: str | None = None, prefix: str = "fsm", state_ttl: int | None = None):
+        self.host, self.port, self.db = host, port, db
+        self.password = password
+        self.prefix = prefix
+        self.state_ttl = state_ttl
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisStorage":
+        parsed = urlparse(url)
+        db = int(parsed.path.lstrip("/") or 0)
+        return cls(parsed.hostname or "localhost", parsed.port or 6379, db, parsed.password, **kwargs)
+
+    async def _connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        if self.password:
+            await self._roundtrip([("AUTH", self.password)])
+        if self.db:
+            await self._roundtrip([("SELECT", self.db)])
+
+    async def _roundtrip(self, commands: list[tuple]) -> list:
+        self._writer.write(b"".join(encode_command(*c) for c in commands))
+        await self._writer.drain()
+        return [await read_reply(self._reader) for _ in commands]
+
+    async def execute(self, *commands: tuple) -> list:
+        """Отправляет команды одним пакетом (pipeline) и возвращает ответы по порядку."""
+        async with self._lock:
+            for attempt in (0, 1):
+                try:
+                    if self._writer is None:
+                        await self._connect()
+                    return await self._roundtrip(list(commands))
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    self._drop()
+                    if attempt:
+                        raise
+                except BaseException:
+                    # ошибка или отмена посреди обмена: непрочитанные ответы достались
+                    # бы следующему запросу, поэтому соединение не переиспользуется
+                    self._drop()
+                    raise
+
+    def _drop(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    def _key(self, key: StorageKey, part: str) -> str:
+        return f"{storage_key(key, self.prefix)}:{part}"
+
+    def _set_command(self, redis_key: str, value: str) -> tuple:
+        if self.state_ttl:
+            return "SET", redis_key, value, "EX", self.state_ttl
+        return "SET", redis_key, value
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        name = _state_name(state)
+        redis_key = self._key(key, "state")
+        await self.execute(("DEL", redis_key) if name is None else self._set_command(redis_key, name))
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        value, = await self.execute(("GET", self._key(key, "state")))
+        return value.decode() if value is not None else None
+
+    async def set_data(self, key: StorageKey, data: dict[str, Any]) -> None:
+        redis_key = self._key(key, "data")
+        await self.execute(("DEL", redis_key) if not data else self._set_command(redis_key, pack_data(data)))
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        value, = await self.execute(("GET", self._key(key, "data")))
+        return unpack_data(value)
+
+    async def close(self) -> None:
+        async with self._lock:
+            if self._writer is not None:
+                self._writer.close()
+                await self._writer.wait_closed()
+            self._reader = self._writer = None
+
+def make_storage(url: str | None) -> BaseStorage:
+    """Хранилище FSM по строке конфигурации.
+
+    "memory" или пусто — MemoryStorage aiogram (один процесс);
+    "sqlite:///path/to/fsm.db" — SQLiteStorage; "redis://host:port/db" — RedisStorage.
+    """
+    if not url or url == "memory":
+        return MemoryStorage()
+    if url.startswith("sqlite:///"):
+        return SQLiteStorage(url.removeprefix("sqlite:///"))
+    if url.startswith("redis://"):
+        return RedisStorage.from_url(url)
+    raise ValueError(f"Unsupported FSM storage: {url}")
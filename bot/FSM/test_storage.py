@@ -0,0 +1,89 @@
+import asyncio
+
+from aiogram.fsm.storage.base import StorageKey
+
+from FSM.resp_server import RespServer
+from FSM.states import VoteStates
+from FSM.storage import RedisStorage, SQLiteStorage, pack_data, unpack_data
+
+KEY = StorageKey(bot_id=1, chat_id=10, user_id=20)
+BALLOT = {"poll_id": 3, "answers": ["Да", "Нет"], "multiple": True, "selected": {2, 1}}
+
+
+def test_pack_data_round_trips_sets():
+    raw = pack_data(BALLOT)
+    assert raw == '{"poll_id":3,"answers":["Да","Нет"],"multiple":true,"selected":{"$set":[1,2]}}'
+    assert unpack_data(raw) == BALLOT
+
+
+async def check_storage(make):
+    storage = make()
+    await storage.set_state(KEY, VoteStates.waiting_for_vote)
+    await storage.set_data(KEY, BALLOT)
+    await storage.close()
+
+    # новый экземпляр — как другой воркер или перезапуск бота
+    storage = make()
+    assert await storage.get_state(KEY) == VoteStates.waiting_for_vote.state
+    assert await storage.get_data(KEY) == BALLOT
+    assert await storage.get_state(StorageKey(bot_id=1, chat_id=11, user_id=20)) is None
+
+    await storage.set_state(KEY, None)
+    await storage.set_data(KEY, {})
+    assert await storage.get_state(KEY) is None
+    assert await storage.get_data(KEY) == {}
+    await storage.close()
+
+
+def test_sqlite_storage_survives_reopen(tmp_path):
+    path = str(tmp_path / "fsm.db")
+    asyncio.run(check_storage(lambda: SQLiteStorage(path)))
+
+
+def test_redis_storage_against_stand_in():
+    async def run():
+        server = RespServer()
+        port = await server.start()
+        await check_storage(lambda: RedisStorage(port=port, db=1))
+        assert not server.data
+        await server.close()
+
+    asyncio.run(run())
+
+
+class StallingServer(RespServer):
+    """Не отвечает в первом соединении — как сервер, ответ которого не успел прийти."""
+
+    def __init__(self):
+        super().__init__()
+        self.connections = 0
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        if self.connections == 1:
+            await reader.read()
+            writer.close()
+            return
+        await super()._handle(reader, writer)
+
+
+def test_redis_storage_drops_connection_after_cancelled_request():
+    async def run():
+        server = StallingServer()
+        port = await server.start()
+        storage = RedisStorage(port=port)
+        request = asyncio.create_task(storage.get_state(KEY))
+        await asyncio.sleep(0.05)
+        request.cancel()
+        try:
+            await request
+        except asyncio.CancelledError:
+            pass
+
+        await asyncio.wait_for(storage.set_state(KEY, "s"), timeout=1)
+        assert await storage.get_state(KEY) == "s"
+        assert server.connections == 2
+        await storage.close()
+        await server.close()
+
+    asyncio.run(run())
@@ -0,0 +1,65 @@
+import hashlib
+import hmac
+import logging
+import threading
+from collections import OrderedDict
+from typing import Iterable
+
+from eth_account import Account
+from eth_account.signers.local import LocalAccount
+from eth_keys.constants import SECPK1_N
+from eth_utils import big_endian_to_int
+
+logger = logging.getLogger(__name__)
+
+
+def derive_account(secret_key: str, telegram_id: str) -> LocalAccount:
+    digest = hmac.new(secret_key.encode(), telegram_id.encode(), hashlib.sha256).digest()
+    key_int = big_endian_to_int(digest) % SECPK1_N
+    return Account.from_key(key_int.to_bytes(32, 'big'))
+
+
+class AccountCache:
+    """LRU-кэш аккаунтов, выведенных из telegram_id.
+
+    Вывод ключа — это HMAC и умножение точки на secp256k1, поэтому аккаунт
+    считается один раз и дальше берётся из памяти. Ключи живут в обычной
+    памяти процесса: от swap их защищают настройки хоста (зашифрованный swap
+    или его отсутствие), а не сам бот.
+    """
+
+    def __init__(self, secret_key: str, maxsize: int = 10_000):
+        self.secret_key = secret_key
+        self.maxsize = maxsize
+        self._accounts: OrderedDict[str, LocalAccount] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, telegram_id: str) -> LocalAccount:
+        with self._lock:
+            acct = self._accounts.get(telegram_id)
+            if acct is not None:
+                self._accounts.move_to_end(telegram_id)
+                return acct
+
+        acct = derive_account(self.secret_key, telegram_id)
+        logger.debug("Derived account: %s", acct.address, extra={"user": telegram_id})
+
+        with self._lock:
+            self._accounts[telegram_id] = acct
+            self._accounts.move_to_end(telegram_id)
+            while len(self._accounts) > self.maxsize:
+                self._accounts.popitem(last=False)
+        return acct
+
+    def derive_many(self, telegram_ids: Iterable[str]) -> dict[str, LocalAccount]:
+        return {telegram_id: self.get(telegram_id) for telegram_id in telegram_ids}
+
+    def clear(self):
+        with self._lock:
+            self._accounts.clear()
+
+    def __len__(self) -> int:
+        return len(self._accounts)
+
+    def __contains__(self, telegram_id: str) -> bool:
+        return telegram_id in self._accounts
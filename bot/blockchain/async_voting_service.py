@@ -0,0 +1,578 @@
+import asyncio
+import logging
+import aiohttp
+from web3 import AsyncWeb3
+from web3.exceptions import TransactionNotFound, Web3RPCError, Web3TypeError
+from eth_account import Account
+
+from .accounts import AccountCache
+from .ballot_aggregator import BallotAggregator
+from .ballots import BallotNonces, sign_ballot
+from .fee_oracle import FeeOracle, GasEstimateCache
+from .funding import FundingScheduler
+from .indexer import EventIndexer, IndexStore
+from .nonce_manager import NonceManager, NonceStore, SharedNonceManager
+from .provider_pool import ProviderPool
+from .rpc_metrics import RpcMetrics, tagged
+from .poll_cache import PollCache, PollEventListener, INFO, RESULTS
+from .pending_tx import PendingTx, PendingTxRegistry, ReceiptWatcher, OnReceipt
+from .voting_service import (
+    VotingService,
+    load_abi,
+    decode_poll_info,
+    parse_err_msg,
+)
+
+logger = logging.getLogger(__name__)
+
+class AsyncVotingService:
+    """asyncio-версия VotingService поверх AsyncWeb3.
+
+    Все RPC-запросы идут через одну aiohttp-сессию, поэтому ожидание
+    транзакций не блокирует event loop бота.
+    """
+
+    CHAIN_ID = VotingService.CHAIN_ID
+    MIN_FUND_WEI = VotingService.MIN_FUND_WEI
+    POLL_CACHE_TTL = 15.0
+
+    def __init__(self, rpc_url: str | list[str], contract_address: str,
+                 abi_path: str, secret_key: str, admin_key: str,
+                 session: aiohttp.ClientSession | None = None,
+                 pool_size: int = 100, keepalive_timeout: float = 60.0,
+                 request_timeout: float = 30.0, preflight: bool = False,
+                 relay_votes: bool = False, batch_window: float | None = None,
+                 provider=None, chain_id: int | None = None, rpc_metrics: RpcMetrics | None = None,
+                 nonce_store: NonceStore | None = None, fund_window: float = 0.5, fund_pool_size: int = 1000):
+        self.rpc_metrics = rpc_metrics or RpcMetrics()
+        if provider is not None:
+            # например AsyncEthereumTesterProvider в тестах и бенчмарках
+            self.provider = provider
+        else:
+            urls = [rpc_url] if isinstance(rpc_url, str) else list(rpc_url)
+            logger.debug("Initializing AsyncWeb3 provider to %s", urls)
+            if len(urls) > 1:
+                self.provider = ProviderPool(urls, on_retry=self.rpc_metrics.retry)
+            else:
+                self.provider = AsyncWeb3.AsyncHTTPProvider(urls[0])
+        self.w3 = AsyncWeb3(self.provider)
+        # самый внутренний слой: считаются и запросы, которые делают другие middleware
+        self.w3.middleware_onion.inject(self.rpc_metrics.middleware, name="rpc_metrics", layer=0)
+        if chain_id is not None:
+            self.CHAIN_ID = chain_id
+
+        logger.debug("Loading ABI from %s", abi_path)
+        self.abi = load_abi(abi_path)
+        self.contract = self.w3.eth.contract(address=contract_address, abi=self.abi)
+
+        self.secret_key = secret_key
+        self.accounts = AccountCache(secret_key)
+        self.admin_account = Account.from_key(admin_key)
+        logger.debug("Admin account loaded: %s", self.admin_account.address)
+
+        self._session = session
+        self._owns_session = session is None
+        self._connected = False
+        self.pool_size = pool_size
+        self.keepalive_timeout = keepalive_timeout
+        self.request_timeout = request_timeout
+
+        # nonce_store нужен, когда одним админским ключом подписывают несколько процессов
+        self.nonces = (NonceManager(self.w3) if nonce_store is None
+                       else SharedNonceManager(self.w3, nonce_store))
+        self.fees = FeeOracle(self.w3)
+        self.gas = GasEstimateCache()
+        self.preflight = preflight
+        # голоса подписываются ключом пользователя и отправляются админом через voteBySig
+        self.relay_votes = relay_votes
+        self.ballot_nonces = BallotNonces(self.contract)
+        # пачки voteBatch работают только поверх подписанных бюллетеней
+        self.aggregator = (
+            BallotAggregator(self, window=batch_window)
+            if relay_votes and batch_window is not None else None
+        )
+        self.funding = FundingScheduler(self, self.MIN_FUND_WEI,
+                                        window=fund_window, pool_size=fund_pool_size)
+        self.pending = PendingTxRegistry()
+        self.watcher: ReceiptWatcher | None = None
+        self.poll_cache = PollCache(ttl=self.POLL_CACHE_TTL)
+        self.event_listener: PollEventListener | None = None
+        self.index: IndexStore | None = None
+        self.indexer: EventIndexer | None = None
+
+    @tagged
+    async def connect(self):
+        if self._connected:
+            return
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                raise_for_status=True,
+                connector=aiohttp.TCPConnector(
+                    limit=self.pool_size,
+                    keepalive_timeout=self.keepalive_timeout,
+                ),
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+                trace_configs=[self.rpc_metrics.trace_config()],
+            )
+        if hasattr(self.provider, "cache_async_session"):
+            await self.provider.cache_async_session(self._session)
+        if not await self.w3.is_connected():
+            logger.error("Failed to connect to RPC")
+            raise ConnectionError("RPC connection failed")
+        if isinstance(self.provider, ProviderPool):
+            self.provider.start_health_checks()
+        await self.nonces.sync(self.admin_account.address)
+        self.fees.start()
+        self._connected = True
+
+    def start_watcher(self, on_receipt: OnReceipt, **kwargs) -> ReceiptWatcher:
+        async def handle_receipt(tx: PendingTx, receipt):
+            out_of_gas = self.gas.check_receipt(tx.tx_hash, receipt)
+            if receipt is None:
+                await self._handle_dropped_tx(tx)
+            if tx.kind == "vote_batch":
+                # откат пачки от нехватки газа — не вина голосующих: бюллетени уходят заново
+                if out_of_gas and self.aggregator is not None and await self.aggregator.resend(tx):
+                    return
+                await handle_batch(tx, receipt)
+            else:
+                await finish(tx, receipt)
+
+        async def handle_batch(tx: PendingTx, receipt):
+            rejected = set()
+            if receipt is not None:
+                events = self.contract.events.BallotRejected().process_receipt(receipt)
+                rejected = {e["args"]["index"] for e in events}
+            # каждый бюллетень получает свой статус, как будто это отдельная транзакция
+            for i, ballot in enumerate(tx.meta["ballots"]):
+                ballot_receipt = receipt
+                if receipt is not None and i in rejected:
+                    ballot_receipt = {**receipt, "status": 0}
+                await finish(ballot, ballot_receipt)
+
+        async def finish(tx: PendingTx, receipt):
+            if (receipt is None or receipt["status"] == 0) and "voter" in tx.meta:
+                self.ballot_nonces.reset(tx.meta["voter"])
+            if receipt is not None and tx.kind == "vote" and tx.poll_id is not None:
+                self.poll_cache.invalidate(tx.poll_id, (RESULTS,))
+            await on_receipt(tx, receipt)
+
+        if self.watcher is None:
+            self.watcher = ReceiptWatcher(self.w3, self.pending, handle_receipt, **kwargs)
+        self.watcher.start()
+        return self.watcher
+
+    def start_event_listener(self, **kwargs) -> PollEventListener:
+        if self.event_listener is None:
+            self.event_listener = PollEventListener(self.w3, self.contract, self.poll_cache, **kwargs)
+        self.event_listener.start()
+        return self.event_listener
+
+    def start_indexer(self, store: IndexStore, **kwargs) -> EventIndexer:
+        self.index = store
+        if self.indexer is None:
+            self.indexer = EventIndexer(self.w3, self.contract, store, **kwargs)
+        self.indexer.start()
+        return self.indexer
+
+    async def close(self, drain: bool = False):
+        if self.aggregator is not None:
+            await self.aggregator.close()
+        if self.watcher is not None:
+            await self.watcher.stop(drain=drain)
+        if self.event_listener is not None:
+            await self.event_listener.stop()
+        if self.indexer is not None:
+            await self.indexer.stop()
+        await self.funding.close()
+        await self.fees.stop()
+        if isinstance(self.provider, ProviderPool):
+            await self.provider.disconnect()
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+        self._connected = False
+
+    def _derive_account(self, telegram_id: str) -> Account:
+        return self.accounts.get(telegram_id)
+
+    def derive_many(self, telegram_ids: list) -> dict:
+        return self.accounts.derive_many(telegram_ids)
+
+    async def _ensure_funded(self, user_addr: str):
+        await self.funding.ensure_funded(user_addr)
+
+    @tagged
+    async def prefund_voter(self, telegram_id: str):
+        """Заранее пополняет адрес пользователя, который, скорее всего, сейчас проголосует."""
+        await self.connect()
+        if self.relay_votes:
+            return
+        self.funding.prefund(self._derive_account(telegram_id).address)
+
+    async def _send_admin_transfer(self, to: str, value: int, nonce: int | None = None):
+        admin_addr = self.admin_account.address
+        tip, max_fee = await self.fees.fees()
+        allocated = nonce is None
+        if allocated:
+            nonce = await self.nonces.allocate(admin_addr)
+        tx = {
+            "to": to,
+            "value": value,
+            "chainId": self.CHAIN_ID,
+            "gas": 21000,
+            "maxPriorityFeePerGas": tip,
+            "maxFeePerGas": max_fee,
+            "nonce": nonce,
+        }
+        signed = self.admin_account.sign_transaction(tx)
+        try:
+            return await self.w3.eth.send_raw_transaction(signed.raw_transaction)
+        except Exception:
+            if allocated:
+                self.nonces.release(admin_addr, nonce)
+            raise
+
+    @tagged
+    async def fill_nonce_gaps(self):
+        """Закрывает пропуски в nonce админа пустыми переводами самому себе."""
+        admin_addr = self.admin_account.address
+        for nonce in self.nonces.gaps(admin_addr):
+            if not self.nonces.take_gap(admin_addr, nonce):
+                continue
+            try:
+                tx_hash = await self._send_admin_transfer(admin_addr, 0, nonce=nonce)
+                logger.info("Nonce gap %s filled", nonce, extra={"tx_hash": tx_hash.hex()})
+            except Exception as e:
+                logger.warning("Failed to fill nonce gap %s: %s", nonce, e)
+                await self.nonces.resync(admin_addr)
+
+    async def _in_mempool(self, tx_hash: str) -> bool:
+        try:
+            await self.w3.eth.get_transaction(tx_hash)
+        except TransactionNotFound:
+            return False
+        return True
+
+    async def _handle_dropped_tx(self, tx: PendingTx):
+        # nonce возвращается, только если его не занял ни блок, ни сама
+        # транзакция или её замена в мемпуле
+        mined_nonce = await self.w3.eth.get_transaction_count(tx.account, "latest")
+        if tx.nonce < mined_nonce:
+            return
+        pending_nonce = await self.w3.eth.get_transaction_count(tx.account, "pending")
+        if tx.nonce < pending_nonce or await self._in_mempool(tx.tx_hash):
+            logger.warning("Tx %s timed out but nonce %s is still pending", tx.tx_hash, tx.nonce)
+            return
+        logger.warning("Tx %s with nonce %s was dropped", tx.tx_hash, tx.nonce)
+        self.nonces.release(tx.account, tx.nonce)
+        if tx.account == self.admin_account.address:
+            await self.fill_nonce_gaps()
+
+    async def _broadcast(self, fn_call, account: Account, log: dict | None = None) -> tuple[str, int]:
+        # log — поля записей лога (poll_id, user), см. monitoring.logs
+        log = log or {}
+        logger.debug("Preparing transaction for account %s", account.address, extra=log)
+
+        if self.preflight:
+            try:
+                await fn_call.call({'from': account.address})
+            except Exception as e:
+                logger.error("Preflight call reverted: %s", e)
+                raise RuntimeError(f"Transaction would revert: {e}")
+
+        gas_limit = await self.gas.gas_limit(fn_call, account.address)
+
+        async def build_tx(nonce_val: int, tip_val: int) -> dict:
+            await self.fees.fees()
+            return await fn_call.build_transaction({
+                'chainId': self.CHAIN_ID,
+                'from': account.address,
+                'nonce': nonce_val,
+                'gas': gas_limit,
+                'maxPriorityFeePerGas': tip_val,
+                'maxFeePerGas': self.fees.base_fee * 2 + tip_val,
+            })
+
+        attempts = 0
+        max_attempts = 5
+        tip, _ = await self.fees.fees()
+        nonce = await self.nonces.allocate(account.address)
+
+        last_hash = None
+
+        try:
+            while attempts < max_attempts:
+                try:
+                    tx = await build_tx(nonce, tip)
+                    signed = account.sign_transaction(tx)
+                    tx_hash = await self.w3.eth.send_raw_transaction(signed.raw_transaction)
+                    last_hash = tx_hash.hex()
+                    self.gas.track(last_hash, fn_call, gas_limit)
+                    logger.debug("Sent tx (attempt %s), nonce=%s tip=%s wei",
+                                 attempts + 1, nonce, tip, extra={**log, "tx_hash": last_hash})
+                    return last_hash, nonce
+
+                except (ValueError, Web3RPCError) as ve:
+                    msg = parse_err_msg(ve).lower()
+                    logger.warning("Send error (attempt %s): %s", attempts + 1, msg, extra=log)
+
+                    if "replacement transaction underpriced" in msg or "fee too low" in msg or "underpriced" in msg:
+                        await self.fees.refresh()
+                        tip = max(int(tip * 1.25), tip + 1)
+                        attempts += 1
+                        self.rpc_metrics.retry("eth_sendRawTransaction")
+                        continue
+
+                    if "nonce too low" in msg:
+                        await self.nonces.resync(account.address)
+                        nonce = await self.nonces.allocate(account.address)
+                        attempts += 1
+                        self.rpc_metrics.retry("eth_sendRawTransaction")
+                        continue
+
+                    if "already known" in msg:
+                        tip = max(int(tip * 1.25), tip + 1)
+                        attempts += 1
+                        self.rpc_metrics.retry("eth_sendRawTransaction")
+                        continue
+
+                    raise
+
+            raise RuntimeError(f"Failed to send transaction after {max_attempts} attempts. Last hash: {last_hash}")
+        except Exception:
+            self.nonces.release(account.address, nonce)
+            raise
+
+    async def _send(self, fn_call, account: Account, log: dict | None = None) -> str:
+        tx_hash, _ = await self._broadcast(fn_call, account, log)
+        receipt = await self.w3.eth.wait_for_transaction_receipt(tx_hash)
+        logger.debug("Receipt status=%s", receipt.status, extra={**(log or {}), "tx_hash": tx_hash})
+        if self.gas.check_receipt(tx_hash, receipt):
+            raise RuntimeError("Transaction ran out of gas")
+        if receipt.status == 0:
+            raise RuntimeError("Transaction reverted on-chain")
+        return tx_hash
+
+    async def _submit(self, fn_call, account: Account, kind: str, log: dict | None = None,
+                      **fields) -> PendingTx:
+        tx_hash, nonce = await self._broadcast(fn_call, account, log)
+        tx = PendingTx(tx_hash=tx_hash, nonce=nonce, account=account.address, kind=kind, **fields)
+        self.pending.add(tx)
+        return tx
+
+    @tagged
+    async def create_poll(self, question: str, answers: list, multiple: bool,
+                          start: int, duration: int) -> str:
+        await self.connect()
+        qb = question.encode('utf-8')[:256]
+        ab = [a.encode('utf-8')[:128] for a in answers]
+        fn = self.contract.functions.createPoll(qb, ab, multiple, start, duration)
+        return await self._send(fn, self.admin_account)
+
+    @tagged
+    async def submit_create_poll(self, question: str, answers: list, multiple: bool,
+                                 start: int, duration: int, **fields) -> PendingTx:
+        await self.connect()
+        qb = question.encode('utf-8')[:256]
+        ab = [a.encode('utf-8')[:128] for a in answers]
+        fn = self.contract.functions.createPoll(qb, ab, multiple, start, duration)
+        return await self._submit(fn, self.admin_account, "create_poll", **fields)
+
+    async def _relayed_vote(self, poll_id: int, answer_ids: list, voter: Account):
+        nonce = await self.ballot_nonces.next(voter.address)
+        signature = sign_ballot(voter, self.CHAIN_ID, self.contract.address,
+                                poll_id, answer_ids, nonce)
+        return self.contract.functions.voteBySig(poll_id, answer_ids, voter.address, signature)
+
+    @tagged
+    async def submit_vote(self, poll_id: int, answer_ids: list, telegram_id: str,
+                          **fields) -> PendingTx:
+        await self.connect()
+        user_acct = self._derive_account(telegram_id)
+        log = {"poll_id": poll_id, "user": telegram_id}
+        if not self.relay_votes:
+            await self._ensure_funded(user_acct.address)
+            fn = self.contract.functions.vote(poll_id, answer_ids)
+            return await self._submit(fn, user_acct, "vote", log=log, poll_id=poll_id, **fields)
+
+        if self.aggregator is not None:
+            return await self.aggregator.submit(poll_id, answer_ids, user_acct, **fields)
+
+        fn = await self._relayed_vote(poll_id, answer_ids, user_acct)
+        meta = {**fields.pop("meta", {}), "voter": user_acct.address}
+        try:
+            return await self._submit(fn, self.admin_account, "vote", log=log,
+                                      poll_id=poll_id, meta=meta, **fields)
+        except Exception:
+            self.ballot_nonces.reset(user_acct.address)
+            raise
+
+    @tagged
+    async def vote(self, poll_id: int, answer_ids: list, telegram_id: str) -> str:
+        await self.connect()
+        user_acct = self._derive_account(telegram_id)
+        log = {"poll_id": poll_id, "user": telegram_id}
+        if not self.relay_votes:
+            await self._ensure_funded(user_acct.address)
+            fn = self.contract.functions.vote(poll_id, answer_ids)
+            return await self._send(fn, user_acct, log)
+
+        fn = await self._relayed_vote(poll_id, answer_ids, user_acct)
+        try:
+            return await self._send(fn, self.admin_account, log)
+        except Exception:
+            self.ballot_nonces.reset(user_acct.address)
+            raise
+
+    @tagged
+    async def cancel_poll(self, poll_id: int) -> str:
+        await self.connect()
+        fn = self.contract.functions.cancelPoll(poll_id)
+        return await self._send(fn, self.admin_account, {"poll_id": poll_id})
+
+    @tagged
+    async def update_poll_schedule(self, poll_id: int,
+                                   new_start: int, new_duration: int) -> str:
+        await self.connect()
+        fn = self.contract.functions.updatePollSchedule(
+            poll_id, new_start, new_duration
+        )
+        return await self._send(fn, self.admin_account, {"poll_id": poll_id})
+
+    @tagged
+    async def get_transaction_receipt(self, tx_hash: str):
+        await self.connect()
+        return await self.w3.eth.get_transaction_receipt(tx_hash)
+
+    @tagged
+    async def wait_for_receipt(self, tx_hash: str):
+        await self.connect()
+        return await self.w3.eth.wait_for_transaction_receipt(tx_hash)
+
+    @tagged
+    async def get_block_timestamp(self) -> int:
+        await self.connect()
+        return (await self.w3.eth.get_block('latest'))['timestamp']
+
+    @tagged
+    async def get_poll_info(self, poll_id: int) -> dict:
+        await self.connect()
+        return await self.poll_cache.get_or_load(INFO, poll_id, lambda: self._fetch_poll_info(poll_id))
+
+    async def _fetch_poll_info(self, poll_id: int) -> dict:
+        if self.index is not None:
+            indexed = await asyncio.to_thread(self.index.final_poll_info, poll_id)
+            if indexed is not None:
+                return indexed
+        info = await self.contract.functions.getPollInfo(poll_id).call()
+        return decode_poll_info(info)
+
+    @tagged
+    async def get_results(self, poll_id: int) -> list:
+        await self.connect()
+        return await self.poll_cache.get_or_load(RESULTS, poll_id, lambda: self._fetch_results(poll_id))
+
+    async def _fetch_results(self, poll_id: int) -> list:
+        if self.index is not None:
+            ended = await asyncio.to_thread(self.index.ended_poll, poll_id)
+            if ended is not None:
+                return ended["results"]
+        return await self.contract.functions.getResults(poll_id).call()
+
+    async def _batch_call(self, calls: list) -> list:
+        """Выполняет view-вызовы одним JSON-RPC batch-запросом.
+
+        Если провайдер не поддерживает batch или один из вызовов упал, вызовы
+        повторяются параллельно по отдельности, чтобы ошибка не задела остальные.
+        Упавшие вызовы возвращаются как исключения.
+        """
+        await self.connect()
+        try:
+            async with self.w3.batch_requests() as batch:
+                for call in calls:
+                    batch.add(call)
+                return await batch.async_execute()
+        except Web3TypeError:
+            pass
+        except Exception as e:
+            logger.debug("Batch view call failed, retrying one by one: %s", e)
+        return await asyncio.gather(*(call.call() for call in calls), return_exceptions=True)
+
+    @tagged
+    async def get_poll_snapshot(self, poll_id: int, user: str | None = None) -> dict:
+        """Информация, результаты и (если передан telegram_id) голос пользователя за один запрос.
+
+        Если есть локальный индекс, закончившееся голосование целиком отдаёт он, а
+        у начавшегося из него берётся информация: она уже не меняется. Иначе
+        результаты и голос пользователя читаются из сети.
+        """
+        fns = self.contract.functions
+        if self.index is not None:
+            voter = self._derive_account(user).address if user is not None else None
+            ended = await asyncio.to_thread(self.index.ended_poll, poll_id, voter)
+            if ended is not None:
+                self.poll_cache.put(INFO, poll_id, ended["info"])
+                self.poll_cache.put(RESULTS, poll_id, ended["results"])
+                return ended
+        info = self.poll_cache.get(INFO, poll_id)
+        results = self.poll_cache.get(RESULTS, poll_id)
+        if info is None and self.index is not None:
+            info = await asyncio.to_thread(self.index.final_poll_info, poll_id)
+            if info is not None:
+                self.poll_cache.put(INFO, poll_id, info)
+
+        calls = {}
+        if info is None:
+            calls[INFO] = fns.getPollInfo(poll_id)
+        if results is None:
+            calls[RESULTS] = fns.getResults(poll_id)
+        if user is not None:
+            calls["user_votes"] = fns.getUserVotes(poll_id, self._derive_account(user).address)
+
+        fetched = dict(zip(calls, await self._batch_call(list(calls.values())))) if calls else {}
+        for value in fetched.values():
+            if isinstance(value, Exception):
+                raise value
+
+        if INFO in fetched:
+            info = decode_poll_info(fetched[INFO])
+            self.poll_cache.put(INFO, poll_id, info)
+        if RESULTS in fetched:
+            results = list(fetched[RESULTS])
+            self.poll_cache.put(RESULTS, poll_id, results)
+        return {
+            "info": info,
+            "results": results,
+            "user_votes": list(fetched["user_votes"]) if user is not None else None,
+        }
+
+    @tagged
+    async def get_many_polls(self, poll_ids: list[int]) -> dict[int, dict]:
+        """Информация и результаты нескольких голосований; несуществующие пропускаются."""
+        fns = self.contract.functions
+        calls = []
+        for poll_id in poll_ids:
+            calls.append(fns.getPollInfo(poll_id))
+            calls.append(fns.getResults(poll_id))
+        values = await self._batch_call(calls)
+
+        polls = {}
+        for i, poll_id in enumerate(poll_ids):
+            info, results = values[2 * i], values[2 * i + 1]
+            if isinstance(info, Exception) or isinstance(results, Exception):
+                logger.debug("Skipping poll %s: %s", poll_id, info if isinstance(info, Exception) else results)
+                continue
+            info = decode_poll_info(info)
+            results = list(results)
+            self.poll_cache.put(INFO, poll_id, info)
+            self.poll_cache.put(RESULTS, poll_id, results)
+            polls[poll_id] = {"info": info, "results": results}
+        return polls
+
+    @tagged
+    async def get_user_votes(self, poll_id: int, user_address: str) -> list:
+        await self.connect()
+        return await self.contract.functions.getUserVotes(
+            poll_id, user_address
+        ).call()
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field, replace
+
+from eth_account.signers.local import LocalAccount
+
+from .ballots import sign_ballot
+from .pending_tx import PendingTx
+from .rpc_metrics import background
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class Ballot:
+    poll_id: int
+    answer_ids: list[int]
+    voter: LocalAccount
+    fields: dict
+    future: asyncio.Future = field(repr=False)
+
+class BallotAggregator:
+    """Собирает подписанные бюллетени и отправляет их одной транзакцией voteBatch.
+
+    Пачка уходит через `window` секунд после первого бюллетеня или сразу, как
+    только набралось `max_batch`. Каждый голосующий получает свой PendingTx с
+    хешем общей транзакции; успех отдельного бюллетеня определяется по событию
+    BallotRejected в квитанции (см. AsyncVotingService.start_watcher).
+    Пачка, откатившаяся от нехватки газа, один раз отправляется заново (resend).
+    """
+
+    def __init__(self, service, window: float = 1.0, max_batch: int = 100):
+        self.service = service
+        self.window = window
+        self.max_batch = max_batch
+        self._queue: list[Ballot] = []
+        self._full = asyncio.Event()
+        self._flush_task: asyncio.Task | None = None
+
+    async def submit(self, poll_id: int, answer_ids: list[int], voter: LocalAccount,
+                     **fields) -> PendingTx:
+        fut = asyncio.get_running_loop().create_future()
+        self._queue.append(Ballot(poll_id, list(answer_ids), voter, fields, fut))
+        if len(self._queue) >= self.max_batch:
+            self._full.set()
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+        return await asyncio.shield(fut)
+
+    async def _flush_later(self):
+        background("vote_batch")
+        try:
+            await asyncio.wait_for(self._full.wait(), self.window)
+        except asyncio.TimeoutError:
+            pass
+        while self._queue:
+            self._full.clear()
+            batch = self._queue[:self.max_batch]
+            del self._queue[:self.max_batch]
+            try:
+                await self._send_batch(batch)
+            except Exception as e:
+                logger.exception("Ballot batch failed")
+                for ballot in batch:
+                    self.service.ballot_nonces.reset(ballot.voter.address)
+                    if not ballot.future.done():
+                        ballot.future.set_exception(e)
+
+    async def _send_batch(self, batch: list[Ballot]):
+        service = self.service
+        signatures = []
+        for ballot in batch:
+            nonce = await service.ballot_nonces.next(ballot.voter.address)
+            signatures.append(sign_ballot(ballot.voter, service.CHAIN_ID, service.contract.address,
+                                          ballot.poll_id, ballot.answer_ids, nonce))
+
+        args = (
+            [b.poll_id for b in batch],
+            [b.voter.address for b in batch],
+            [b.answer_ids for b in batch],
+            signatures,
+        )
+        admin = service.admin_account
+        tx_hash, nonce = await service._broadcast(service.contract.functions.voteBatch(*args), admin)
+        logger.debug("Sent %s ballots", len(batch), extra={"tx_hash": tx_hash})
+
+        ballots = []
+        for ballot in batch:
+            fields = dict(ballot.fields)
+            meta = {**fields.pop("meta", {}), "voter": ballot.voter.address}
+            ballots.append(PendingTx(tx_hash=tx_hash, nonce=nonce, account=admin.address, kind="vote",
+                                     poll_id=ballot.poll_id, meta=meta, **fields))
+        service.pending.add(PendingTx(tx_hash=tx_hash, nonce=nonce, account=admin.address,
+                                      kind="vote_batch", meta={"ballots": ballots, "args": args}))
+        for ballot, tx in zip(batch, ballots):
+            if not ballot.future.done():
+                ballot.future.set_result(tx)
+
+    async def resend(self, batch_tx: PendingTx) -> bool:
+        """Повторяет пачку, откатившуюся от нехватки газа; True, если она отправлена.
+
+        Откат не потратил nonce бюллетеней, так что подписи остаются в силе.
+        Лимит газа к этому моменту уже сброшен и оценивается заново.
+        """
+        if batch_tx.meta.get("resent"):
+            return False
+        service = self.service
+        admin = service.admin_account
+        try:
+            tx_hash, nonce = await service._broadcast(
+                service.contract.functions.voteBatch(*batch_tx.meta["args"]), admin)
+        except Exception:
+            logger.exception("Ballot batch resend failed", extra={"tx_hash": batch_tx.tx_hash})
+            return False
+        logger.warning("Resent ballot batch after out of gas", extra={"tx_hash": tx_hash})
+        ballots = [replace(b, tx_hash=tx_hash, nonce=nonce) for b in batch_tx.meta["ballots"]]
+        service.pending.add(PendingTx(tx_hash=tx_hash, nonce=nonce, account=admin.address, kind="vote_batch",
+                                      meta={**batch_tx.meta, "ballots": ballots, "resent": True}))
+        return True
+
+    async def close(self):
+        # накопленные бюллетени отправляются сразу, а не теряются
+        if self._flush_task is not None and not self._flush_task.done():
+            self._full.set()
+            await self._flush_task
@@ -0,0 +1,72 @@
+import asyncio
+import logging
+
+from eth_account import Account
+from eth_account.messages import encode_typed_data
+from eth_account.signers.local import LocalAccount
+
+logger = logging.getLogger(__name__)
+
+BALLOT_TYPES = {
+    "EIP712Domain": [
+        {"name": "name", "type": "string"},
+        {"name": "version", "type": "string"},
+        {"name": "chainId", "type": "uint256"},
+        {"name": "verifyingContract", "type": "address"},
+    ],
+    "Ballot": [
+        {"name": "pollID", "type": "uint256"},
+        {"name": "answerIDs", "type": "uint256[]"},
+        {"name": "nonce", "type": "uint256"},
+    ],
+}
+
+def ballot_message(chain_id: int, contract_address: str, poll_id: int,
+                   answer_ids: list[int], nonce: int):
+    return encode_typed_data(full_message={
+        "types": BALLOT_TYPES,
+        "primaryType": "Ballot",
+        "domain": {
+            "name": "Voting",
+            "version": "1",
+            "chainId": chain_id,
+            "verifyingContract": contract_address,
+        },
+        "message": {"pollID": poll_id, "answerIDs": list(answer_ids), "nonce": nonce},
+    })
+
+def sign_ballot(account: LocalAccount, chain_id: int, contract_address: str,
+                poll_id: int, answer_ids: list[int], nonce: int) -> bytes:
+    """Подпись бюллетеня для Voting.voteBySig (r, s, v — 65 байт)."""
+    message = ballot_message(chain_id, contract_address, poll_id, answer_ids, nonce)
+    return bytes(account.sign_message(message).signature)
+
+def recover_ballot_signer(signature: bytes, chain_id: int, contract_address: str,
+                          poll_id: int, answer_ids: list[int], nonce: int) -> str:
+    message = ballot_message(chain_id, contract_address, poll_id, answer_ids, nonce)
+    return Account.recover_message(message, signature=signature)
+
+class BallotNonces:
+    """Локальный счётчик nonces(voter) контракта.
+
+    Значение читается из контракта один раз, дальше увеличивается при каждой
+    подписи. Если транзакция с бюллетенем не прошла, запись сбрасывается и при
+    следующем голосе nonce снова берётся из контракта.
+    """
+
+    def __init__(self, contract):
+        self.contract = contract
+        self._nonces: dict[str, int] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    async def next(self, voter: str) -> int:
+        lock = self._locks.setdefault(voter, asyncio.Lock())
+        async with lock:
+            nonce = self._nonces.get(voter)
+            if nonce is None:
+                nonce = await self.contract.functions.nonces(voter).call()
+            self._nonces[voter] = nonce + 1
+            return nonce
+
+    def reset(self, voter: str):
+        self._nonces.pop(voter, None)
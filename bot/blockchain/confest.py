@@ -1,4 +0,0 @@
-import sys
-import os
-
-sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
@@ -0,0 +1,30 @@
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from blockchain.testchain import ARTIFACT, SECRET_KEY, local_chain  # noqa: E402
+
+@pytest.fixture(scope="module")
+def chain():
+    return local_chain()
+
+@pytest.fixture(scope="module")
+def svc(chain):
+    from web3 import Web3
+    from blockchain.voting_service import VotingService
+
+    service = VotingService(
+        rpc_url=None,
+        contract_address=chain.contract_address,
+        abi_path=ARTIFACT,
+        secret_key=SECRET_KEY,
+        admin_key=chain.admin_key,
+        provider=chain.provider,
+        chain_id=chain.chain_id,
+    )
+    # eth-tester проверяет баланс даже в eth_call, закладывая газ по лимиту блока
+    service.MIN_FUND_WEI = Web3.to_wei(1, "ether")
+    return service
@@ -0,0 +1,166 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+from web3 import Web3
+
+from .rpc_metrics import background
+
+logger = logging.getLogger(__name__)
+
+MIN_TIP = Web3.to_wei(2, 'gwei')
+# SSTORE в нулевой слот стоит 20 000 газа, перезапись ненулевого — 2 900 (EIP-2929/3529)
+FRESH_SLOT_GAS = 17_100
+# сколько нулевых слотов вызов может записать впервые: счётчики выбранных ответов
+# и nonce подписи; оценка, сделанная на уже ненулевых слотах, этого не видит
+FRESH_SLOTS: dict[str, Callable[[tuple], int]] = {
+    "vote": lambda args: len(args[1]),
+    "voteBySig": lambda args: len(args[1]) + 1,
+    "voteBatch": lambda args: sum(len(answers) + 1 for answers in args[2]),
+}
+# вызовы, чья работа идёт во внешнем вызове (try this.voteBySig): он получает лишь
+# 63/64 оставшегося газа, а при нехватке газа контракт откатывает всю транзакцию
+NESTED_CALLS = {"voteBatch"}
+
+class FeeOracle:
+    """Держит в памяти base fee последнего блока и рекомендуемый tip.
+
+    Значения обновляются фоновым опросом раз в новый блок, так что отправка
+    транзакции не тратит на комиссии ни одного RPC-запроса.
+    """
+
+    def __init__(self, w3, poll_interval: float = 2.0, min_tip: int = MIN_TIP):
+        self.w3 = w3
+        self.poll_interval = poll_interval
+        self.min_tip = min_tip
+        self.block_number: int | None = None
+        self.base_fee: int | None = None
+        self.tip: int | None = None
+        self._task: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        background("fee_oracle")
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Fee refresh failed")
+            await asyncio.sleep(self.poll_interval)
+
+    async def refresh(self):
+        async with self._lock:
+            latest = await self.w3.eth.get_block('latest')
+            if latest['number'] == self.block_number:
+                return
+            try:
+                tip = int(await self.w3.eth.max_priority_fee)
+            except Exception:
+                tip = self.min_tip
+            self.base_fee = latest['baseFeePerGas']
+            self.tip = max(tip, self.min_tip)
+            self.block_number = latest['number']
+            logger.debug("Block %s: base fee %s, tip %s", self.block_number, self.base_fee, self.tip)
+
+    async def fees(self) -> tuple[int, int]:
+        """Возвращает (tip, max_fee); запас в 2 base fee покрывает рост за несколько блоков."""
+        if self.base_fee is None:
+            await self.refresh()
+        return self.tip, self.base_fee * 2 + self.tip
+
+def call_shape(value) -> Hashable:
+    """Форма аргументов: длины списков и байтовых строк вместо самих значений."""
+    if isinstance(value, (list, tuple)):
+        return tuple(call_shape(v) for v in value)
+    if isinstance(value, (bytes, str)):
+        return ("len", len(value))
+    return type(value).__name__
+
+class GasEstimateCache:
+    """Кэш estimate_gas по имени функции и форме её аргументов.
+
+    Газ vote/createPoll зависит от числа ответов и длины строк, а не от
+    конкретных значений, поэтому оценка делается один раз на форму вызова.
+    Но голос в опрос, где за ответ ещё никто не голосовал, пишет в нулевые
+    слоты и дороже: к лимиту добавляется FRESH_SLOT_GAS на каждый такой слот
+    из fresh_slots, а лимит вызовов из NESTED_CALLS умножается на 64/63.
+    Если транзакция всё же упала, израсходовав весь газ (для NESTED_CALLS —
+    упала вообще), check_receipt() сбрасывает оценку, и следующий вызов
+    оценивается заново.
+    """
+
+    def __init__(self, margin: float = 1.2, extra: int = 10_000,
+                 fresh_slots: dict[str, Callable[[tuple], int]] | None = None, max_tracked: int = 10_000):
+        self.margin = margin
+        self.extra = extra
+        self.fresh_slots = FRESH_SLOTS if fresh_slots is None else fresh_slots
+        self.max_tracked = max_tracked
+        self._limits: dict[Hashable, int] = {}
+        # отправленные транзакции, ждущие квитанции: tx_hash -> (форма вызова, лимит газа)
+        self._sent: OrderedDict[str, tuple[Hashable, int]] = OrderedDict()
+
+    @staticmethod
+    def key(fn_call) -> Hashable:
+        return fn_call.fn_name, call_shape(fn_call.args)
+
+    async def gas_limit(self, fn_call, sender: str) -> int:
+        key = self.key(fn_call)
+        limit = self._limits.get(key)
+        if limit is None:
+            estimate = await fn_call.estimate_gas({'from': sender})
+            limit = int(estimate * self.margin) + self.extra
+            fresh_slots = self.fresh_slots.get(fn_call.fn_name)
+            if fresh_slots is not None:
+                limit += FRESH_SLOT_GAS * fresh_slots(fn_call.args)
+            if fn_call.fn_name in NESTED_CALLS:
+                limit = limit * 64 // 63
+            self._limits[key] = limit
+        return limit
+
+    def invalidate(self, fn_call):
+        self._limits.pop(self.key(fn_call), None)
+
+    def track(self, tx_hash: str, fn_call, limit: int):
+        """Запоминает лимит отправленной транзакции до check_receipt()."""
+        self._sent[tx_hash] = (self.key(fn_call), limit)
+        while len(self._sent) > self.max_tracked:
+            self._sent.popitem(last=False)
+
+    def check_receipt(self, tx_hash: str, receipt) -> bool:
+        """Забывает транзакцию; True, если она упала от нехватки газа.
+
+        Тогда оценка её формы сбрасывается (если её не пересчитали раньше).
+        voteBatch при нехватке газа откатывается сам, не израсходовав лимит,
+        поэтому для NESTED_CALLS нехваткой газа считается любой откат.
+        """
+        sent = self._sent.pop(tx_hash, None)
+        if sent is None or receipt is None or receipt["status"] != 0:
+            return False
+        key, limit = sent
+        if receipt["gasUsed"] < limit and key[0] not in NESTED_CALLS:
+            return False
+        if self._limits.get(key) == limit:
+            del self._limits[key]
+        logger.warning("Out of gas with limit %s for %s, estimate dropped", limit, key[0],
+                       extra={"tx_hash": tx_hash})
+        return True
+
+    def __len__(self) -> int:
+        return len(self._limits)
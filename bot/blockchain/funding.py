@@ -0,0 +1,146 @@
+import asyncio
+import logging
+from collections import OrderedDict
+
+from .rpc_metrics import background
+
+logger = logging.getLogger(__name__)
+
+class FundingScheduler:
+    """Пополняет адреса голосующих пачками вместо отдельной транзакции на каждый голос.
+
+    Сначала проверяется баланс: уже пополненный адрес проходит сразу, без
+    ожидания окна. Недофинансированные адреса копятся `window` секунд, затем
+    админ отправляет переводы подряд с локальными nonce (они попадают в один
+    блок) и все ожидающие получают результат разом. `prefund` ставит адрес в
+    очередь заранее, не дожидаясь результата: пополненные так адреса хранятся
+    в пуле, чтобы не пополнять их повторно, но перед голосом баланс всё равно
+    перепроверяется — газ мог уйти на другие транзакции. После close()
+    ожидающие получают ошибку, а не висят вечно.
+    """
+
+    def __init__(self, service, amount: int, window: float = 0.5,
+                 max_batch: int = 50, pool_size: int = 1000):
+        self.service = service
+        self.amount = amount
+        self.window = window
+        self.max_batch = max_batch
+        self.pool_size = pool_size
+        self._queue: dict[str, asyncio.Future] = {}
+        self._ready: OrderedDict[str, None] = OrderedDict()
+        self._prefund_only: set[str] = set()
+        # пачка, которая сейчас пополняется
+        self._in_flight: dict[str, asyncio.Future] = {}
+        self._flush_task: asyncio.Task | None = None
+        self._closed = False
+
+    def _enqueue(self, address: str) -> asyncio.Future:
+        if self._closed:
+            raise RuntimeError("Funding scheduler is closed")
+        fut = self._queue.get(address)
+        if fut is None:
+            fut = self._queue[address] = asyncio.get_running_loop().create_future()
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+        return fut
+
+    async def ensure_funded(self, address: str):
+        self._ready.pop(address, None)
+        if address not in self._queue and address not in self._in_flight:
+            if await self.service.w3.eth.get_balance(address) >= self.amount:
+                return
+        self._prefund_only.discard(address)
+        await asyncio.shield(self._enqueue(address))
+
+    def prefund(self, address: str):
+        if self._closed or address in self._ready or address in self._queue:
+            return
+        self._prefund_only.add(address)
+        fut = self._enqueue(address)
+        fut.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+    def _mark_ready(self, address: str):
+        self._ready[address] = None
+        self._ready.move_to_end(address)
+        while len(self._ready) > self.pool_size:
+            self._ready.popitem(last=False)
+
+    async def _flush_later(self):
+        background("funding")
+        await asyncio.sleep(self.window)
+        while self._queue:
+            batch = dict(list(self._queue.items())[:self.max_batch])
+            for address in batch:
+                del self._queue[address]
+            self._in_flight = batch
+            try:
+                await self._fund_batch(batch)
+            except Exception as e:
+                logger.exception("Funding batch failed")
+                for address, fut in batch.items():
+                    self._resolve(address, fut, error=e)
+            finally:
+                self._in_flight = {}
+
+    async def _fund_batch(self, batch: dict[str, asyncio.Future]):
+        w3 = self.service.w3
+        addresses = list(batch)
+        balances = await asyncio.gather(
+            *(w3.eth.get_balance(a) for a in addresses), return_exceptions=True
+        )
+
+        to_fund = []
+        for address, balance in zip(addresses, balances):
+            if isinstance(balance, Exception):
+                self._resolve(address, batch[address], error=balance)
+            elif balance >= self.amount:
+                self._resolve(address, batch[address])
+            else:
+                to_fund.append(address)
+        if not to_fund:
+            return
+
+        logger.debug("Funding %s addresses in one batch", len(to_fund))
+        sent = await asyncio.gather(
+            *(self.service._send_admin_transfer(a, self.amount) for a in to_fund),
+            return_exceptions=True,
+        )
+        receipts = await asyncio.gather(
+            *(w3.eth.wait_for_transaction_receipt(h) for h in sent if not isinstance(h, Exception)),
+            return_exceptions=True,
+        )
+        receipts = iter(receipts)
+        for address, tx_hash in zip(to_fund, sent):
+            outcome = tx_hash if isinstance(tx_hash, Exception) else next(receipts)
+            if isinstance(outcome, Exception):
+                self._resolve(address, batch[address], error=outcome)
+            elif outcome["status"] == 0:
+                self._resolve(address, batch[address], error=RuntimeError("Funding transaction reverted"))
+            else:
+                self._resolve(address, batch[address])
+
+    def _resolve(self, address: str, fut: asyncio.Future, error: Exception | None = None):
+        prefunded = address in self._prefund_only
+        self._prefund_only.discard(address)
+        if error is None and prefunded:
+            self._mark_ready(address)
+        if fut.done():
+            return
+        if error is not None:
+            fut.set_exception(error)
+        else:
+            fut.set_result(None)
+
+    async def close(self):
+        self._closed = True
+        waiting = {**self._queue, **self._in_flight}
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+        self._queue.clear()
+        error = RuntimeError("Funding scheduler closed")
+        for address, fut in waiting.items():
+            self._resolve(address, fut, error=error)
@@ -0,0 +1,362 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+
+from .rpc_metrics import background
+from .voting_service import decode_poll_info
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    block_number INTEGER PRIMARY KEY,
+    block_hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS polls (
+    id INTEGER PRIMARY KEY,
+    creator TEXT NOT NULL,
+    question TEXT NOT NULL,
+    answers TEXT NOT NULL,
+    multiple_choices INTEGER NOT NULL,
+    start_time INTEGER NOT NULL,
+    end_time INTEGER NOT NULL,
+    canceled_block INTEGER,
+    block_number INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS votes (
+    poll_id INTEGER NOT NULL,
+    voter TEXT NOT NULL,
+    answer_ids TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    block_number INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL,
+    PRIMARY KEY (poll_id, voter)
+);
+CREATE TABLE IF NOT EXISTS vote_answers (
+    poll_id INTEGER NOT NULL,
+    answer_id INTEGER NOT NULL,
+    voter TEXT NOT NULL,
+    block_number INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS vote_answers_poll ON vote_answers (poll_id, answer_id);
+CREATE TABLE IF NOT EXISTS schedule_changes (
+    poll_id INTEGER NOT NULL,
+    start_time INTEGER NOT NULL,
+    end_time INTEGER NOT NULL,
+    block_number INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS schedule_changes_poll ON schedule_changes (poll_id, block_number);
+CREATE TABLE IF NOT EXISTS head (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    block_number INTEGER NOT NULL,
+    timestamp INTEGER NOT NULL
+);
+"""
+
+class IndexStore:
+    """SQLite-хранилище событий контракта Voting."""
+
+    CHECKPOINTS_KEPT = 128
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    # --- запись ---
+
+    def last_checkpoint(self) -> tuple[int, str] | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT block_number, block_hash FROM checkpoints ORDER BY block_number DESC LIMIT 1"
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def checkpoints(self) -> list[tuple[int, str]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT block_number, block_hash FROM checkpoints ORDER BY block_number DESC"
+            ).fetchall()
+        return [(r[0], r[1]) for r in rows]
+
+    def apply(self, records: list[tuple[str, dict]], block_number: int, block_hash: str,
+              timestamp: int | None = None):
+        """Атомарно записывает события диапазона блоков и новый checkpoint."""
+        with self._lock, self._conn:
+            for kind, rec in records:
+                getattr(self, f"_apply_{kind}")(rec)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (block_number, block_hash) VALUES (?, ?)",
+                (block_number, block_hash),
+            )
+            if timestamp is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO head (id, block_number, timestamp) VALUES (0, ?, ?)",
+                    (block_number, timestamp),
+                )
+            self._conn.execute(
+                "DELETE FROM checkpoints WHERE block_number NOT IN "
+                "(SELECT block_number FROM checkpoints ORDER BY block_number DESC LIMIT ?)",
+                (self.CHECKPOINTS_KEPT,),
+            )
+
+    def _apply_poll(self, rec: dict):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO polls (id, creator, question, answers, multiple_choices, "
+            "start_time, end_time, canceled_block, block_number, tx_hash) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, NULL, ?, ?)",
+            (rec["id"], rec["creator"], rec["question"], json.dumps(rec["answers"]),
+             int(rec["multiple_choices"]), rec["start_time"], rec["end_time"],
+             rec["block_number"], rec["tx_hash"]),
+        )
+
+    def _apply_vote(self, rec: dict):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO votes (poll_id, voter, answer_ids, timestamp, block_number, tx_hash) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (rec["poll_id"], rec["voter"], json.dumps(rec["answer_ids"]), rec["timestamp"],
+             rec["block_number"], rec["tx_hash"]),
+        )
+        self._conn.executemany(
+            "INSERT INTO vote_answers (poll_id, answer_id, voter, block_number) VALUES (?, ?, ?, ?)",
+            [(rec["poll_id"], a, rec["voter"], rec["block_number"]) for a in rec["answer_ids"]],
+        )
+
+    def _apply_cancel(self, rec: dict):
+        self._conn.execute(
+            "UPDATE polls SET canceled_block = ? WHERE id = ?",
+            (rec["block_number"], rec["poll_id"]),
+        )
+
+    def _apply_schedule(self, rec: dict):
+        self._conn.execute(
+            "INSERT INTO schedule_changes (poll_id, start_time, end_time, block_number, tx_hash) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (rec["poll_id"], rec["start_time"], rec["end_time"], rec["block_number"], rec["tx_hash"]),
+        )
+
+    def rollback(self, block_number: int):
+        """Удаляет всё, что было проиндексировано после block_number (реорганизация цепи)."""
+        with self._lock, self._conn:
+            for table in ("polls", "votes", "vote_answers", "schedule_changes", "checkpoints", "head"):
+                self._conn.execute(f"DELETE FROM {table} WHERE block_number > ?", (block_number,))
+            self._conn.execute(
+                "UPDATE polls SET canceled_block = NULL WHERE canceled_block > ?", (block_number,)
+            )
+
+    # --- чтение ---
+
+    def get_poll_info(self, poll_id: int) -> dict | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT p.*, s.start_time AS new_start, s.end_time AS new_end FROM polls p "
+                "LEFT JOIN schedule_changes s ON s.rowid = ("
+                "  SELECT rowid FROM schedule_changes WHERE poll_id = p.id "
+                "  ORDER BY block_number DESC, rowid DESC LIMIT 1) "
+                "WHERE p.id = ?",
+                (poll_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'creator': row["creator"],
+            'start_time': row["new_start"] if row["new_start"] is not None else row["start_time"],
+            'end_time': row["new_end"] if row["new_end"] is not None else row["end_time"],
+            'question': row["question"],
+            'answers': json.loads(row["answers"]),
+            'multiple_choices': bool(row["multiple_choices"]),
+            'canceled': row["canceled_block"] is not None,
+        }
+
+    def _head_timestamp(self) -> int | None:
+        with self._lock:
+            head = self._conn.execute("SELECT timestamp FROM head").fetchone()
+        return head[0] if head else None
+
+    def final_poll_info(self, poll_id: int) -> dict | None:
+        """Информация о голосовании, если она уже не изменится, иначе None.
+
+        Отменить или перенести голосование можно только до его начала, так что
+        когда проиндексированные блоки дошли до start_time, индекс совпадает с
+        контрактом навсегда. До этого свежие блоки могут быть ещё не в индексе.
+        """
+        head = self._head_timestamp()
+        info = self.get_poll_info(poll_id) if head is not None else None
+        if info is None or info["start_time"] > head:
+            return None
+        return info
+
+    def ended_poll(self, poll_id: int, voter: str | None = None) -> dict | None:
+        """Информация, итоги и голос voter закончившегося голосования, иначе None.
+
+        После end_time голоса не принимаются, так что индекс, дошедший до блока
+        позже конца голосования, уже не разойдётся с контрактом.
+        """
+        head = self._head_timestamp()
+        info = self.get_poll_info(poll_id) if head is not None else None
+        if info is None or info["end_time"] >= head:
+            return None
+        return {
+            "info": info,
+            "results": self.get_results(poll_id),
+            "user_votes": self.get_user_votes(poll_id, voter) if voter is not None else None,
+        }
+
+    def get_results(self, poll_id: int) -> list | None:
+        info = self.get_poll_info(poll_id)
+        if info is None:
+            return None
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT answer_id, COUNT(*) FROM vote_answers WHERE poll_id = ? GROUP BY answer_id",
+                (poll_id,),
+            ).fetchall()
+        results = [0] * len(info["answers"])
+        for answer_id, count in rows:
+            if answer_id < len(results):
+                results[answer_id] = count
+        return results
+
+    def get_user_votes(self, poll_id: int, voter: str) -> list:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT answer_ids FROM votes WHERE poll_id = ? AND voter = ?", (poll_id, voter)
+            ).fetchone()
+        return json.loads(row[0]) if row else []
+
+class EventIndexer:
+    """Переносит события контракта в IndexStore кусками по chunk_size блоков.
+
+    Индексируются только блоки глубже `confirmations`; если хеш последнего
+    checkpoint больше не совпадает с цепью, индекс откатывается до последнего
+    совпадающего checkpoint и догоняется заново.
+    """
+
+    EVENTS = ("PollCreated", "Voted", "PollCanceled", "ScheduleUpdated")
+
+    def __init__(self, w3, contract, store: IndexStore, start_block: int = 0,
+                 chunk_size: int = 2000, confirmations: int = 3, poll_interval: float = 5.0):
+        self.w3 = w3
+        self.contract = contract
+        self.store = store
+        self.start_block = start_block
+        self.chunk_size = chunk_size
+        self.confirmations = confirmations
+        self.poll_interval = poll_interval
+        self._events = {name: getattr(contract.events, name)() for name in self.EVENTS}
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        background("indexer")
+        while True:
+            try:
+                await self.sync_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Indexer iteration failed")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _block_hash(self, number: int) -> str:
+        return (await self.w3.eth.get_block(number))["hash"].hex()
+
+    async def _handle_reorg(self) -> int:
+        """Возвращает номер последнего блока, который можно считать проиндексированным."""
+        for number, block_hash in await asyncio.to_thread(self.store.checkpoints):
+            if await self._block_hash(number) == block_hash:
+                latest = await asyncio.to_thread(self.store.last_checkpoint)
+                if latest[0] != number:
+                    logger.warning("Reorg detected, rolling index back to block %s", number)
+                    await asyncio.to_thread(self.store.rollback, number)
+                return number
+        logger.warning("Reorg deeper than stored checkpoints, reindexing from %s", self.start_block)
+        await asyncio.to_thread(self.store.rollback, self.start_block - 1)
+        return self.start_block - 1
+
+    async def sync_once(self) -> int:
+        head = await self.w3.eth.block_number
+        target = head - self.confirmations
+        last = self.start_block - 1
+        if await asyncio.to_thread(self.store.last_checkpoint) is not None:
+            last = await self._handle_reorg()
+
+        while last < target:
+            to_block = min(last + self.chunk_size, target)
+            logs = await self.w3.eth.get_logs({
+                "address": self.contract.address,
+                "fromBlock": last + 1,
+                "toBlock": to_block,
+            })
+            records = []
+            for log in logs:
+                record = await self._decode(log)
+                if record is not None:
+                    records.append(record)
+            block = await self.w3.eth.get_block(to_block)
+            await asyncio.to_thread(self.store.apply, records, to_block, block["hash"].hex(), block["timestamp"])
+            logger.debug("Indexed blocks %s-%s: %s events", last + 1, to_block, len(records))
+            last = to_block
+        return last
+
+    async def _decode(self, log) -> tuple[str, dict] | None:
+        for name, event in self._events.items():
+            try:
+                decoded = event.process_log(log)
+            except Exception:
+                continue
+            args = decoded["args"]
+            base = {"block_number": log["blockNumber"], "tx_hash": log["transactionHash"].hex()}
+
+            if name == "PollCreated":
+                # вопрос, ответы и флаг выбора не меняются, поэтому читаются на latest:
+                # обычные узлы не хранят состояние старых блоков. Расписание — из события,
+                # где в поле endTime контракт пишет длительность
+                info = decode_poll_info(await self.contract.functions.getPollInfo(args["id"]).call())
+                return "poll", {**base, **info, "id": args["id"], "creator": args["creator"],
+                                "start_time": args["startTime"], "end_time": args["startTime"] + args["endTime"]}
+            if name == "Voted":
+                return "vote", {**base, "poll_id": args["pollID"], "voter": args["voter"],
+                                "answer_ids": list(args["answerIDs"]), "timestamp": args["timestamp"]}
+            if name == "PollCanceled":
+                return "cancel", {**base, "poll_id": args["id"]}
+            return "schedule", {**base, "poll_id": args["pollID"], "start_time": args["newStartTime"],
+                                "end_time": await self._schedule_end(log, args["pollID"])}
+        return None
+
+    async def _schedule_end(self, log, poll_id: int) -> int:
+        """Новый end_time после переноса: длительности нет в событии, она берётся из вызова."""
+        tx = await self.w3.eth.get_transaction(log["transactionHash"])
+        try:
+            fn, params = self.contract.decode_function_input(tx["input"])
+        except ValueError:
+            fn = None
+        if fn is not None and tx["to"] == self.contract.address and fn.fn_name == "updatePollSchedule":
+            return params["_newStartTime"] + params["_newDuration"]
+        # перенос сделан через другой контракт: текущее значение не старше события
+        info = decode_poll_info(await self.contract.functions.getPollInfo(poll_id).call())
+        return info["end_time"]
@@ -0,0 +1,218 @@
+import asyncio
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+class NonceManager:
+    """Локальная выдача nonce для подписывающих аккаунтов.
+
+    Nonce берётся из сети один раз (или при обнаружении расхождения), дальше
+    выдаётся из памяти под asyncio.Lock, поэтому несколько транзакций одного
+    аккаунта могут уйти в один блок без гонки за get_transaction_count.
+    """
+
+    def __init__(self, w3):
+        self.w3 = w3
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._next: dict[str, int] = {}
+        self._released: dict[str, set[int]] = {}
+
+    def _lock(self, address: str) -> asyncio.Lock:
+        lock = self._locks.get(address)
+        if lock is None:
+            lock = self._locks[address] = asyncio.Lock()
+        return lock
+
+    async def _chain_nonce(self, address: str) -> int:
+        return await self.w3.eth.get_transaction_count(address, "pending")
+
+    async def sync(self, address: str) -> int:
+        async with self._lock(address):
+            return await self._sync_locked(address)
+
+    async def _sync_locked(self, address: str) -> int:
+        chain_nonce = await self._chain_nonce(address)
+        local_nonce = self._next.get(address)
+        if local_nonce is None or chain_nonce > local_nonce:
+            self._next[address] = chain_nonce
+        released = self._released.get(address)
+        if released:
+            released.difference_update({n for n in released if n < chain_nonce})
+        logger.debug("Nonce for %s synced: chain=%s local=%s", address, chain_nonce, self._next[address])
+        return self._next[address]
+
+    async def allocate(self, address: str) -> int:
+        async with self._lock(address):
+            released = self._released.get(address)
+            if released:
+                nonce = min(released)
+                released.discard(nonce)
+                return nonce
+            if address not in self._next:
+                await self._sync_locked(address)
+            nonce = self._next[address]
+            self._next[address] = nonce + 1
+            return nonce
+
+    def release(self, address: str, nonce: int):
+        """Возвращает nonce, который так и не был отправлен в сеть."""
+        if nonce + 1 == self._next.get(address):
+            self._next[address] = nonce
+        else:
+            self._released.setdefault(address, set()).add(nonce)
+
+    async def resync(self, address: str) -> int:
+        """Вызывается при «nonce too low»: догоняет сеть, если локальный счётчик отстал."""
+        return await self.sync(address)
+
+    def gaps(self, address: str) -> list[int]:
+        """Nonce, которые были выданы, но не отправлены и теперь блокируют очередь."""
+        return sorted(self._released.get(address, ()))
+
+    def take_gap(self, address: str, nonce: int) -> bool:
+        released = self._released.get(address)
+        if released and nonce in released:
+            released.discard(nonce)
+            return True
+        return False
+
+NONCE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS nonces (
+    address TEXT PRIMARY KEY,
+    next INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS released (
+    address TEXT NOT NULL,
+    nonce INTEGER NOT NULL,
+    PRIMARY KEY (address, nonce)
+);
+"""
+
+class NonceStore:
+    """Счётчики и возвращённые nonce в SQLite, общие для процессов на одной машине.
+
+    Каждая операция — отдельная транзакция BEGIN IMMEDIATE, поэтому два
+    воркера не получат один и тот же nonce.
+    """
+
+    def __init__(self, path: str, busy_timeout_ms: int = 5000):
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=busy_timeout_ms / 1000,
+                                     isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(NONCE_SCHEMA)
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    @staticmethod
+    def _next(db, address: str) -> int | None:
+        row = db.execute("SELECT next FROM nonces WHERE address = ?", (address,)).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _set_next(db, address: str, value: int):
+        db.execute("INSERT INTO nonces (address, next) VALUES (?, ?) "
+                   "ON CONFLICT (address) DO UPDATE SET next = excluded.next", (address, value))
+
+    def take(self, address: str, chain_nonce: int | None = None) -> int | None:
+        """Наименьший возвращённый nonce или следующий по счётчику.
+
+        None — счётчика ещё нет, и нужно повторить вызов с chain_nonce из сети.
+        """
+        with self._transaction() as db:
+            (released,) = db.execute("SELECT min(nonce) FROM released WHERE address = ?",
+                                     (address,)).fetchone()
+            if released is not None:
+                db.execute("DELETE FROM released WHERE address = ? AND nonce = ?", (address, released))
+                return released
+            nonce = self._next(db, address)
+            if nonce is None:
+                if chain_nonce is None:
+                    return None
+                nonce = chain_nonce
+            self._set_next(db, address, nonce + 1)
+            return nonce
+
+    def sync(self, address: str, chain_nonce: int) -> int:
+        with self._transaction() as db:
+            local_nonce = self._next(db, address)
+            if local_nonce is None or chain_nonce > local_nonce:
+                local_nonce = chain_nonce
+                self._set_next(db, address, chain_nonce)
+            db.execute("DELETE FROM released WHERE address = ? AND nonce < ?", (address, chain_nonce))
+            return local_nonce
+
+    def release(self, address: str, nonce: int):
+        with self._transaction() as db:
+            if nonce + 1 == self._next(db, address):
+                self._set_next(db, address, nonce)
+            else:
+                db.execute("INSERT OR IGNORE INTO released (address, nonce) VALUES (?, ?)", (address, nonce))
+
+    def released(self, address: str) -> list[int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT nonce FROM released WHERE address = ? ORDER BY nonce",
+                                      (address,)).fetchall()
+        return [nonce for (nonce,) in rows]
+
+    def take_released(self, address: str, nonce: int) -> bool:
+        with self._transaction() as db:
+            return db.execute("DELETE FROM released WHERE address = ? AND nonce = ?",
+                              (address, nonce)).rowcount > 0
+
+    def reset(self):
+        """Забывает все счётчики; вызывается до запуска воркеров, nonce заново берутся из сети."""
+        with self._transaction() as db:
+            db.execute("DELETE FROM nonces")
+            db.execute("DELETE FROM released")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class SharedNonceManager(NonceManager):
+    """NonceManager поверх NonceStore: nonce админа делят все воркеры webhook-режима.
+
+    asyncio.Lock по-прежнему выстраивает запросы внутри процесса, между
+    процессами nonce выдаёт транзакция SQLite. release, gaps и take_gap
+    бывают только на путях ошибок и обращаются к базе прямо из event loop.
+    """
+
+    def __init__(self, w3, store: NonceStore):
+        super().__init__(w3)
+        self.store = store
+
+    async def _sync_locked(self, address: str) -> int:
+        chain_nonce = await self._chain_nonce(address)
+        return await asyncio.to_thread(self.store.sync, address, chain_nonce)
+
+    async def allocate(self, address: str) -> int:
+        async with self._lock(address):
+            nonce = await asyncio.to_thread(self.store.take, address)
+            if nonce is None:
+                chain_nonce = await self._chain_nonce(address)
+                nonce = await asyncio.to_thread(self.store.take, address, chain_nonce)
+            return nonce
+
+    def release(self, address: str, nonce: int):
+        self.store.release(address, nonce)
+
+    def gaps(self, address: str) -> list[int]:
+        return self.store.released(address)
+
+    def take_gap(self, address: str, nonce: int) -> bool:
+        return self.store.take_released(address, nonce)
@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+from web3.exceptions import TransactionNotFound
+
+from .rpc_metrics import background
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class PendingTx:
+    tx_hash: str
+    nonce: int
+    account: str
+    kind: str
+    poll_id: int | None = None
+    chat_id: int | None = None
+    message_id: int | None = None
+    meta: dict = field(default_factory=dict)
+    submitted_at: float = field(default_factory=time.monotonic)
+
+class PendingTxRegistry:
+    """Транзакции, отправленные в сеть, но ещё не попавшие в блок."""
+
+    def __init__(self):
+        self._txs: dict[str, PendingTx] = {}
+
+    def add(self, tx: PendingTx):
+        self._txs[tx.tx_hash] = tx
+
+    def get(self, tx_hash: str) -> PendingTx | None:
+        return self._txs.get(tx_hash)
+
+    def pop(self, tx_hash: str) -> PendingTx | None:
+        return self._txs.pop(tx_hash, None)
+
+    def snapshot(self) -> list[PendingTx]:
+        return list(self._txs.values())
+
+    def __len__(self) -> int:
+        return len(self._txs)
+
+    def __contains__(self, tx_hash: str) -> bool:
+        return tx_hash in self._txs
+
+# receipt=None означает, что транзакция не подтвердилась за timeout секунд
+# и её больше нет в мемпуле ноды
+OnReceipt = Callable[[PendingTx, dict | None], Awaitable[None]]
+
+class ReceiptWatcher:
+    """Фоновая задача, которая пачками опрашивает квитанции всех pending-транзакций."""
+
+    def __init__(self, w3, registry: PendingTxRegistry, on_receipt: OnReceipt,
+                 poll_interval: float = 2.0, batch_size: int = 50, timeout: float = 600.0):
+        self.w3 = w3
+        self.registry = registry
+        self.on_receipt = on_receipt
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self, drain: bool = False):
+        if self._task is None:
+            return
+        if drain:
+            self._stopping = True
+            await self._task
+        else:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _run(self):
+        background("receipt_watcher")
+        while True:
+            try:
+                await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Receipt polling failed")
+            if self._stopping and not self.registry:
+                return
+            await asyncio.sleep(self.poll_interval)
+
+    async def _fetch_receipt(self, tx_hash: str):
+        try:
+            return await self.w3.eth.get_transaction_receipt(tx_hash)
+        except TransactionNotFound:
+            return None
+
+    async def _in_mempool(self, tx_hash: str) -> bool:
+        try:
+            await self.w3.eth.get_transaction(tx_hash)
+        except TransactionNotFound:
+            return False
+        except Exception as e:
+            # без ответа ноды транзакцию нельзя считать выброшенной
+            logger.warning("Mempool lookup failed: %s", e, extra={"tx_hash": tx_hash})
+        return True
+
+    async def poll_once(self):
+        pending = self.registry.snapshot()
+        for i in range(0, len(pending), self.batch_size):
+            batch = pending[i:i + self.batch_size]
+            receipts = await asyncio.gather(
+                *(self._fetch_receipt(tx.tx_hash) for tx in batch),
+                return_exceptions=True,
+            )
+            now = time.monotonic()
+            for tx, receipt in zip(batch, receipts):
+                if isinstance(receipt, Exception):
+                    logger.warning("Receipt lookup failed: %s", receipt,
+                                   extra={"tx_hash": tx.tx_hash, "poll_id": tx.poll_id})
+                    continue
+                if receipt is None:
+                    if now - tx.submitted_at < self.timeout:
+                        continue
+                    if await self._in_mempool(tx.tx_hash):
+                        # таймаут — ещё не потеря: ждём следующий период
+                        logger.warning("Tx still pending after %ss", self.timeout,
+                                       extra={"tx_hash": tx.tx_hash, "poll_id": tx.poll_id})
+                        tx.submitted_at = now
+                        continue
+                self.registry.pop(tx.tx_hash)
+                try:
+                    await self.on_receipt(tx, receipt)
+                except Exception:
+                    logger.exception("on_receipt callback failed",
+                                     extra={"tx_hash": tx.tx_hash, "poll_id": tx.poll_id})
@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable
+
+from .rpc_metrics import background
+
+logger = logging.getLogger(__name__)
+
+INFO = "info"
+RESULTS = "results"
+
+# какие данные устаревают после события контракта
+EVENT_INVALIDATES = {
+    "PollCanceled": (INFO,),
+    "ScheduleUpdated": (INFO,),
+    "Voted": (RESULTS,),
+}
+
+class PollCache:
+    """Read-through кэш getPollInfo/getResults с TTL.
+
+    Одновременные запросы одного и того же голосования объединяются в один
+    RPC-вызов, а события контракта сбрасывают устаревшие записи раньше TTL.
+    """
+
+    def __init__(self, ttl: float = 15.0):
+        self.ttl = ttl
+        self._entries: dict[tuple[str, int], tuple[float, object]] = {}
+        self._inflight: dict[tuple[str, int], asyncio.Future] = {}
+
+    async def get_or_load(self, kind: str, poll_id: int, loader: Callable[[], Awaitable]):
+        key = (kind, poll_id)
+        cached = self.get(kind, poll_id)
+        if cached is not None:
+            return cached
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        try:
+            value = await loader()
+        except Exception as e:
+            fut.set_exception(e)
+            fut.exception()
+            raise
+        else:
+            self.put(kind, poll_id, value)
+            fut.set_result(value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def get(self, kind: str, poll_id: int):
+        entry = self._entries.get((kind, poll_id))
+        if entry is not None and time.monotonic() - entry[0] < self.ttl:
+            return entry[1]
+        return None
+
+    def put(self, kind: str, poll_id: int, value):
+        self._entries[(kind, poll_id)] = (time.monotonic(), value)
+
+    def invalidate(self, poll_id: int, kinds: tuple[str, ...] = (INFO, RESULTS)):
+        for kind in kinds:
+            self._entries.pop((kind, poll_id), None)
+
+    def apply_event(self, event_name: str, poll_id: int):
+        kinds = EVENT_INVALIDATES.get(event_name)
+        if kinds:
+            logger.debug("%s for poll %s invalidates %s", event_name, poll_id, kinds)
+            self.invalidate(poll_id, kinds)
+
+    def clear(self):
+        self._entries.clear()
+
+class PollEventListener:
+    """Опрашивает логи контракта раз в блок и сбрасывает затронутые записи кэша."""
+
+    def __init__(self, w3, contract, cache: PollCache, poll_interval: float = 2.0):
+        self.w3 = w3
+        self.contract = contract
+        self.cache = cache
+        self.poll_interval = poll_interval
+        self._last_block: int | None = None
+        self._task: asyncio.Task | None = None
+        self._events = {
+            name: getattr(contract.events, name)() for name in EVENT_INVALIDATES
+        }
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        background("event_listener")
+        while True:
+            try:
+                await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Poll event polling failed")
+            await asyncio.sleep(self.poll_interval)
+
+    async def poll_once(self):
+        head = await self.w3.eth.block_number
+        if self._last_block is None:
+            # события до запуска уже учтены в свежезагруженных данных
+            self._last_block = head
+            return
+        if head <= self._last_block:
+            return
+
+        logs = await self.w3.eth.get_logs({
+            "address": self.contract.address,
+            "fromBlock": self._last_block + 1,
+            "toBlock": head,
+        })
+        for log in logs:
+            self._apply_log(log)
+        self._last_block = head
+
+    def _apply_log(self, log):
+        for name, event in self._events.items():
+            try:
+                decoded = event.process_log(log)
+            except Exception:
+                continue
+            args = decoded["args"]
+            poll_id = args["pollID"] if "pollID" in args else args["id"]
+            self.cache.apply_event(name, poll_id)
+            return
@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+from aiohttp import ClientError, ClientSession
+from web3 import AsyncHTTPProvider
+from web3.providers.async_base import AsyncJSONBaseProvider
+
+logger = logging.getLogger(__name__)
+
+WRITE_METHODS = {"eth_sendRawTransaction"}
+
+@dataclass
+class Endpoint:
+    url: str
+    provider: AsyncHTTPProvider
+    latency: float = 0.0
+    error_rate: float = 0.0
+    failures: int = 0
+    open_until: float = 0.0
+    requests: int = field(default=0, repr=False)
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.open_until
+
+    @property
+    def score(self) -> float:
+        # ошибки штрафуются сильнее, чем задержка
+        return self.latency * (1 + 10 * self.error_rate)
+
+class ProviderPool(AsyncJSONBaseProvider):
+    """Провайдер web3 поверх нескольких RPC-узлов.
+
+    Для каждого узла считается EWMA задержки и доли ошибок. Чтения идут на
+    самый быстрый здоровый узел с переходом на следующий при сетевой ошибке;
+    после `failure_threshold` ошибок подряд узел выключается на `cooldown`
+    секунд (circuit breaker). Отправка транзакций дублируется на `write_fanout`
+    лучших узлов. on_retry(method) вызывается при каждом переходе на следующий узел.
+    """
+
+    TRANSPORT_ERRORS = (ClientError, asyncio.TimeoutError, OSError)
+
+    def __init__(self, urls: list[str], alpha: float = 0.2, failure_threshold: int = 3,
+                 cooldown: float = 30.0, write_fanout: int = 2,
+                 on_retry: Callable[[str], None] | None = None, **kwargs):
+        if not urls:
+            raise ValueError("ProviderPool needs at least one RPC URL")
+        self.endpoints = [
+            Endpoint(url, AsyncHTTPProvider(url, exception_retry_configuration=None))
+            for url in urls
+        ]
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.write_fanout = write_fanout
+        self.on_retry = on_retry
+        self._health_task: asyncio.Task | None = None
+        super().__init__(**kwargs)
+
+    def __str__(self) -> str:
+        return f"RPC pool {[e.url for e in self.endpoints]}"
+
+    async def cache_async_session(self, session: ClientSession) -> ClientSession:
+        for endpoint in self.endpoints:
+            await endpoint.provider.cache_async_session(session)
+        return session
+
+    def ranked(self) -> list[Endpoint]:
+        healthy = [e for e in self.endpoints if e.healthy]
+        if not healthy:
+            # все выключены — пробуем тот, что откроется раньше всех
+            return sorted(self.endpoints, key=lambda e: e.open_until)
+        return sorted(healthy, key=lambda e: e.score)
+
+    def _record_success(self, endpoint: Endpoint, elapsed: float):
+        endpoint.requests += 1
+        endpoint.latency = elapsed if endpoint.requests == 1 else (
+            self.alpha * elapsed + (1 - self.alpha) * endpoint.latency
+        )
+        endpoint.error_rate *= 1 - self.alpha
+        endpoint.failures = 0
+
+    def _record_failure(self, endpoint: Endpoint, error: Exception):
+        endpoint.requests += 1
+        endpoint.error_rate = self.alpha + (1 - self.alpha) * endpoint.error_rate
+        endpoint.failures += 1
+        logger.warning("RPC %s failed (%s in a row): %s", endpoint.url, endpoint.failures, error)
+        if endpoint.failures >= self.failure_threshold:
+            endpoint.open_until = time.monotonic() + self.cooldown
+            logger.warning("RPC %s disabled for %ss", endpoint.url, self.cooldown)
+
+    async def _call(self, endpoint: Endpoint, fn, *args):
+        started = time.monotonic()
+        try:
+            response = await fn(endpoint.provider, *args)
+        except self.TRANSPORT_ERRORS as e:
+            self._record_failure(endpoint, e)
+            raise
+        self._record_success(endpoint, time.monotonic() - started)
+        return response
+
+    async def _with_failover(self, method: str, fn, *args):
+        last_error = None
+        for attempt, endpoint in enumerate(self.ranked()):
+            if attempt and self.on_retry is not None:
+                self.on_retry(method)
+            try:
+                return await self._call(endpoint, fn, *args)
+            except self.TRANSPORT_ERRORS as e:
+                last_error = e
+        raise ConnectionError(f"All RPC endpoints failed: {last_error}")
+
+    async def make_request(self, method, params):
+        if method in WRITE_METHODS:
+            return await self._broadcast(method, params)
+        return await self._with_failover(
+            method, lambda provider, m, p: provider.make_request(m, p), method, params
+        )
+
+    async def make_batch_request(self, requests):
+        return await self._with_failover(
+            "batch", lambda provider, r: provider.make_batch_request(r), requests
+        )
+
+    async def _broadcast(self, method, params):
+        targets = self.ranked()[:self.write_fanout]
+        calls = [
+            asyncio.ensure_future(self._call(e, lambda provider: provider.make_request(method, params)))
+            for e in targets
+        ]
+        last_error = None
+        # первый успешный ответ возвращается сразу, остальные узлы дорабатывают в фоне
+        for fut in asyncio.as_completed(calls):
+            try:
+                response = await fut
+            except self.TRANSPORT_ERRORS as e:
+                last_error = e
+                continue
+            if "error" not in response:
+                return response
+            last_error = response
+        if isinstance(last_error, dict):
+            return last_error
+        raise ConnectionError(f"All RPC endpoints failed: {last_error}")
+
+    async def check_health(self):
+        async def probe(endpoint: Endpoint):
+            try:
+                await self._call(endpoint, lambda provider: provider.make_request("eth_blockNumber", []))
+            except self.TRANSPORT_ERRORS:
+                pass
+            else:
+                endpoint.open_until = 0.0
+
+        await asyncio.gather(*(probe(e) for e in self.endpoints))
+
+    def start_health_checks(self, interval: float = 15.0):
+        async def run():
+            while True:
+                await asyncio.sleep(interval)
+                await self.check_health()
+
+        if self._health_task is None or self._health_task.done():
+            self._health_task = asyncio.create_task(run())
+
+    async def disconnect(self):
+        # сессия общая и закрывается её владельцем
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
@@ -0,0 +1,272 @@
+import time
+from bisect import bisect_left
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from functools import partial, wraps
+from typing import Iterator
+
+from aiohttp import TraceConfig
+from web3.middleware import Web3Middleware
+
+# границы корзин гистограммы задержки, секунды
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# кто породил RPC-запрос: хендлер бота и метод VotingService
+handler_tag: ContextVar[str | None] = ContextVar("rpc_handler", default=None)
+call_tag: ContextVar[str | None] = ContextVar("rpc_call", default=None)
+_trace: ContextVar["RpcTrace | None"] = ContextVar("rpc_trace", default=None)
+_current: ContextVar["RpcCall | None"] = ContextVar("rpc_current", default=None)
+
+def tagged(fn):
+    """Помечает RPC-запросы метода сервиса его именем; внешний помеченный метод главнее."""
+    name = fn.__name__
+
+    @wraps(fn)
+    async def wrapper(*args, **kwargs):
+        if call_tag.get() is not None:
+            return await fn(*args, **kwargs)
+        token = call_tag.set(name)
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            call_tag.reset(token)
+
+    return wrapper
+
+def background(name: str):
+    """Вызывается в начале фоновой задачи.
+
+    Задача наследует контекст того, кто её создал; без этого запросы
+    фонового цикла приписывались бы хендлеру, случайно его запустившему.
+    """
+    handler_tag.set(None)
+    call_tag.set(name)
+    _trace.set(None)
+
+@dataclass
+class RpcCall:
+    method: str
+    call: str | None
+    seconds: float = 0.0
+    ok: bool = True
+    sent: int = 0
+    received: int = 0
+
+@dataclass
+class RpcTrace:
+    """RPC-запросы одного действия пользователя (одного вызова хендлера)."""
+    action: str
+    started: float = field(default_factory=time.time)
+    seconds: float = 0.0
+    calls: list[RpcCall] = field(default_factory=list)
+
+    def counts(self) -> Counter:
+        return Counter(c.method for c in self.calls)
+
+    @property
+    def total(self) -> int:
+        return len(self.calls)
+
+    def as_dict(self) -> dict:
+        return {**asdict(self), "total": self.total}
+
+class RpcBudgetExceeded(AssertionError):
+    pass
+
+def _label(value) -> str:
+    text = "" if value is None else str(value)
+    return text.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def prom_labels(**labels) -> str:
+    return "{" + ",".join(f'{k}="{_label(v)}"' for k, v in labels.items()) + "}"
+
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name: str, **labels) -> list[str]:
+        """Строки гистограммы name в текстовом формате Prometheus."""
+        lines = []
+        cumulative = 0
+        for bound, n in zip((*BUCKETS, "+Inf"), self.counts):
+            cumulative += n
+            lines.append(f"{name}_bucket{prom_labels(**labels, le=bound)} {cumulative}")
+        lines.append(f"{name}_sum{prom_labels(**labels)} {self.sum}")
+        lines.append(f"{name}_count{prom_labels(**labels)} {self.count}")
+        return lines
+
+class RpcMetricsMiddleware(Web3Middleware):
+    """web3-middleware, которое отдаёт каждый запрос к провайдеру в RpcMetrics.
+
+    Ставится самым внутренним слоем, поэтому видит и запросы, которые
+    делают другие middleware (например, eth_chainId при проверке транзакции).
+    """
+
+    def __init__(self, w3, metrics: "RpcMetrics"):
+        super().__init__(w3)
+        self.metrics = metrics
+
+    async def async_wrap_make_request(self, make_request):
+        async def middleware(method, params):
+            return await self.metrics.observe([method], make_request, method, params)
+
+        return middleware
+
+    async def async_wrap_make_batch_request(self, make_batch_request):
+        async def middleware(requests_info):
+            methods = [method for method, _ in requests_info]
+            return await self.metrics.observe(methods, make_batch_request, requests_info)
+
+        return middleware
+
+class RpcMetrics:
+    """Счётчики JSON-RPC запросов: число и ошибки по (method, handler, call),
+    гистограмма задержки, повторы и байты по method.
+
+    Байты считает aiohttp TraceConfig, поэтому они есть только у HTTP-провайдеров
+    на сессии, созданной с trace_config(). Действие пользователя оборачивается в
+    trace(): запросы внутри собираются в RpcTrace, последние max_traces с хотя бы
+    одним запросом хранятся в traces.
+    """
+
+    def __init__(self, max_traces: int = 200):
+        self.calls: Counter[tuple] = Counter()
+        self.errors: Counter[tuple] = Counter()
+        self.retries: Counter[str] = Counter()
+        self.latency: dict[str, Histogram] = {}
+        self.bytes_sent: Counter[str] = Counter()
+        self.bytes_received: Counter[str] = Counter()
+        self.traces: deque[RpcTrace] = deque(maxlen=max_traces)
+
+    @property
+    def middleware(self):
+        """Элемент для w3.middleware_onion."""
+        return partial(RpcMetricsMiddleware, metrics=self)
+
+    async def observe(self, methods: list[str], request, *args):
+        handler, call = handler_tag.get(), call_tag.get()
+        records = [RpcCall(method, call) for method in methods]
+        token = _current.set(records[0])
+        started = time.perf_counter()
+        try:
+            response = await request(*args)
+        except BaseException:
+            for record in records:
+                record.ok = False
+            raise
+        else:
+            responses = response if isinstance(response, list) else [response] * len(records)
+            for record, item in zip(records, responses):
+                record.ok = not (isinstance(item, dict) and "error" in item)
+            return response
+        finally:
+            _current.reset(token)
+            elapsed = time.perf_counter() - started
+            trace = _trace.get()
+            for record in records:
+                record.seconds = elapsed
+                key = (record.method, handler, call)
+                self.calls[key] += 1
+                if not record.ok:
+                    self.errors[key] += 1
+                if trace is not None:
+                    trace.calls.append(record)
+            # пачка — один HTTP-запрос: задержка и байты идут на её первый метод
+            first = records[0]
+            self.latency.setdefault(first.method, Histogram()).observe(elapsed)
+            self.bytes_sent[first.method] += first.sent
+            self.bytes_received[first.method] += first.received
+
+    def retry(self, method: str):
+        self.retries[method] += 1
+
+    def trace_config(self) -> TraceConfig:
+        async def on_sent(session, ctx, params):
+            record = _current.get()
+            if record is not None:
+                record.sent += len(params.chunk)
+
+        async def on_received(session, ctx, params):
+            record = _current.get()
+            if record is not None:
+                record.received += len(params.chunk)
+
+        config = TraceConfig()
+        config.on_request_chunk_sent.append(on_sent)
+        config.on_response_chunk_received.append(on_received)
+        return config
+
+    @contextmanager
+    def trace(self, action: str) -> Iterator[RpcTrace]:
+        trace = RpcTrace(action)
+        tokens = (_trace.set(trace), handler_tag.set(action))
+        started = time.perf_counter()
+        try:
+            yield trace
+        finally:
+            trace.seconds = time.perf_counter() - started
+            _trace.reset(tokens[0])
+            handler_tag.reset(tokens[1])
+            if trace.calls:
+                self.traces.append(trace)
+
+    @contextmanager
+    def budget(self, action: str = "budget", total: int | None = None, **per_method: int) -> Iterator[RpcTrace]:
+        """Для тестов: падает, если действие сделало больше запросов, чем разрешено.
+
+            with metrics.budget(total=6, eth_sendRawTransaction=1):
+                await service.submit_vote(...)
+        """
+        with self.trace(action) as trace:
+            yield trace
+        counts = trace.counts()
+        over = {m: counts[m] for m, limit in per_method.items() if counts[m] > limit}
+        if total is not None and trace.total > total:
+            over["total"] = trace.total
+        if over:
+            raise RpcBudgetExceeded(f"RPC budget exceeded in {action}: {over}; calls: {dict(counts)}")
+
+    def snapshot(self) -> dict:
+        return {
+            "calls": {"/".join(map(_label, key)): n for key, n in self.calls.items()},
+            "errors": {"/".join(map(_label, key)): n for key, n in self.errors.items()},
+            "retries": dict(self.retries),
+            "bytes_sent": dict(self.bytes_sent),
+            "bytes_received": dict(self.bytes_received),
+        }
+
+    def prometheus(self) -> str:
+        """Метрики в текстовом формате Prometheus."""
+        lines = [
+            "# HELP rpc_requests_total JSON-RPC requests by method, bot handler and service call.",
+            "# TYPE rpc_requests_total counter",
+        ]
+        for (method, handler, call), n in sorted(self.calls.items(), key=str):
+            lines.append(f"rpc_requests_total{prom_labels(method=method, handler=handler, call=call)} {n}")
+        lines += ["# HELP rpc_errors_total Failed JSON-RPC requests.", "# TYPE rpc_errors_total counter"]
+        for (method, handler, call), n in sorted(self.errors.items(), key=str):
+            lines.append(f"rpc_errors_total{prom_labels(method=method, handler=handler, call=call)} {n}")
+        lines += ["# HELP rpc_retries_total Repeated JSON-RPC requests.", "# TYPE rpc_retries_total counter"]
+        for method, n in sorted(self.retries.items()):
+            lines.append(f"rpc_retries_total{prom_labels(method=method)} {n}")
+        for name, counter in (("rpc_sent_bytes_total", self.bytes_sent),
+                              ("rpc_received_bytes_total", self.bytes_received)):
+            lines.append(f"# TYPE {name} counter")
+            for method, n in sorted(counter.items()):
+                lines.append(f"{name}{prom_labels(method=method)} {n}")
+        lines += ["# HELP rpc_request_duration_seconds JSON-RPC request latency.",
+                  "# TYPE rpc_request_duration_seconds histogram"]
+        for method, hist in sorted(self.latency.items()):
+            lines += hist.lines("rpc_request_duration_seconds", method=method)
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,24 @@
+from blockchain.accounts import AccountCache, derive_account
+
+SECRET = "f3b1c9e2a8d6f7c4b5a3e9d0c1b2a3f4"
+
+def test_cached_account_matches_derivation():
+    cache = AccountCache(SECRET)
+    acct = cache.get("12345")
+    assert acct.address == derive_account(SECRET, "12345").address
+    assert cache.get("12345") is acct
+
+def test_lru_eviction():
+    cache = AccountCache(SECRET, maxsize=2)
+    cache.get("1")
+    cache.get("2")
+    cache.get("1")
+    cache.get("3")
+    assert "1" in cache and "3" in cache
+    assert "2" not in cache
+
+def test_derive_many():
+    cache = AccountCache(SECRET)
+    accounts = cache.derive_many(["1", "2", "3"])
+    assert list(accounts) == ["1", "2", "3"]
+    assert len({a.address for a in accounts.values()}) == 3
@@ -0,0 +1,225 @@
+import asyncio
+import os
+from types import SimpleNamespace
+
+import pytest
+from eth_abi import encode
+from eth_account import Account
+
+from blockchain.async_voting_service import AsyncVotingService
+from blockchain.ballot_aggregator import BallotAggregator
+from blockchain.ballots import BallotNonces
+from blockchain.pending_tx import PendingTx, PendingTxRegistry
+from blockchain.testchain import ARTIFACT, SECRET_KEY, async_provider, create_and_start_poll
+
+
+class FakeService:
+    CHAIN_ID = 1
+
+    def __init__(self):
+        self.admin_account = Account.create()
+        self.pending = PendingTxRegistry()
+        self.batches = []
+        service = self
+
+        class Functions:
+            @staticmethod
+            def nonces(voter):
+                class Call:
+                    async def call(self):
+                        return 0
+                return Call()
+
+            @staticmethod
+            def voteBatch(poll_ids, voters, answer_ids, signatures):
+                service.batches.append((poll_ids, voters, answer_ids, signatures))
+                return len(service.batches)
+
+        class Contract:
+            address = "0x5FbDB2315678afecb367f032d93F642f64180aa3"
+            functions = Functions
+
+        self.contract = Contract
+        self.ballot_nonces = BallotNonces(Contract)
+
+    async def _broadcast(self, fn, account):
+        return f"hash{fn}", 10 + fn
+
+
+def test_ballots_are_sent_in_one_transaction():
+    async def run():
+        service = FakeService()
+        aggregator = BallotAggregator(service, window=0.05, max_batch=10)
+        voters = [Account.create() for _ in range(3)]
+        txs = await asyncio.gather(*(
+            aggregator.submit(7, [i], voter, chat_id=i, message_id=100 + i)
+            for i, voter in enumerate(voters)
+        ))
+        return service, voters, txs
+
+    service, voters, txs = asyncio.run(run())
+
+    assert len(service.batches) == 1
+    poll_ids, addresses, answer_ids, signatures = service.batches[0]
+    assert poll_ids == [7, 7, 7]
+    assert addresses == [v.address for v in voters]
+    assert answer_ids == [[0], [1], [2]]
+    assert {tx.tx_hash for tx in txs} == {"hash1"}
+    assert [tx.chat_id for tx in txs] == [0, 1, 2]
+    assert txs[1].meta["voter"] == voters[1].address
+
+    batch_tx = service.pending.get("hash1")
+    assert batch_tx.kind == "vote_batch"
+    assert batch_tx.meta["ballots"] == txs
+
+
+def test_full_batch_is_flushed_before_window():
+    async def run():
+        service = FakeService()
+        aggregator = BallotAggregator(service, window=60.0, max_batch=2)
+        voter = Account.create()
+        txs = await asyncio.wait_for(asyncio.gather(
+            aggregator.submit(1, [0], voter), aggregator.submit(2, [1], voter),
+        ), timeout=1.0)
+        return service, txs
+
+    service, txs = asyncio.run(run())
+
+    assert len(service.batches) == 1
+    assert txs[0].tx_hash == txs[1].tx_hash
+
+
+def test_batch_reverted_for_gas_is_resent_once_with_same_signatures():
+    async def run():
+        service = FakeService()
+        aggregator = BallotAggregator(service, window=0.01, max_batch=10)
+        voters = [Account.create() for _ in range(2)]
+        txs = await asyncio.gather(*(aggregator.submit(7, [i], v) for i, v in enumerate(voters)))
+        first = service.pending.get("hash1")
+        assert await aggregator.resend(first)
+        second = service.pending.get("hash2")
+        assert not await aggregator.resend(second)
+        return service, txs, second
+
+    service, txs, second = asyncio.run(run())
+    assert len(service.batches) == 2
+    assert service.batches[1] == service.batches[0]
+    assert [tx.tx_hash for tx in second.meta["ballots"]] == ["hash2", "hash2"]
+    assert [tx.meta["voter"] for tx in second.meta["ballots"]] == [tx.meta["voter"] for tx in txs]
+
+
+CONTRACT_ABI = os.path.join(os.path.dirname(__file__), "..", "..", "blockchain", "contracts", "ContractABI.json")
+
+
+def rejected_log(contract, poll_id, voter, index):
+    # лог BallotRejected в том виде, в каком его пишет voteBatch (событие берётся из ContractABI.json)
+    event = contract.events.BallotRejected()
+    return {
+        "address": contract.address,
+        "topics": [event.topic, encode(["uint256"], [poll_id]), encode(["address"], [voter])],
+        "data": encode(["uint256"], [index]),
+        "logIndex": index, "transactionIndex": 0, "transactionHash": b"\x01" * 32,
+        "blockHash": b"\x02" * 32, "blockNumber": 1,
+    }
+
+
+async def batch_statuses(service, batch_tx, receipt) -> list:
+    statuses = {}
+
+    async def on_receipt(tx, ballot_receipt):
+        statuses[tx.meta["voter"]] = ballot_receipt["status"]
+
+    watcher = service.start_watcher(on_receipt)
+    await watcher.stop()
+    await watcher.on_receipt(batch_tx, receipt)
+    return [statuses[ballot.meta["voter"]] for ballot in batch_tx.meta["ballots"]]
+
+
+def test_batch_receipt_rejections_map_to_ballots(chain):
+    voters = [Account.create().address for _ in range(3)]
+
+    async def run():
+        service = AsyncVotingService(None, chain.contract_address, CONTRACT_ABI, SECRET_KEY, chain.admin_key,
+                                     provider=async_provider(chain), chain_id=chain.chain_id, relay_votes=True)
+        ballots = [PendingTx(tx_hash="0xbatch", nonce=1, account="0xadmin", kind="vote", poll_id=7,
+                             meta={"voter": voter}) for voter in voters]
+        batch_tx = PendingTx(tx_hash="0xbatch", nonce=1, account="0xadmin", kind="vote_batch",
+                             meta={"ballots": ballots})
+        receipt = {"status": 1, "logs": [rejected_log(service.contract, 7, voters[1], 1)]}
+        for voter in voters:
+            service.ballot_nonces._nonces[voter] = 1
+        try:
+            return await batch_statuses(service, batch_tx, receipt), service.ballot_nonces._nonces
+        finally:
+            await service.close()
+
+    statuses, nonces = asyncio.run(run())
+    assert statuses == [1, 0, 1]
+    # nonce подписи отклонённого бюллетеня не потрачен и будет прочитан из контракта заново
+    assert set(nonces) == {voters[0], voters[2]}
+
+
+def test_batch_reverted_for_gas_is_resent_instead_of_failing_voters(chain):
+    async def run():
+        service = AsyncVotingService(None, chain.contract_address, CONTRACT_ABI, SECRET_KEY, chain.admin_key,
+                                     provider=async_provider(chain), chain_id=chain.chain_id,
+                                     relay_votes=True, batch_window=0.05)
+        resent, statuses = [], []
+
+        async def resend(tx):
+            resent.append(tx.tx_hash)
+            return True
+
+        async def on_receipt(tx, receipt):
+            statuses.append(receipt["status"])
+
+        service.aggregator.resend = resend
+        ballot = PendingTx(tx_hash="0xbatch", nonce=1, account="0xadmin", kind="vote", poll_id=7,
+                           meta={"voter": "0xvoter"})
+        batch_tx = PendingTx(tx_hash="0xbatch", nonce=1, account="0xadmin", kind="vote_batch",
+                             meta={"ballots": [ballot]})
+        fn_call = SimpleNamespace(fn_name="voteBatch", args=([7], ["0xvoter"], [[0]], [b"s" * 65]))
+        service.gas.track("0xbatch", fn_call, 500_000)
+        watcher = service.start_watcher(on_receipt)
+        try:
+            await watcher.stop()
+            # откат на проверке запаса газа: израсходована лишь часть лимита
+            await watcher.on_receipt(batch_tx, {"status": 0, "gasUsed": 150_000, "logs": []})
+        finally:
+            await service.close()
+        return resent, statuses
+
+    resent, statuses = asyncio.run(run())
+    assert resent == ["0xbatch"]
+    assert statuses == []
+
+
+def test_real_batch_receipt_rejects_only_bad_ballot(svc, chain):
+    if not any(item.get("name") == "voteBatch" for item in svc.abi):
+        pytest.skip("artifacts predate voteBatch: run npx hardhat compile in blockchain/")
+    poll_id = create_and_start_poll(svc, chain, answers=("A", "B"))
+
+    async def run():
+        service = AsyncVotingService(None, chain.contract_address, ARTIFACT, SECRET_KEY, chain.admin_key,
+                                     provider=async_provider(chain), chain_id=chain.chain_id,
+                                     relay_votes=True, batch_window=0.05)
+        statuses = {}
+
+        async def on_receipt(tx, receipt):
+            statuses[tx.meta["voter"]] = receipt["status"]
+
+        service.start_watcher(on_receipt, poll_interval=0.05)
+        try:
+            # второй бюллетень выбирает несуществующий ответ и откатывается внутри voteBatch
+            txs = await asyncio.gather(*(service.submit_vote(poll_id, answers, user)
+                                         for user, answers in (("2001", [0]), ("2002", [5]), ("2003", [1]))))
+            while len(statuses) < len(txs):
+                await asyncio.sleep(0.05)
+        finally:
+            await service.close()
+        return txs, statuses
+
+    txs, statuses = asyncio.run(asyncio.wait_for(run(), timeout=60))
+    assert len({tx.tx_hash for tx in txs}) == 1
+    assert [statuses[tx.meta["voter"]] for tx in txs] == [1, 0, 1]
+    assert svc.get_results(poll_id) == [1, 1]
@@ -0,0 +1,94 @@
+import asyncio
+import os
+
+import pytest
+from eth_abi import encode
+from eth_account import Account
+from eth_utils import keccak
+
+from blockchain.ballots import BallotNonces, ballot_message, recover_ballot_signer, sign_ballot
+from blockchain.testchain import ARTIFACT, create_and_start_poll
+from blockchain.voting_service import load_abi
+
+CHAIN_ID = 11155111
+CONTRACT = "0x5FbDB2315678afecb367f032d93F642f64180aa3"
+BOT_ABI = os.path.join(os.path.dirname(__file__), "..", "..", "blockchain", "contracts", "ContractABI.json")
+
+
+def solidity_digest(poll_id, answer_ids, nonce):
+    # переписанный на Python Voting._recoverBallot; с контрактом сверяет test_contract_accepts_python_ballot
+    domain = keccak(encode(
+        ["bytes32", "bytes32", "bytes32", "uint256", "address"],
+        [keccak(b"EIP712Domain(string name,string version,uint256 chainId,address verifyingContract)"),
+         keccak(b"Voting"), keccak(b"1"), CHAIN_ID, CONTRACT],
+    ))
+    struct = keccak(encode(
+        ["bytes32", "uint256", "bytes32", "uint256"],
+        [keccak(b"Ballot(uint256 pollID,uint256[] answerIDs,uint256 nonce)"), poll_id,
+         keccak(b"".join(a.to_bytes(32, "big") for a in answer_ids)), nonce],
+    ))
+    return keccak(b"\x19\x01" + domain + struct)
+
+
+def test_ballot_digest_matches_contract():
+    message = ballot_message(CHAIN_ID, CONTRACT, 7, [0, 2], 3)
+    assert keccak(b"\x19" + message.version + message.header + message.body) == solidity_digest(7, [0, 2], 3)
+
+
+def test_signed_ballot_recovers_voter():
+    voter = Account.create()
+    signature = sign_ballot(voter, CHAIN_ID, CONTRACT, 7, [1], 0)
+
+    assert len(signature) == 65
+    assert recover_ballot_signer(signature, CHAIN_ID, CONTRACT, 7, [1], 0) == voter.address
+    assert recover_ballot_signer(signature, CHAIN_ID, CONTRACT, 7, [1], 1) != voter.address
+
+
+def test_ballot_nonces_read_once_and_increment():
+    class Contract:
+        reads = 0
+
+        class functions:
+            @staticmethod
+            def nonces(voter):
+                class Call:
+                    async def call(self):
+                        Contract.reads += 1
+                        return 5
+                return Call()
+
+    async def run():
+        nonces = BallotNonces(Contract)
+        got = [await nonces.next("0xabc") for _ in range(3)]
+        nonces.reset("0xabc")
+        got.append(await nonces.next("0xabc"))
+        return got
+
+    assert asyncio.run(run()) == [5, 6, 7, 5]
+    assert Contract.reads == 2
+
+
+def test_contract_accepts_python_ballot(svc, chain):
+    if not any(item.get("name") == "voteBySig" for item in svc.abi):
+        pytest.skip("artifacts predate voteBySig: run npx hardhat compile in blockchain/")
+    poll_id = create_and_start_poll(svc, chain, answers=("A", "B", "C"), multiple=True)
+    voter = Account.create()
+    contract = svc.contract
+    assert contract.functions.DOMAIN_SEPARATOR().call() == ballot_message(
+        chain.chain_id, contract.address, poll_id, [0], 0).header
+
+    signature = sign_ballot(voter, chain.chain_id, contract.address, poll_id, [0, 2], 0)
+    tx_hash = svc._send(contract.functions.voteBySig(poll_id, [0, 2], voter.address, signature),
+                        svc.admin_account)
+
+    assert svc.w3.eth.get_transaction_receipt(tx_hash).status == 1
+    assert svc.get_user_votes(poll_id, voter.address) == [0, 2]
+    assert contract.functions.nonces(voter.address).call() == 1
+
+
+def test_bot_abi_is_generated_from_artifact():
+    artifact_abi = load_abi(ARTIFACT)
+    if not any(item.get("name") == "voteBySig" for item in artifact_abi):
+        pytest.skip("artifacts predate voteBySig: run npx hardhat compile in blockchain/")
+    # ContractABI.json переписывает задача export-abi после каждой компиляции
+    assert load_abi(BOT_ABI) == artifact_abi
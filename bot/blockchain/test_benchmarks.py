@@ -0,0 +1,51 @@
+"""Бенчмарки VotingService на локальной цепочке (pytest-benchmark), без сети.
+
+    pytest blockchain/test_benchmarks.py --benchmark-autosave
+    pytest blockchain/test_benchmarks.py --benchmark-compare --benchmark-compare-fail=mean:25%
+
+Второй запуск сравнивает с последним сохранённым и падает, если среднее
+время какой-либо операции выросло больше чем на 25%.
+"""
+import itertools
+
+import pytest
+
+from blockchain.testchain import create_and_start_poll
+
+pytest.importorskip("pytest_benchmark")
+
+telegram_ids = itertools.count(10_000)
+
+@pytest.fixture(scope="module")
+def poll_id(svc, chain):
+    poll_id = create_and_start_poll(svc, chain, "Bench?", [f"a{i}" for i in range(8)], multiple=True,
+                                    duration=365 * 24 * 3600)
+    for i in range(20):
+        svc.vote(poll_id, [i % 8], str(next(telegram_ids)))
+    return poll_id
+
+@pytest.mark.benchmark(group="write")
+def test_bench_create_poll(benchmark, svc, chain):
+    start = chain.now() + 3600
+    benchmark.pedantic(svc.create_poll, args=("Q?", ["Yes", "No", "Maybe"], False, start, 600),
+                       rounds=20, iterations=1)
+
+@pytest.mark.benchmark(group="write")
+def test_bench_vote(benchmark, svc, poll_id):
+    # пополнение кошелька — в setup, замеряется только сама транзакция голоса
+    def setup():
+        telegram_id = str(next(telegram_ids))
+        svc._ensure_funded(svc._derive_account(telegram_id).address)
+        return (poll_id, [0, 3], telegram_id), {}
+
+    benchmark.pedantic(svc.vote, setup=setup, rounds=20, iterations=1)
+
+@pytest.mark.benchmark(group="read")
+def test_bench_get_poll_info(benchmark, svc, poll_id):
+    info = benchmark(svc.get_poll_info, poll_id)
+    assert len(info["answers"]) == 8
+
+@pytest.mark.benchmark(group="read")
+def test_bench_get_results(benchmark, svc, poll_id):
+    results = benchmark(svc.get_results, poll_id)
+    assert sum(results) >= 20
@@ -0,0 +1,112 @@
+import asyncio
+from types import SimpleNamespace
+
+from blockchain.fee_oracle import FRESH_SLOT_GAS, FeeOracle, GasEstimateCache, MIN_TIP, call_shape
+from blockchain.test_indexer import deploy
+
+
+def test_call_shape_ignores_values():
+    assert call_shape([b"ab", [b"x", b"yz"], 5]) == call_shape([b"cd", [b"q", b"rs"], 7])
+    assert call_shape([1, [0, 2]]) != call_shape([1, [0]])
+
+
+def test_fee_oracle_refreshes_once_per_block():
+    async def run():
+        _, w3, _, accounts = await deploy()
+        oracle = FeeOracle(w3)
+        tip, max_fee = await oracle.fees()
+        block = oracle.block_number
+
+        assert tip >= MIN_TIP
+        assert max_fee == oracle.base_fee * 2 + tip
+
+        await oracle.refresh()
+        assert oracle.block_number == block
+
+        await w3.eth.send_transaction({"from": accounts[0], "to": accounts[1], "value": 1})
+        await oracle.refresh()
+        assert oracle.block_number == block + 1
+
+    asyncio.run(run())
+
+
+def test_gas_estimate_cached_per_call_shape():
+    async def run():
+        _, w3, contract, accounts = await deploy()
+        now = (await w3.eth.get_block("latest"))["timestamp"]
+        cache = GasEstimateCache()
+        create = contract.functions.createPoll
+
+        first = await cache.gas_limit(create(b"Q1", [b"a", b"b"], False, now + 100, 600), accounts[0])
+        same = await cache.gas_limit(create(b"Q2", [b"c", b"d"], True, now + 200, 60), accounts[0])
+        await cache.gas_limit(create(b"Q1", [b"a", b"b", b"c"], False, now + 100, 600), accounts[0])
+
+        assert first == same
+        assert len(cache) == 2
+        receipt = await w3.eth.wait_for_transaction_receipt(
+            await create(b"Q3", [b"e", b"f"], False, now + 100, 600).transact({"from": accounts[0], "gas": first})
+        )
+        assert receipt.status == 1
+
+    asyncio.run(run())
+
+
+def test_vote_limit_covers_fresh_slots_and_out_of_gas_drops_estimate():
+    async def run():
+        provider, w3, contract, accounts = await deploy()
+        now = (await w3.eth.get_block("latest"))["timestamp"]
+        answers = [b"a", b"b", b"c", b"d", b"e"]
+        for question in (b"Q1", b"Q2", b"Q3"):
+            await contract.functions.createPoll(question, answers, True, now + 100, 600).transact({"from": accounts[0]})
+        provider.ethereum_tester.time_travel(now + 150)
+        everything = [0, 1, 2, 3, 4]
+        await contract.functions.vote(1, everything).transact({"from": accounts[1]})
+
+        async def vote(cache, poll_id, voter):
+            fn = contract.functions.vote(poll_id, everything)
+            # оценка на опросе 1, где счётчики ответов уже ненулевые
+            limit = await cache.gas_limit(contract.functions.vote(1, everything), accounts[2])
+            tx_hash = await fn.transact({"from": voter, "gas": limit})
+            cache.track(tx_hash, fn, limit)
+            return tx_hash, await w3.eth.wait_for_transaction_receipt(tx_hash)
+
+        naive = GasEstimateCache(fresh_slots={})
+        tx_hash, receipt = await vote(naive, 2, accounts[3])
+        assert receipt.status == 0
+        assert naive.check_receipt(tx_hash, receipt)
+        assert len(naive) == 0
+
+        cache = GasEstimateCache()
+        tx_hash, receipt = await vote(cache, 3, accounts[3])
+        assert receipt.status == 1
+        assert not cache.check_receipt(tx_hash, receipt)
+        assert len(cache) == 1
+
+    asyncio.run(run())
+
+
+def test_batch_limit_covers_nested_call_and_any_revert_drops_estimate():
+    async def estimate_gas(tx):
+        return 100_000
+
+    def call(fn_name, args):
+        return SimpleNamespace(fn_name=fn_name, args=args, estimate_gas=estimate_gas)
+
+    async def run():
+        cache = GasEstimateCache()
+        batch = call("voteBatch", ([1, 1], ["0xa", "0xb"], [[0], [1]], [b"s" * 65, b"s" * 65]))
+        vote = call("vote", (1, [0]))
+        batch_limit = await cache.gas_limit(batch, "0xadmin")
+        vote_limit = await cache.gas_limit(vote, "0xadmin")
+        return cache, batch, batch_limit, vote, vote_limit
+
+    cache, batch, batch_limit, vote, vote_limit = asyncio.run(run())
+    assert batch_limit == (130_000 + FRESH_SLOT_GAS * 4) * 64 // 63
+    assert vote_limit == 130_000 + FRESH_SLOT_GAS
+
+    # пачка откатилась на проверке запаса газа, не израсходовав лимит
+    cache.track("0xbatch", batch, batch_limit)
+    cache.track("0xvote", vote, vote_limit)
+    assert cache.check_receipt("0xbatch", {"status": 0, "gasUsed": batch_limit // 2})
+    assert not cache.check_receipt("0xvote", {"status": 0, "gasUsed": vote_limit // 2})
+    assert len(cache) == 1
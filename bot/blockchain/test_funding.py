@@ -0,0 +1,134 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from blockchain.funding import FundingScheduler
+
+AMOUNT = 100
+
+
+class FakeEth:
+    def __init__(self):
+        self.balances = {}
+        self.receipts = {}
+
+    async def get_balance(self, address):
+        balance = self.balances.get(address, 0)
+        if isinstance(balance, Exception):
+            raise balance
+        return balance
+
+    async def wait_for_transaction_receipt(self, tx_hash):
+        await asyncio.sleep(0)
+        return {"status": self.receipts.get(tx_hash, 1)}
+
+
+class FakeService:
+    def __init__(self, delay: float = 0.0):
+        self.eth = FakeEth()
+        self.w3 = SimpleNamespace(eth=self.eth)
+        self.transfers = []
+        self.failing = set()
+        self.delay = delay
+
+    async def _send_admin_transfer(self, to, value):
+        await asyncio.sleep(self.delay)
+        if to in self.failing:
+            raise ValueError("nonce too low")
+        self.transfers.append((to, value, time.monotonic()))
+        balance = self.eth.balances.get(to, 0)
+        if not isinstance(balance, Exception):
+            self.eth.balances[to] = balance + value
+        return f"hash-{to}"
+
+
+def test_addresses_within_window_are_funded_together_after_it():
+    async def run():
+        service = FakeService()
+        service.eth.balances["rich"] = AMOUNT
+        funding = FundingScheduler(service, AMOUNT, window=0.05, max_batch=2)
+        started = time.monotonic()
+        await asyncio.gather(*(funding.ensure_funded(a) for a in ("a", "b", "a", "rich", "c")))
+        return service, started
+
+    service, started = asyncio.run(run())
+    # "a" встречается дважды, но пополняется один раз; "rich" не пополняется вовсе
+    assert sorted(to for to, _, _ in service.transfers) == ["a", "b", "c"]
+    assert all(value == AMOUNT for _, value, _ in service.transfers)
+    assert min(at for _, _, at in service.transfers) - started >= 0.05
+
+
+def test_funded_address_skips_the_window_without_a_transfer():
+    async def run():
+        service = FakeService()
+        service.eth.balances["rich"] = AMOUNT
+        funding = FundingScheduler(service, AMOUNT, window=10)
+        await asyncio.wait_for(funding.ensure_funded("rich"), timeout=1)
+        return service, funding
+
+    service, funding = asyncio.run(run())
+    assert service.transfers == []
+    assert not funding._queue
+
+
+def test_prefunded_addresses_are_rechecked_and_the_pool_is_bounded():
+    async def run():
+        service = FakeService()
+        funding = FundingScheduler(service, AMOUNT, window=0.01, pool_size=2)
+        for address in ("a", "b", "c"):
+            funding.prefund(address)
+        await asyncio.sleep(0.05)
+        sent = len(service.transfers)
+        ready = list(funding._ready)
+
+        await asyncio.wait_for(funding.ensure_funded("c"), timeout=0.005)
+        assert len(service.transfers) == sent
+        # газ "b" ушёл на другие транзакции: запись из пула не принимается на веру
+        service.eth.balances["b"] = 0
+        await funding.ensure_funded("b")
+        return service, sent, ready, list(funding._ready)
+
+    service, sent, ready_before, ready_after = asyncio.run(run())
+    assert sent == 3
+    assert ready_before == ["b", "c"]
+    assert [to for to, _, _ in service.transfers] == ["a", "b", "c", "b"]
+    assert ready_after == []
+
+
+def test_each_waiter_gets_its_own_outcome_in_a_partly_failed_batch():
+    async def run():
+        service = FakeService()
+        service.eth.balances["unknown"] = ConnectionError("balance lookup failed")
+        service.failing.add("unsent")
+        service.eth.receipts["hash-reverted"] = 0
+        funding = FundingScheduler(service, AMOUNT, window=0.01)
+        funding.prefund("reverted")
+        return await asyncio.gather(
+            *(funding.ensure_funded(a) for a in ("ok", "unknown", "unsent", "reverted")),
+            return_exceptions=True,
+        ), funding
+
+    (ok, unknown, unsent, reverted), funding = asyncio.run(run())
+    assert ok is None
+    assert isinstance(unknown, ConnectionError)
+    assert isinstance(unsent, ValueError)
+    assert isinstance(reverted, RuntimeError)
+    assert "reverted" not in funding._ready
+
+
+def test_close_fails_waiters_instead_of_leaving_them_hanging():
+    async def run():
+        service = FakeService(delay=10)
+        funding = FundingScheduler(service, AMOUNT, window=0.01, max_batch=1)
+        waiters = [asyncio.create_task(funding.ensure_funded(a)) for a in ("in-flight", "queued")]
+        await asyncio.sleep(0.05)
+        await funding.close()
+        results = await asyncio.wait_for(asyncio.gather(*waiters, return_exceptions=True), timeout=1)
+        with pytest.raises(RuntimeError):
+            await funding.ensure_funded("late")
+        return results
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) and "closed" in str(r) for r in results)
@@ -0,0 +1,125 @@
+import asyncio
+import json
+import os
+from types import SimpleNamespace
+from web3 import AsyncWeb3
+from web3.providers.eth_tester import AsyncEthereumTesterProvider
+from eth_account import Account
+from blockchain.async_voting_service import AsyncVotingService
+from blockchain.indexer import EventIndexer, IndexStore
+
+ARTIFACT = os.path.join(os.path.dirname(__file__), "..", "..", "blockchain",
+                        "artifacts", "contracts", "voting.sol", "Voting.json")
+
+async def deploy():
+    provider = AsyncEthereumTesterProvider()
+    w3 = AsyncWeb3(provider)
+    with open(ARTIFACT) as f:
+        artifact = json.load(f)
+    accounts = await w3.eth.accounts
+    factory = w3.eth.contract(abi=artifact["abi"], bytecode=artifact["bytecode"])
+    receipt = await w3.eth.wait_for_transaction_receipt(
+        await factory.constructor().transact({"from": accounts[0]})
+    )
+    contract = w3.eth.contract(address=receipt.contractAddress, abi=artifact["abi"])
+    return provider, w3, contract, accounts
+
+async def scenario():
+    provider, w3, contract, accounts = await deploy()
+    now = (await w3.eth.get_block("latest"))["timestamp"]
+    admin = {"from": accounts[0]}
+    for question in (b"Q1", b"Q2", b"Q3"):
+        await contract.functions.createPoll(question, [b"a", b"b", b"c"], True, now + 100, 600).transact(admin)
+    await contract.functions.cancelPoll(2).transact(admin)
+    await contract.functions.updatePollSchedule(3, now + 200, 60).transact(admin)
+
+    provider.ethereum_tester.time_travel(now + 150)
+    await contract.functions.vote(1, [0, 2]).transact({"from": accounts[1]})
+    await contract.functions.vote(1, [2]).transact({"from": accounts[2]})
+
+    store = IndexStore(":memory:")
+    indexer = EventIndexer(w3, contract, store, chunk_size=2, confirmations=0)
+    call = w3.eth.call
+    blocks = []
+
+    async def latest_only(*args, **kwargs):
+        # узлы без архива не отдают состояние старых блоков
+        blocks.append(args[1] if len(args) > 1 else kwargs.get("block_identifier"))
+        return await call(*args, **kwargs)
+
+    w3.eth.call = latest_only
+    await indexer.sync_once()
+    w3.eth.call = call
+    assert blocks and all(b in (None, "latest") for b in blocks)
+    return store, accounts, now, provider, contract
+
+def test_indexer_builds_local_view():
+    store, accounts, now, *_ = asyncio.run(scenario())
+
+    assert store.get_results(1) == [1, 0, 2]
+    assert store.get_user_votes(1, accounts[1]) == [0, 2]
+
+    info = store.get_poll_info(1)
+    assert info["question"] == "Q1"
+    assert info["answers"] == ["a", "b", "c"]
+    assert info["multiple_choices"] is True
+    assert store.get_poll_info(2)["canceled"] is True
+    assert (store.get_poll_info(3)["start_time"], store.get_poll_info(3)["end_time"]) == (now + 200, now + 260)
+
+def test_rollback_forgets_orphaned_blocks():
+    store, accounts, *_ = asyncio.run(scenario())
+    last_vote_block = max(n for n, _ in store.checkpoints())
+
+    store.rollback(last_vote_block - 1)
+
+    assert store.get_results(1) == [1, 0, 1]
+    assert store.get_user_votes(1, accounts[2]) == []
+
+def test_snapshot_reads_only_final_poll_info_from_index():
+    async def run():
+        store, accounts, now, provider, contract = await scenario()
+        assert store.final_poll_info(1)["question"] == "Q1"
+        # голосование 3 ещё не началось: его могут перенести в блоке, которого нет в индексе
+        assert store.get_poll_info(3) is not None and store.final_poll_info(3) is None
+
+        service = AsyncVotingService(None, contract.address, ARTIFACT, "00" * 32, Account.create().key.hex(),
+                                     provider=provider)
+        service.index = store
+        try:
+            with service.rpc_metrics.budget("show_poll", eth_call=2):
+                started = await service.get_poll_snapshot(1, user="42")
+            with service.rpc_metrics.budget("show_poll", eth_call=3):
+                pending = await service.get_poll_snapshot(3)
+        finally:
+            await service.close()
+        return started, pending
+
+    started, pending = asyncio.run(run())
+    assert started["info"]["answers"] == ["a", "b", "c"]
+    assert started["results"] == [1, 0, 2] and started["user_votes"] == []
+    assert pending["info"]["start_time"] == pending["info"]["end_time"] - 60
+
+def test_ended_poll_is_served_from_index_without_rpc():
+    async def run():
+        store, accounts, now, provider, contract = await scenario()
+        assert store.ended_poll(1) is None
+
+        provider.ethereum_tester.time_travel(now + 800)
+        await EventIndexer(contract.w3, contract, store, confirmations=0).sync_once()
+        service = AsyncVotingService(None, contract.address, ARTIFACT, "00" * 32, Account.create().key.hex(),
+                                     provider=provider)
+        service.index = store
+        service._derive_account = lambda user: SimpleNamespace(address=accounts[1])
+        try:
+            await service.connect()
+            with service.rpc_metrics.budget("show_poll", total=0):
+                snapshot = await service.get_poll_snapshot(1, user="42")
+                results = await service.get_results(1)
+        finally:
+            await service.close()
+        return snapshot, results
+
+    snapshot, results = asyncio.run(run())
+    assert snapshot["info"]["question"] == "Q1"
+    assert snapshot["results"] == results == [1, 0, 2]
+    assert snapshot["user_votes"] == [0, 2]
@@ -0,0 +1,77 @@
+import asyncio
+from types import SimpleNamespace
+from blockchain.nonce_manager import NonceManager, NonceStore, SharedNonceManager
+
+class FakeEth:
+    def __init__(self, count):
+        self.count = count
+        self.calls = 0
+
+    async def get_transaction_count(self, address, block):
+        self.calls += 1
+        return self.count
+
+def make_manager(count=5):
+    eth = FakeEth(count)
+    return NonceManager(SimpleNamespace(eth=eth)), eth
+
+def test_concurrent_allocations_are_unique():
+    manager, eth = make_manager()
+
+    async def scenario():
+        return await asyncio.gather(*(manager.allocate("0xadmin") for _ in range(20)))
+
+    nonces = asyncio.run(scenario())
+    assert sorted(nonces) == list(range(5, 25))
+    assert eth.calls == 1
+
+def test_released_nonce_is_reused_first():
+    manager, _ = make_manager()
+
+    async def scenario():
+        first = await manager.allocate("0xadmin")
+        second = await manager.allocate("0xadmin")
+        manager.release("0xadmin", first)
+        assert manager.gaps("0xadmin") == [first]
+        return first, second, await manager.allocate("0xadmin"), await manager.allocate("0xadmin")
+
+    first, second, reused, fresh = asyncio.run(scenario())
+    assert reused == first
+    assert fresh == second + 1
+
+def test_resync_catches_up_with_chain():
+    manager, eth = make_manager()
+
+    async def scenario():
+        await manager.allocate("0xadmin")
+        eth.count = 10
+        await manager.resync("0xadmin")
+        return await manager.allocate("0xadmin")
+
+    assert asyncio.run(scenario()) == 10
+
+def test_shared_store_gives_workers_distinct_nonces(tmp_path):
+    path = str(tmp_path / "nonces.sqlite3")
+    eth = FakeEth(5)
+    stores = [NonceStore(path), NonceStore(path)]
+    workers = [SharedNonceManager(SimpleNamespace(eth=eth), store) for store in stores]
+
+    async def scenario():
+        nonces = await asyncio.gather(*(workers[i % 2].allocate("0xadmin") for i in range(20)))
+        workers[0].release("0xadmin", 7)
+        assert workers[1].gaps("0xadmin") == [7]
+        assert workers[1].take_gap("0xadmin", 7) and not workers[0].take_gap("0xadmin", 7)
+        workers[1].release("0xadmin", 24)
+        return nonces, await workers[0].allocate("0xadmin")
+
+    try:
+        nonces, reused = asyncio.run(scenario())
+        assert sorted(nonces) == list(range(5, 25))
+        assert reused == 24
+        eth.count = 30
+        assert asyncio.run(workers[1].resync("0xadmin")) == 30
+        stores[0].reset()
+        assert stores[1].take("0xadmin") is None
+    finally:
+        for store in stores:
+            store.close()
@@ -0,0 +1,105 @@
+import asyncio
+from types import SimpleNamespace
+from web3.exceptions import TransactionNotFound
+from blockchain.async_voting_service import AsyncVotingService
+from blockchain.pending_tx import PendingTx, PendingTxRegistry, ReceiptWatcher
+from blockchain.testchain import ARTIFACT, SECRET_KEY, async_provider
+
+class FakeEth:
+    def __init__(self, receipts):
+        self.receipts = receipts
+        self.mempool = set()
+        self.calls = 0
+
+    async def get_transaction_receipt(self, tx_hash):
+        self.calls += 1
+        if tx_hash not in self.receipts:
+            raise TransactionNotFound(tx_hash)
+        return self.receipts[tx_hash]
+
+    async def get_transaction(self, tx_hash):
+        if tx_hash not in self.mempool:
+            raise TransactionNotFound(tx_hash)
+        return {"hash": tx_hash}
+
+def make_watcher(receipts, **kwargs):
+    registry = PendingTxRegistry()
+    seen = []
+
+    async def on_receipt(tx, receipt):
+        seen.append((tx.tx_hash, receipt))
+
+    w3 = SimpleNamespace(eth=FakeEth(receipts))
+    return registry, ReceiptWatcher(w3, registry, on_receipt, **kwargs), seen
+
+def test_confirmed_txs_leave_registry():
+    registry, watcher, seen = make_watcher({"aa": {"status": 1}, "bb": {"status": 0}}, batch_size=2)
+    for h in ("aa", "bb", "cc"):
+        registry.add(PendingTx(tx_hash=h, nonce=0, account="0x0", kind="vote"))
+
+    asyncio.run(watcher.poll_once())
+
+    assert sorted(seen) == [("aa", {"status": 1}), ("bb", {"status": 0})]
+    assert "cc" in registry and len(registry) == 1
+
+def test_timed_out_tx_reported_without_receipt():
+    registry, watcher, seen = make_watcher({}, timeout=0)
+    registry.add(PendingTx(tx_hash="aa", nonce=0, account="0x0", kind="vote"))
+
+    asyncio.run(watcher.poll_once())
+
+    assert seen == [("aa", None)]
+    assert len(registry) == 0
+
+def test_timed_out_tx_still_in_mempool_stays_pending():
+    registry, watcher, seen = make_watcher({}, timeout=0)
+    watcher.w3.eth.mempool.add("aa")
+    registry.add(PendingTx(tx_hash="aa", nonce=0, account="0x0", kind="vote"))
+
+    asyncio.run(watcher.poll_once())
+
+    assert seen == []
+    assert "aa" in registry
+
+def test_nonce_released_only_when_neither_mined_nor_pending(chain):
+    async def main():
+        service = AsyncVotingService(None, chain.contract_address, ARTIFACT, SECRET_KEY, chain.admin_key,
+                                     provider=async_provider(chain), chain_id=chain.chain_id)
+        await service.connect()
+        admin = service.admin_account.address
+        tester = chain.provider.ethereum_tester
+        try:
+            mined = service.nonces._next[admin]
+            tx_hash = await service._send_admin_transfer(admin, 0)
+            await service._handle_dropped_tx(PendingTx(tx_hash.hex(), mined, admin, "vote"))
+
+            tester.disable_auto_mine_transactions()
+            try:
+                pending = service.nonces._next[admin]
+                tx_hash = await service._send_admin_transfer(admin, 0)
+                await service._handle_dropped_tx(PendingTx(tx_hash.hex(), pending, admin, "vote"))
+            finally:
+                tester.enable_auto_mine_transactions()
+            assert await service.nonces.allocate(admin) == pending + 1
+
+            # nonce выдан, но транзакция до сети не дошла — его можно отдать заново
+            await service._handle_dropped_tx(PendingTx("0x" + "00" * 32, pending + 1, admin, "vote"))
+            assert await service.nonces.allocate(admin) == pending + 1
+        finally:
+            await service.close()
+
+    asyncio.run(main())
+
+def test_stop_with_drain_waits_for_pending():
+    receipts = {}
+    registry, watcher, seen = make_watcher(receipts, poll_interval=0.01)
+    registry.add(PendingTx(tx_hash="aa", nonce=0, account="0x0", kind="vote"))
+
+    async def scenario():
+        watcher.start()
+        await asyncio.sleep(0.05)
+        receipts["aa"] = {"status": 1}
+        await watcher.stop(drain=True)
+
+    asyncio.run(scenario())
+    assert seen == [("aa", {"status": 1})]
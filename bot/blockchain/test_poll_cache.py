@@ -0,0 +1,49 @@
+import asyncio
+from blockchain.poll_cache import PollCache, INFO, RESULTS
+
+def test_concurrent_reads_share_one_load():
+    cache = PollCache(ttl=60)
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return [1, 2]
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get_or_load(RESULTS, 1, loader) for _ in range(10)))
+
+    assert asyncio.run(scenario()) == [[1, 2]] * 10
+    assert len(calls) == 1
+
+def test_events_invalidate_only_affected_data():
+    cache = PollCache(ttl=60)
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        return len(calls)
+
+    async def scenario():
+        await cache.get_or_load(INFO, 1, loader)
+        await cache.get_or_load(RESULTS, 1, loader)
+        cache.apply_event("Voted", 1)
+        info = await cache.get_or_load(INFO, 1, loader)
+        results = await cache.get_or_load(RESULTS, 1, loader)
+        return info, results
+
+    assert asyncio.run(scenario()) == (1, 3)
+
+def test_expired_entry_is_reloaded():
+    cache = PollCache(ttl=0)
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        return len(calls)
+
+    async def scenario():
+        await cache.get_or_load(INFO, 1, loader)
+        return await cache.get_or_load(INFO, 1, loader)
+
+    assert asyncio.run(scenario()) == 2
@@ -0,0 +1,81 @@
+import asyncio
+
+from aiohttp import ClientSession, web
+
+from blockchain.provider_pool import ProviderPool
+
+
+async def start_node(delay: float = 0.0, fail: bool = False):
+    calls = []
+
+    async def handle(request):
+        body = await request.json()
+        calls.append(body["method"])
+        if fail:
+            return web.Response(status=502)
+        await asyncio.sleep(delay)
+        return web.json_response({"jsonrpc": "2.0", "id": body["id"], "result": "0x1"})
+
+    app = web.Application()
+    app.router.add_post("/", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/", calls
+
+
+async def with_pool(nodes, check, **kwargs):
+    started = [await start_node(**node) for node in nodes]
+    pool = ProviderPool([url for _, url, _ in started], **kwargs)
+    async with ClientSession() as session:
+        await pool.cache_async_session(session)
+        try:
+            await check(pool, [calls for _, _, calls in started])
+        finally:
+            await pool.disconnect()
+            for runner, _, _ in started:
+                await runner.cleanup()
+
+
+def test_reads_go_to_fastest_node():
+    async def check(pool, calls):
+        for _ in range(3):
+            await pool.make_request("eth_blockNumber", [])
+        await pool.check_health()
+        calls[0].clear()
+        calls[1].clear()
+        for _ in range(5):
+            await pool.make_request("eth_blockNumber", [])
+        assert calls[1] == ["eth_blockNumber"] * 5
+        assert calls[0] == []
+
+    asyncio.run(with_pool([{"delay": 0.05}, {}], check))
+
+
+def test_failover_and_circuit_breaker():
+    async def check(pool, calls):
+        bad, good = pool.endpoints
+        for _ in range(3):
+            response = await pool.make_request("eth_blockNumber", [])
+            assert response["result"] == "0x1"
+        assert not bad.healthy
+        assert good.healthy
+
+        calls[0].clear()
+        await pool.make_request("eth_blockNumber", [])
+        assert calls[0] == []
+
+    asyncio.run(with_pool([{"fail": True}, {"delay": 0.01}], check, failure_threshold=2))
+
+
+def test_raw_transactions_fan_out():
+    async def check(pool, calls):
+        response = await pool.make_request("eth_sendRawTransaction", ["0x00"])
+        assert response["result"] == "0x1"
+        await asyncio.sleep(0.05)
+        assert calls[0] == calls[1] == ["eth_sendRawTransaction"]
+        assert calls[2] == []
+
+    asyncio.run(with_pool([{}, {}, {}], check, write_fanout=2))
@@ -0,0 +1,74 @@
+import asyncio
+
+import aiohttp
+import pytest
+from web3 import AsyncWeb3
+
+from blockchain.async_voting_service import AsyncVotingService
+from blockchain.provider_pool import ProviderPool
+from blockchain.rpc_metrics import RpcBudgetExceeded, RpcMetrics
+from blockchain.test_provider_pool import start_node
+from blockchain.testchain import ARTIFACT, SECRET_KEY, async_provider, create_and_start_poll
+from monitoring import start_metrics_server
+
+
+def test_calls_are_tagged_and_budgeted(svc, chain):
+    poll_id = create_and_start_poll(svc, chain)
+
+    async def main():
+        service = AsyncVotingService(None, chain.contract_address, ARTIFACT, SECRET_KEY, chain.admin_key,
+                                     provider=async_provider(chain), chain_id=chain.chain_id)
+        await service.connect()
+        metrics = service.rpc_metrics
+        try:
+            # eth-tester не умеет batch, поэтому три view-вызова идут по отдельности
+            with metrics.budget("show_poll", eth_call=3) as trace:
+                await service.get_poll_snapshot(poll_id, user="42")
+            assert trace.total > 0
+            assert {c.call for c in trace.calls} == {"get_poll_snapshot"}
+            assert all(key[1:] == ("show_poll", "get_poll_snapshot")
+                       for key in metrics.calls if key[2] == "get_poll_snapshot")
+
+            # информация и результаты уже в кэше, но голос пользователя читается снова
+            with pytest.raises(RpcBudgetExceeded, match="eth_call"):
+                with metrics.budget("show_poll", eth_call=0):
+                    await service.get_poll_snapshot(poll_id, user="42")
+            assert [t.action for t in metrics.traces] == ["show_poll", "show_poll"]
+        finally:
+            await service.close()
+
+    asyncio.run(main())
+
+
+def test_failover_retries_bytes_and_prometheus_endpoint():
+    async def main():
+        runner, url, _ = await start_node()
+        dead_runner, dead_url, _ = await start_node()
+        await dead_runner.cleanup()
+
+        metrics = RpcMetrics()
+        pool = ProviderPool([dead_url, url], on_retry=metrics.retry)
+        w3 = AsyncWeb3(pool)
+        w3.middleware_onion.inject(metrics.middleware, name="rpc_metrics", layer=0)
+        server = await start_metrics_server(metrics, "127.0.0.1", 0)
+        port = server.addresses[0][1]
+        try:
+            async with aiohttp.ClientSession(trace_configs=[metrics.trace_config()]) as session:
+                await pool.cache_async_session(session)
+                assert await w3.eth.block_number == 1
+
+            assert metrics.retries["eth_blockNumber"] == 1
+            assert metrics.bytes_sent["eth_blockNumber"] > 0
+            assert metrics.bytes_received["eth_blockNumber"] > 0
+
+            async with aiohttp.ClientSession() as client:
+                async with client.get(f"http://127.0.0.1:{port}/metrics") as resp:
+                    text = await resp.text()
+            assert 'rpc_requests_total{method="eth_blockNumber",handler="",call=""} 1' in text
+            assert 'rpc_retries_total{method="eth_blockNumber"} 1' in text
+            assert 'rpc_request_duration_seconds_bucket{method="eth_blockNumber",le="+Inf"} 1' in text
+        finally:
+            await server.cleanup()
+            await runner.cleanup()
+
+    asyncio.run(main())
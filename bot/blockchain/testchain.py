@@ -0,0 +1,84 @@
+"""Локальный блокчейн для тестов и бенчмарков VotingService без доступа в сеть.
+
+По умолчанию — py-evm в процессе (EthereumTesterProvider). Если задан
+TEST_RPC_URL, используется внешний узел, например `npx hardhat node`
+из каталога blockchain; контракт в обоих случаях разворачивается из
+blockchain/artifacts.
+"""
+import json
+import os
+from dataclasses import dataclass
+
+from eth_account import Account
+from web3 import Web3
+
+ARTIFACT = os.path.join(os.path.dirname(__file__), "..", "..", "blockchain",
+                        "artifacts", "contracts", "voting.sol", "Voting.json")
+SECRET_KEY = "00" * 32
+ADMIN_BALANCE = Web3.to_wei(1000, "ether")
+
+@dataclass
+class LocalChain:
+    provider: object
+    w3: Web3
+    contract_address: str
+    admin_key: str
+    chain_id: int
+
+    def now(self) -> int:
+        return self.w3.eth.get_block("latest")["timestamp"]
+
+    def advance_time(self, seconds: int):
+        """Сдвигает время следующего блока и добывает его."""
+        if hasattr(self.provider, "ethereum_tester"):
+            self.provider.ethereum_tester.time_travel(self.now() + seconds)
+        else:
+            self.provider.make_request("evm_increaseTime", [seconds])
+            self.provider.make_request("evm_mine", [])
+
+def deploy_voting(w3: Web3, deployer: str) -> str:
+    with open(ARTIFACT) as f:
+        artifact = json.load(f)
+    factory = w3.eth.contract(abi=artifact["abi"], bytecode=artifact["bytecode"])
+    receipt = w3.eth.wait_for_transaction_receipt(factory.constructor().transact({"from": deployer}))
+    return receipt.contractAddress
+
+def local_chain() -> LocalChain:
+    """Поднимает цепочку, разворачивает Voting и пополняет свежий админский ключ."""
+    url = os.getenv("TEST_RPC_URL")
+    if url:
+        provider = Web3.HTTPProvider(url)
+    else:
+        from web3.providers.eth_tester import EthereumTesterProvider
+        provider = EthereumTesterProvider()
+    w3 = Web3(provider)
+    deployer = w3.eth.accounts[0]
+
+    admin = Account.create()
+    w3.eth.wait_for_transaction_receipt(
+        w3.eth.send_transaction({"from": deployer, "to": admin.address, "value": ADMIN_BALANCE})
+    )
+    address = deploy_voting(w3, deployer)
+    return LocalChain(provider, w3, address, admin.key.hex(), w3.eth.chain_id)
+
+def poll_id_of(svc, tx_hash: str) -> int:
+    receipt = svc.w3.eth.get_transaction_receipt(tx_hash)
+    return svc.contract.events.PollCreated().process_receipt(receipt)[0]["args"]["id"]
+
+def create_and_start_poll(svc, chain: LocalChain, question="Q?", answers=("Yes", "No"),
+                          multiple=False, duration=120) -> int:
+    """Создаёт голосование через svc и сдвигает время так, чтобы оно уже началось."""
+    start = chain.now() + 30
+    tx_hash = svc.create_poll(question, list(answers), multiple, start, duration)
+    chain.advance_time(31)
+    return poll_id_of(svc, tx_hash)
+
+def async_provider(chain: LocalChain):
+    """Асинхронный провайдер к той же цепочке — для AsyncVotingService."""
+    if hasattr(chain.provider, "ethereum_tester"):
+        from web3.providers.eth_tester import AsyncEthereumTesterProvider
+        provider = AsyncEthereumTesterProvider()
+        provider.ethereum_tester = chain.provider.ethereum_tester
+        return provider
+    from web3 import AsyncWeb3
+    return AsyncWeb3.AsyncHTTPProvider(chain.provider.endpoint_uri)
@@ -1,44 +1,72 @@
 import os
 import json
-import hmac
-import hashlib
 import logging
 from web3 import Web3
 from eth_account import Account
-from eth_keys.constants import SECPK1_N
-from eth_utils import big_endian_to_int
 
-logging.basicConfig(level=logging.DEBUG, format="%(asctime)s [%(levelname)s] %(message)s")
+from .accounts import AccountCache
+
 logger = logging.getLogger(__name__)
 
+
+def load_abi(abi_path: str) -> list:
+    with open(abi_path, 'r') as f:
+        abi_json = json.load(f)
+    return abi_json if isinstance(abi_json, list) else abi_json['abi']
+
+
+def decode_poll_info(info) -> dict:
+    return {
+        'creator': info[0],
+        'start_time': info[1],
+        'end_time': info[2],
+        'question': info[3].decode('utf-8'),
+        'answers': [a.decode('utf-8') for a in info[4]],
+        'multiple_choices': info[5],
+        'canceled': info[6],
+    }
+
+
+def parse_err_msg(err: Exception) -> str:
+    if hasattr(err, 'args') and err.args:
+        first = err.args[0]
+        if isinstance(first, dict) and 'message' in first:
+            return str(first.get('message'))
+    return str(err)
+
+
 class VotingService:
     CHAIN_ID = 11155111
     MIN_FUND_WEI = Web3.to_wei(0.001, "ether")
 
-    def __init__(self, rpc_url: str, contract_address: str,
-                 abi_path: str, secret_key: str, admin_key: str):
-        logger.debug("Initializing Web3 provider to %s", rpc_url)
-        self.w3 = Web3(Web3.HTTPProvider(rpc_url))
+    def __init__(self, rpc_url: str | None, contract_address: str,
+                 abi_path: str, secret_key: str, admin_key: str,
+                 provider=None, chain_id: int | None = None):
+        # provider подменяет HTTP, например EthereumTesterProvider в тестах
+        if provider is None:
+            logger.debug("Initializing Web3 provider to %s", rpc_url)
+            provider = Web3.HTTPProvider(rpc_url)
+        self.w3 = Web3(provider)
+        if chain_id is not None:
+            self.CHAIN_ID = chain_id
         if not self.w3.is_connected():
             logger.error("Failed to connect to RPC")
             raise ConnectionError("RPC connection failed")
 
         logger.debug("Loading ABI from %s", abi_path)
-        with open(abi_path, 'r') as f:
-            abi_json = json.load(f)
-            self.abi = abi_json if isinstance(abi_json, list) else abi_json['abi']
+        self.abi = load_abi(abi_path)
         self.contract = self.w3.eth.contract(address=contract_address, abi=self.abi)
 
         self.secret_key = secret_key
+        self.accounts = AccountCache(secret_key)
         self.admin_account = Account.from_key(admin_key)
         logger.debug("Admin account loaded: %s", self.admin_account.address)
 
     def _derive_account(self, telegram_id: str) -> Account:
-        digest = hmac.new(self.secret_key.encode(), telegram_id.encode(), hashlib.sha256).digest()
-        key_int = big_endian_to_int(digest) % SECPK1_N
-        acct = Account.from_key(key_int.to_bytes(32, 'big'))
-        logger.debug("Derived account: %s", acct.address)
-        return acct
+        return self.accounts.get(telegram_id)
+
+    def derive_many(self, telegram_ids: list) -> dict:
+        return self.accounts.derive_many(telegram_ids)
 
     def _ensure_funded(self, user_addr: str):
         balance = self.w3.eth.get_balance(user_addr)
@@ -58,12 +86,15 @@ class VotingService:
             }
             signed = self.admin_account.sign_transaction(tx)
             tx_hash = self.w3.eth.send_raw_transaction(signed.raw_transaction)
-            logger.debug("Funding tx sent: %s", tx_hash.hex())
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Funding tx sent to %s", user_addr, extra={"tx_hash": tx_hash.hex()})
             self.w3.eth.wait_for_transaction_receipt(tx_hash)
-            logger.debug("Funding tx confirmed")
+            logger.debug("Funding tx confirmed for %s", user_addr)
 
-    def _send(self, fn_call, account: Account) -> str:
-        logger.debug("Preparing transaction for account %s", account.address)
+    def _send(self, fn_call, account: Account, log: dict | None = None) -> str:
+        # log — поля записей лога (poll_id, user), см. monitoring.logs
+        log = log or {}
+        logger.debug("Preparing transaction for account %s", account.address, extra=log)
 
         try:
             fn_call.call({'from': account.address})
@@ -95,13 +126,6 @@ class VotingService:
                 'maxFeePerGas': max_fee,
             })
 
-        def parse_err_msg(err: Exception) -> str:
-            if hasattr(err, 'args') and err.args:
-                first = err.args[0]
-                if isinstance(first, dict) and 'message' in first:
-                    return str(first.get('message'))
-            return str(err)
-
         attempts = 0
         max_attempts = 5
         tip = get_tip_default()
@@ -115,18 +139,18 @@ class VotingService:
                 signed = account.sign_transaction(tx)
                 tx_hash = self.w3.eth.send_raw_transaction(signed.raw_transaction)
                 last_hash = tx_hash.hex()
-                logger.debug("Sent tx (attempt %s), nonce=%s tip=%s wei hash=%s",
-                            attempts + 1, nonce, tip, last_hash)
+                logger.debug("Sent tx (attempt %s), nonce=%s tip=%s wei",
+                             attempts + 1, nonce, tip, extra={**log, "tx_hash": last_hash})
 
                 receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
-                logger.debug("Receipt status=%s", receipt.status)
+                logger.debug("Receipt status=%s", receipt.status, extra={**log, "tx_hash": last_hash})
                 if receipt.status == 0:
                     raise RuntimeError("Transaction reverted on-chain")
                 return last_hash
 
             except ValueError as ve:
                 msg = parse_err_msg(ve).lower()
-                logger.warning("Send error (attempt %s): %s", attempts + 1, msg)
+                logger.warning("Send error (attempt %s): %s", attempts + 1, msg, extra=log)
 
                 if "replacement transaction underpriced" in msg or "fee too low" in msg or "underpriced" in msg:
                     tip = max(int(tip * 1.25), tip + 1)
@@ -164,30 +188,22 @@ class VotingService:
         user_acct = self._derive_account(telegram_id)
         self._ensure_funded(user_acct.address)
         fn = self.contract.functions.vote(poll_id, answer_ids)
-        return self._send(fn, user_acct)
+        return self._send(fn, user_acct, {"poll_id": poll_id, "user": telegram_id})
 
     def cancel_poll(self, poll_id: int) -> str:
         fn = self.contract.functions.cancelPoll(poll_id)
-        return self._send(fn, self.admin_account)
+        return self._send(fn, self.admin_account, {"poll_id": poll_id})
 
     def update_poll_schedule(self, poll_id: int,
                              new_start: int, new_duration: int) -> str:
         fn = self.contract.functions.updatePollSchedule(
             poll_id, new_start, new_duration
         )
-        return self._send(fn, self.admin_account)
+        return self._send(fn, self.admin_account, {"poll_id": poll_id})
 
     def get_poll_info(self, poll_id: int) -> dict:
         info = self.contract.functions.getPollInfo(poll_id).call()
-        return {
-            'creator': info[0],
-            'start_time': info[1],
-            'end_time': info[2],
-            'question': info[3].decode('utf-8'),
-            'answers': [a.decode('utf-8') for a in info[4]],
-            'multiple_choices': info[5],
-            'canceled': info[6],
-        }
+        return decode_poll_info(info)
 
     def get_results(self, poll_id: int) -> list:
         return self.contract.functions.getResults(poll_id).call()
@@ -1,34 +1,134 @@
-from dotenv import load_dotenv
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
-from handlers import routers
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from handlers import routers, notify_tx_result
+from blockchain.async_voting_service import AsyncVotingService
+from blockchain.indexer import IndexStore
+from blockchain.nonce_manager import NonceStore
+from charts import ChartCache, ChartService
+from FSM.storage import make_storage
+from middlewares import AdmissionMiddleware, RpcTraceMiddleware, TimedStorage, TimingMiddleware
+from middlewares.timing import write_traces
+from monitoring import setup_logging, start_metrics_server
+from keyboards.edit_coalescer import EditCoalescer
+from functools import partial
 import asyncio
-import os
 import logging
+import signal
+import config
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(name)s - %(message)s"
-)
 logger = logging.getLogger(__name__)
 
-load_dotenv()
-
 bot = Bot(
-    token=os.getenv("TOKEN"),
+    token=config.TOKEN,
+    session=AiohttpSession(api=TelegramAPIServer.from_base(config.TELEGRAM_API_URL))
+    if config.TELEGRAM_API_URL else None,
     default=DefaultBotProperties(parse_mode="HTML")
 )
-dp = Dispatcher()
+# воркеры webhook-режима подписывают одним админским ключом и берут nonce из общей базы
+nonce_store = NonceStore(config.NONCE_DB) if config.WEBHOOK_WORKERS > 1 else None
+voting_service = AsyncVotingService(
+    config.RPC_URLS,
+    config.CONTRACT_ADDRESS,
+    config.ABI_PATH,
+    config.SECRET_KEY,
+    config.ADMIN_KEY,
+    pool_size=config.RPC_POOL_SIZE,
+    keepalive_timeout=config.RPC_KEEPALIVE_TIMEOUT,
+    request_timeout=config.RPC_TIMEOUT,
+    relay_votes=config.RELAY_VOTES,
+    batch_window=config.VOTE_BATCH_WINDOW,
+    nonce_store=nonce_store,
+    fund_window=config.FUND_WINDOW,
+    fund_pool_size=config.FUND_POOL_SIZE,
+)
+charts = ChartService(
+    max_workers=config.CHART_WORKERS,
+    backend=config.CHART_BACKEND,
+    cache=ChartCache(max_entries=config.CHART_CACHE_ENTRIES, max_bytes=config.CHART_CACHE_BYTES),
+)
+admission = AdmissionMiddleware(
+    user_rate=config.RATE_USER_PER_SEC,
+    user_burst=config.RATE_USER_BURST,
+    poll_rate=config.RATE_POLL_PER_SEC,
+    poll_burst=config.RATE_POLL_BURST,
+    max_in_flight=config.RPC_MAX_IN_FLIGHT,
+    max_waiting=config.RPC_MAX_WAITING,
+    wait_timeout=config.RPC_WAIT_TIMEOUT,
+)
+vote_edits = EditCoalescer(window=config.VOTE_EDIT_WINDOW)
+timing = TimingMiddleware(
+    slow_ms=config.TIMING_SLOW_MS,
+    buffer=config.TIMING_SLOW_BUFFER,
+    profiler=config.TIMING_PROFILER,
+    profile_top=config.TIMING_PROFILE_TOP,
+)
+bot.session.middleware(timing.request_middleware)
+dp = Dispatcher(storage=TimedStorage(make_storage(config.FSM_STORAGE)), voting_service=voting_service,
+                charts=charts, admission=admission, vote_edits=vote_edits)
+# timing первым: в замер попадает и ожидание слота в AdmissionMiddleware
+dp.message.middleware(timing)
+dp.callback_query.middleware(timing)
+dp.message.middleware(admission)
+dp.callback_query.middleware(admission)
+rpc_trace = RpcTraceMiddleware(voting_service.rpc_metrics)
+dp.message.middleware(rpc_trace)
+dp.callback_query.middleware(rpc_trace)
 
 for router in routers:
     dp.include_router(router)
 
+background: list[asyncio.Task] = []
+metrics_server = None
+
+async def on_startup():
+    global metrics_server
+    await voting_service.connect()
+    voting_service.start_watcher(partial(notify_tx_result, bot, voting_service))
+    voting_service.start_event_listener()
+    background.append(asyncio.create_task(admission.report_metrics()))
+    if config.INDEX_DB_PATH and config.WORKER_INDEX == 0:
+        voting_service.start_indexer(IndexStore(config.INDEX_DB_PATH), start_block=config.INDEX_START_BLOCK)
+    elif config.INDEX_DB_PATH:
+        # остальные воркеры только читают индекс, который пишет воркер 0
+        voting_service.index = IndexStore(config.INDEX_DB_PATH)
+    if config.METRICS_PORT:
+        metrics_server = await start_metrics_server(voting_service.rpc_metrics, config.METRICS_HOST,
+                                                    config.METRICS_PORT + config.WORKER_INDEX, timing, admission)
+    if hasattr(signal, "SIGUSR1"):
+        asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, dump_slow_handlers)
+
+def dump_slow_handlers():
+    # буфер забирается в event loop, а запись в файл идёт в отдельном потоке
+    task = asyncio.create_task(asyncio.to_thread(write_traces, config.TIMING_DUMP_PATH, timing.take_slow()))
+    background.append(task)
+    task.add_done_callback(background.remove)
+
+async def on_shutdown():
+    for task in background:
+        task.cancel()
+    if metrics_server is not None:
+        await metrics_server.cleanup()
+    await vote_edits.close()
+    await voting_service.close(drain=True)
+    charts.close()
+    await dp.storage.close()
+    if nonce_store is not None:
+        nonce_store.close()
+
+dp.startup.register(on_startup)
+dp.shutdown.register(on_shutdown)
+
 async def main():
     logger.info("Starting bot...")
     await dp.start_polling(bot, skip_updates=True)
 
 if __name__ == "__main__":
+    log_listener = setup_logging(config.LOG_LEVEL, config.LOG_LEVELS, config.LOG_FORMAT)
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
-        logger.info("Bot stopped by user.")
\ No newline at end of file
+        logger.info("Bot stopped by user.")
+    finally:
+        log_listener.stop()
@@ -0,0 +1,2 @@
+from .cache import ChartCache
+from .service import ChartService
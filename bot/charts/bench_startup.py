@@ -0,0 +1,60 @@
+"""Время старта и память процесса для каждого рендера диаграмм.
+
+Каждый замер — отдельный свежий интерпретатор: импорт charts.render и первый
+рендер, как в новом воркере пула. Запуск из каталога bot:
+
+    python -m charts.bench_startup
+"""
+import json
+import subprocess
+import sys
+import os
+
+PROBE = """
+import json, resource, sys, time
+t0 = time.perf_counter()
+from charts.render import render_votes_chart
+t1 = time.perf_counter()
+rss_import = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+png = render_votes_chart(sys.argv[1], ["Да", "Нет", "Воздержался"], [12, 7, 3], 1, "Активно")
+t2 = time.perf_counter()
+t3 = time.perf_counter()
+render_votes_chart(sys.argv[1], ["Да", "Нет", "Воздержался"], [13, 7, 3], 1, "Активно")
+t4 = time.perf_counter()
+print(json.dumps({
+    "import_ms": (t1 - t0) * 1000,
+    "first_render_ms": (t2 - t1) * 1000,
+    "next_render_ms": (t4 - t3) * 1000,
+    "rss_after_import_mb": rss_import / 1024,
+    "rss_after_render_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "png_bytes": len(png),
+    "matplotlib_loaded": "matplotlib" in sys.modules,
+}))
+"""
+
+def measure(backend: str, runs: int = 3) -> dict | None:
+    bot_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    samples = []
+    for _ in range(runs):
+        proc = subprocess.run([sys.executable, "-c", PROBE, backend], cwd=bot_dir,
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(f"{backend}: {proc.stderr.strip().splitlines()[-1]}", file=sys.stderr)
+            return None
+        samples.append(json.loads(proc.stdout))
+    return {k: min(s[k] for s in samples) if isinstance(samples[0][k], float) else samples[0][k]
+            for k in samples[0]}
+
+def main():
+    columns = ["import_ms", "first_render_ms", "next_render_ms",
+               "rss_after_import_mb", "rss_after_render_mb", "png_bytes", "matplotlib_loaded"]
+    print(f"{'backend':<12}" + "".join(f"{c:>22}" for c in columns))
+    for backend in ("png", "matplotlib"):
+        row = measure(backend)
+        if row is None:
+            continue
+        cells = [f"{row[c]:.1f}" if isinstance(row[c], float) else str(row[c]) for c in columns]
+        print(f"{backend:<12}" + "".join(f"{c:>22}" for c in cells))
+
+if __name__ == "__main__":
+    main()
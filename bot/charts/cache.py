@@ -0,0 +1,75 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+ChartKey = tuple[int, tuple[int, ...], str]
+
+@dataclass
+class CachedChart:
+    png: bytes | None = None
+    file_id: str | None = None
+
+    @property
+    def size(self) -> int:
+        return len(self.png) if self.png is not None else 0
+
+class ChartCache:
+    """LRU-кэш диаграмм по (poll_id, результаты, статус).
+
+    Хранит PNG и file_id, который Telegram выдал после первой отправки. Когда
+    file_id известен, PNG больше не нужен и освобождает место. Вытеснение идёт
+    по числу записей и суммарному размеру PNG.
+    """
+
+    def __init__(self, max_entries: int = 1000, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[ChartKey, CachedChart] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(poll_id: int, results: list[int], status_label: str) -> ChartKey:
+        return poll_id, tuple(results), status_label
+
+    def get(self, key: ChartKey) -> CachedChart | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put_png(self, key: ChartKey, png: bytes):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = CachedChart()
+            elif entry.file_id is not None:
+                return
+            self._bytes += len(png) - entry.size
+            entry.png = png
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def put_file_id(self, key: ChartKey, file_id: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = CachedChart()
+            self._bytes -= entry.size
+            entry.png = None
+            entry.file_id = file_id
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+
+    @property
+    def bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,99 @@
+import struct
+import zlib
+
+WIDTH, HEIGHT = 800, 450
+MARGIN_LEFT, MARGIN_RIGHT, MARGIN_TOP, MARGIN_BOTTOM = 40, 20, 50, 40
+
+BACKGROUND = b"\xff\xff\xff"
+AXIS = b"\x40\x40\x40"
+BAR = b"\x1f\x77\xb4"
+TEXT = b"\x20\x20\x20"
+
+# Шрифт 3x5: цифры и '#'. Кириллицу без шрифтового файла не нарисовать,
+# поэтому столбцы подписаны номерами, а расшифровка идёт в подписи к фото.
+GLYPHS = {
+    "0": ("111", "101", "101", "101", "111"),
+    "1": ("010", "110", "010", "010", "111"),
+    "2": ("111", "001", "111", "100", "111"),
+    "3": ("111", "001", "111", "001", "111"),
+    "4": ("101", "101", "111", "001", "001"),
+    "5": ("111", "100", "111", "001", "111"),
+    "6": ("111", "100", "111", "101", "111"),
+    "7": ("111", "001", "010", "010", "010"),
+    "8": ("111", "101", "111", "101", "111"),
+    "9": ("111", "101", "111", "001", "111"),
+    "#": ("101", "111", "101", "111", "101"),
+}
+
+class Canvas:
+    """RGB-холст в bytearray: только заливка прямоугольников и текст из GLYPHS."""
+
+    def __init__(self, width: int, height: int, background: bytes = BACKGROUND):
+        self.width = width
+        self.height = height
+        self.pixels = bytearray(background * (width * height))
+
+    def rect(self, x0: int, y0: int, x1: int, y1: int, color: bytes):
+        x0, x1 = max(0, x0), min(self.width, x1)
+        y0, y1 = max(0, y0), min(self.height, y1)
+        if x0 >= x1 or y0 >= y1:
+            return
+        line = color * (x1 - x0)
+        stride = self.width * 3
+        for y in range(y0, y1):
+            offset = y * stride + x0 * 3
+            self.pixels[offset:offset + len(line)] = line
+
+    def text(self, x: int, y: int, value: str, scale: int = 3, color: bytes = TEXT):
+        for ch in value:
+            for row, bits in enumerate(GLYPHS[ch]):
+                for col, bit in enumerate(bits):
+                    if bit == "1":
+                        self.rect(x + col * scale, y + row * scale,
+                                  x + (col + 1) * scale, y + (row + 1) * scale, color)
+            x += 4 * scale
+
+    @staticmethod
+    def text_width(value: str, scale: int = 3) -> int:
+        return max(0, len(value) * 4 * scale - scale)
+
+    def to_png(self) -> bytes:
+        stride = self.width * 3
+        raw = b"".join(
+            b"\x00" + self.pixels[y * stride:(y + 1) * stride] for y in range(self.height)
+        )
+        header = struct.pack(">IIBBBBB", self.width, self.height, 8, 2, 0, 0, 0)
+        return (b"\x89PNG\r\n\x1a\n" + _chunk(b"IHDR", header)
+                + _chunk(b"IDAT", zlib.compress(raw, 6)) + _chunk(b"IEND", b""))
+
+def _chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+def render_bar_chart(answers: list[str], results: list[int], poll_id: int, status_label: str) -> bytes:
+    """Столбчатая диаграмма без внешних зависимостей: только zlib и struct.
+
+    Над столбцом — число голосов, под ним — номер варианта (с 1).
+    """
+    canvas = Canvas(WIDTH, HEIGHT)
+    canvas.text(MARGIN_LEFT, 15, f"#{poll_id}")
+
+    plot_w = WIDTH - MARGIN_LEFT - MARGIN_RIGHT
+    plot_h = HEIGHT - MARGIN_TOP - MARGIN_BOTTOM
+    base_y = MARGIN_TOP + plot_h
+    canvas.rect(MARGIN_LEFT, MARGIN_TOP, MARGIN_LEFT + 2, base_y, AXIS)
+    canvas.rect(MARGIN_LEFT, base_y, WIDTH - MARGIN_RIGHT, base_y + 2, AXIS)
+
+    if results:
+        peak = max(max(results), 1)
+        slot = plot_w / len(results)
+        bar_w = max(1, int(slot * 0.7))
+        for i, votes in enumerate(results):
+            center = MARGIN_LEFT + int(slot * i + slot / 2)
+            top = base_y - int(plot_h * votes / peak)
+            canvas.rect(center - bar_w // 2, top, center - bar_w // 2 + bar_w, base_y, BAR)
+
+            count, number = str(votes), str(i + 1)
+            canvas.text(center - canvas.text_width(count) // 2, top - 20, count)
+            canvas.text(center - canvas.text_width(number) // 2, base_y + 12, number)
+
+    return canvas.to_png()
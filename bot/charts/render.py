@@ -0,0 +1,48 @@
+import io
+
+from .png import render_bar_chart
+
+def render_matplotlib(answers: list[str], results: list[int], poll_id: int, status_label: str) -> bytes:
+    """Диаграмма через matplotlib с подписями вариантов.
+
+    matplotlib импортируется при первом вызове, а не при старте бота: импорт
+    занимает заметное время и десятки МБ памяти в каждом процессе.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    labels = [(a if len(a) <= 24 else a[:21] + "…") for a in answers]
+
+    fig = plt.figure(figsize=(8, 4.5))
+    plt.bar(range(len(results)), results)
+    plt.xticks(range(len(results)), labels, rotation=30, ha="right")
+    plt.ylabel("Голоса")
+    plt.title(f"Голоса по вариантам • #{poll_id} ({status_label})")
+    plt.tight_layout()
+
+    buf = io.BytesIO()
+    plt.savefig(buf, format="png", dpi=200)
+    plt.close(fig)
+    return buf.getvalue()
+
+RENDERERS = {
+    "png": render_bar_chart,
+    "matplotlib": render_matplotlib,
+}
+
+# рендеры, которые не подписывают столбцы названиями вариантов
+NUMBERED_BACKENDS = {"png"}
+
+def render_votes_chart(backend: str, answers: list[str], results: list[int], poll_id: int,
+                       status_label: str) -> bytes:
+    """Рисует столбчатую диаграмму голосов выбранным рендером и возвращает PNG.
+
+    Функция запускается в процессе-воркере, поэтому принимает и возвращает
+    только простые значения.
+    """
+    try:
+        renderer = RENDERERS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown chart backend: {backend}") from None
+    return renderer(answers, results, poll_id, status_label)
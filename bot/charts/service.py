@@ -0,0 +1,88 @@
+import asyncio
+import html
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor
+
+from aiogram.types import BufferedInputFile
+
+from .cache import ChartCache, ChartKey
+from .render import NUMBERED_BACKENDS, RENDERERS, render_votes_chart
+
+logger = logging.getLogger(__name__)
+
+class ChartService:
+    """Отдаёт диаграммы голосов, не блокируя event loop.
+
+    Рендер идёт в пуле процессов; готовые PNG и file_id кэшируются, а
+    одинаковые запросы, пришедшие одновременно, ждут один рендер. backend —
+    ключ из RENDERERS: "png" (встроенный, по умолчанию) или "matplotlib".
+    """
+
+    def __init__(self, max_workers: int = 2, cache: ChartCache | None = None,
+                 executor: Executor | None = None, backend: str = "png"):
+        if backend not in RENDERERS:
+            raise ValueError(f"Unknown chart backend: {backend}")
+        self.backend = backend
+        self.cache = cache or ChartCache()
+        self._executor = executor
+        self._owns_executor = executor is None
+        self.max_workers = max_workers
+        self._inflight: dict[ChartKey, asyncio.Future] = {}
+        self.renders = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    async def photo(self, answers: list[str], results: list[int], poll_id: int,
+                    status_label: str) -> tuple[str | BufferedInputFile, ChartKey]:
+        """Возвращает file_id или PNG для answer_photo и ключ для remember_file_id."""
+        key = self.cache.key(poll_id, results, status_label)
+        entry = self.cache.get(key)
+        if entry is not None and entry.file_id is not None:
+            return entry.file_id, key
+        if entry is not None and entry.png is not None:
+            return self._input_file(poll_id, entry.png), key
+
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            inflight = asyncio.ensure_future(self._render(key, answers, results, poll_id, status_label))
+            self._inflight[key] = inflight
+            inflight.add_done_callback(lambda _: self._inflight.pop(key, None))
+        png = await asyncio.shield(inflight)
+        return self._input_file(poll_id, png), key
+
+    async def _render(self, key: ChartKey, answers, results, poll_id, status_label) -> bytes:
+        loop = asyncio.get_running_loop()
+        png = await loop.run_in_executor(
+            self._get_executor(), render_votes_chart, self.backend, list(answers), list(results), poll_id, status_label
+        )
+        self.renders += 1
+        self.cache.put_png(key, png)
+        return png
+
+    def caption(self, answers: list[str]) -> str:
+        """Подпись к фото; для рендеров без названий вариантов — с расшифровкой номеров."""
+        caption = "Диаграмма распределения голосов"
+        if self.backend not in NUMBERED_BACKENDS:
+            return caption
+        lines = [caption, ""]
+        for i, answer in enumerate(answers, start=1):
+            line = f"{i}. {html.escape(answer if len(answer) <= 48 else answer[:45] + '…')}"
+            if sum(len(x) + 1 for x in lines) + len(line) > 1024:
+                break
+            lines.append(line)
+        return "\n".join(lines)
+
+    def remember_file_id(self, key: ChartKey, file_id: str):
+        self.cache.put_file_id(key, file_id)
+
+    @staticmethod
+    def _input_file(poll_id: int, png: bytes) -> BufferedInputFile:
+        return BufferedInputFile(png, filename=f"poll_{poll_id}_votes.png")
+
+    def close(self):
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,56 @@
+import asyncio
+import os
+import struct
+import subprocess
+import sys
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from charts.cache import ChartCache
+from charts.png import HEIGHT, WIDTH, render_bar_chart
+from charts.service import ChartService
+
+
+def test_cache_evicts_by_size_and_drops_png_after_upload():
+    cache = ChartCache(max_entries=10, max_bytes=10)
+    a, b = cache.key(1, [1, 2], "Активно"), cache.key(2, [0, 0], "Активно")
+    cache.put_png(a, b"123456")
+    cache.put_png(b, b"123456")
+
+    assert cache.get(a) is None
+    assert cache.get(b).png == b"123456"
+
+    cache.put_file_id(b, "file-b")
+    assert cache.get(b).png is None
+    assert cache.bytes == 0
+
+
+def test_repeat_views_reuse_render_and_file_id():
+    async def run():
+        charts = ChartService(executor=ThreadPoolExecutor(max_workers=2))
+        args = (["Да", "Нет"], [3, 1], 7, "Завершено")
+        first, second = await asyncio.gather(charts.photo(*args), charts.photo(*args))
+        assert charts.renders == 1
+        assert first[0].data.startswith(b"\x89PNG")
+
+        charts.remember_file_id(first[1], "file-7")
+        photo, _ = await charts.photo(*args)
+        assert photo == "file-7"
+
+        await charts.photo(["Да", "Нет"], [4, 1], 7, "Активно")
+        assert charts.renders == 2
+
+    asyncio.run(run())
+
+
+def test_builtin_renderer_writes_png_without_matplotlib():
+    png = render_bar_chart(["Да", "Нет"], [10, 0], 42, "Активно")
+    assert png.startswith(b"\x89PNG\r\n\x1a\n")
+    assert struct.unpack(">II", png[16:24]) == (WIDTH, HEIGHT)
+    idat_len = struct.unpack(">I", png[33:37])[0]
+    assert len(zlib.decompress(png[41:41 + idat_len])) == HEIGHT * (WIDTH * 3 + 1)
+
+    probe = "import sys, charts.render; print('matplotlib' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True,
+                         check=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert out.stdout.strip() == "False"
@@ -0,0 +1,100 @@
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+TOKEN = os.getenv("TOKEN")
+RPC_URL = os.getenv("RPC_URL")
+# несколько узлов через запятую; если не задано — используется RPC_URL
+RPC_URLS = [u.strip() for u in os.getenv("RPC_URLS", "").split(",") if u.strip()] or [RPC_URL]
+CONTRACT_ADDRESS = os.getenv("CONTRACT_ADDRESS")
+SECRET_KEY = os.getenv("SECRET_KEY")
+ADMIN_KEY = os.getenv("ADMIN_KEY")
+
+module_dir = os.path.dirname(__file__)
+project_root = os.path.abspath(os.path.join(module_dir, ".."))
+ABI_PATH = os.path.join(project_root, "blockchain", "contracts", "ContractABI.json")
+
+# пул keep-alive соединений к RPC
+RPC_POOL_SIZE = int(os.getenv("RPC_POOL_SIZE", "100"))
+RPC_KEEPALIVE_TIMEOUT = float(os.getenv("RPC_KEEPALIVE_TIMEOUT", "60"))
+RPC_TIMEOUT = float(os.getenv("RPC_TIMEOUT", "30"))
+
+INDEX_DB_PATH = os.getenv("INDEX_DB_PATH")
+INDEX_START_BLOCK = int(os.getenv("INDEX_START_BLOCK", "0"))
+
+# голоса через voteBySig: пользователю не нужен баланс, транзакцию отправляет админ
+RELAY_VOTES = os.getenv("RELAY_VOTES", "0") == "1"
+# если задано (секунды), подписанные голоса копятся и уходят одной транзакцией voteBatch
+VOTE_BATCH_WINDOW = float(os.getenv("VOTE_BATCH_WINDOW")) if os.getenv("VOTE_BATCH_WINDOW") else None
+
+# диаграммы рисуются в отдельных процессах, готовые PNG и file_id кэшируются
+# "png" — встроенный рендер без зависимостей, "matplotlib" — с подписями вариантов
+CHART_BACKEND = os.getenv("CHART_BACKEND", "png")
+CHART_WORKERS = int(os.getenv("CHART_WORKERS", "2"))
+CHART_CACHE_ENTRIES = int(os.getenv("CHART_CACHE_ENTRIES", "1000"))
+CHART_CACHE_BYTES = int(os.getenv("CHART_CACHE_BYTES", str(64 * 1024 * 1024)))
+
+# хранилище FSM: "memory", "sqlite:///path/fsm.db" или "redis://host:port/db";
+# для нескольких воркеров нужно общее хранилище (sqlite или redis)
+FSM_STORAGE = os.getenv("FSM_STORAGE", "memory")
+
+# локальный Bot API сервер (или заглушка из webhook.loadgen); по умолчанию api.telegram.org
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL")
+
+# webhook-режим (python -m webhook): фронт принимает апдейты от Telegram и
+# раздаёт их WEBHOOK_WORKERS процессам по chat_id
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8080"))
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "1"))
+WEBHOOK_WORKER_PORT = int(os.getenv("WEBHOOK_WORKER_PORT", "8100"))
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "40"))
+# ограничения очереди воркера: параллельных полос и принятых, но не обработанных апдейтов
+WEBHOOK_LANES = int(os.getenv("WEBHOOK_LANES", "64"))
+WEBHOOK_MAX_PENDING = int(os.getenv("WEBHOOK_MAX_PENDING", "1000"))
+WEBHOOK_DRAIN_TIMEOUT = float(os.getenv("WEBHOOK_DRAIN_TIMEOUT", "30"))
+# при WEBHOOK_WORKERS > 1 воркеры выдают nonce админа из общей SQLite-базы; фронт очищает её при старте
+NONCE_DB = os.getenv("NONCE_DB", "nonces.sqlite3")
+# номер процесса-воркера; индексатор событий запускается только в воркере 0
+WORKER_INDEX = int(os.getenv("BOT_WORKER_INDEX", "0"))
+
+# ограничение частоты: токенов в секунду и размер корзины на пользователя и на голосование;
+# хендлеры с флагом rpc делят RPC_MAX_IN_FLIGHT слотов, сверх них ждут не больше RPC_MAX_WAITING
+RATE_USER_PER_SEC = float(os.getenv("RATE_USER_PER_SEC", "2"))
+RATE_USER_BURST = float(os.getenv("RATE_USER_BURST", "10"))
+RATE_POLL_PER_SEC = float(os.getenv("RATE_POLL_PER_SEC", "20"))
+RATE_POLL_BURST = float(os.getenv("RATE_POLL_BURST", "50"))
+RPC_MAX_IN_FLIGHT = int(os.getenv("RPC_MAX_IN_FLIGHT", "32"))
+RPC_MAX_WAITING = int(os.getenv("RPC_MAX_WAITING", "64"))
+RPC_WAIT_TIMEOUT = float(os.getenv("RPC_WAIT_TIMEOUT", "5"))
+
+# адреса голосующих без средств копятся FUND_WINDOW секунд и пополняются одной пачкой;
+# заранее пополненные (prefund) адреса хранятся в пуле до FUND_POOL_SIZE штук
+FUND_WINDOW = float(os.getenv("FUND_WINDOW", "0.5"))
+FUND_POOL_SIZE = int(os.getenv("FUND_POOL_SIZE", "1000"))
+
+# нажатия в бюллетене внутри окна (секунды) склеиваются в одну правку клавиатуры
+VOTE_EDIT_WINDOW = float(os.getenv("VOTE_EDIT_WINDOW", "0.4"))
+
+# /metrics (Prometheus) и /traces со счётчиками RPC; порт воркера — METRICS_PORT + BOT_WORKER_INDEX.
+# Не задан — сервер метрик не запускается
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0")) or None
+
+# хендлеры дольше TIMING_SLOW_MS попадают в буфер медленных (последние TIMING_SLOW_BUFFER);
+# SIGUSR1 дописывает их в TIMING_DUMP_PATH. TIMING_PROFILER — "cprofile" или "pyinstrument":
+# профили TIMING_PROFILE_TOP самых медленных хендлеров (/profiles на сервере метрик)
+TIMING_SLOW_MS = float(os.getenv("TIMING_SLOW_MS", "500"))
+TIMING_SLOW_BUFFER = int(os.getenv("TIMING_SLOW_BUFFER", "200"))
+TIMING_DUMP_PATH = os.getenv("TIMING_DUMP_PATH", "slow_handlers.jsonl")
+TIMING_PROFILER = os.getenv("TIMING_PROFILER") or None
+TIMING_PROFILE_TOP = int(os.getenv("TIMING_PROFILE_TOP", "10"))
+
+# уровень логов, уровни отдельных модулей ("blockchain=DEBUG,aiogram=WARNING") и формат: json или text.
+# Event loop только кладёт записи в очередь, форматирует и пишет их отдельный поток
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
@@ -2,6 +2,7 @@ from .default_handlers import router as default_router
 from .creating_handlers import router as creating_router
 from .info_handlers import router as info_router
 from .vote_handlers import router as vote_router
+from .tx_notifications import notify_tx_result
 
 routers = [
     vote_router,
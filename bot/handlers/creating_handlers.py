@@ -13,20 +13,11 @@ from FSM.states import VotingCreation
 import re
 from datetime import datetime
 from aiogram.filters import StateFilter
-from dotenv import load_dotenv
-from blockchain.voting_service import *
+from blockchain.async_voting_service import AsyncVotingService
 import html
 
-load_dotenv()
-
-RPC_URL = os.getenv("RPC_URL")
-CONTRACT_ADDRESS = os.getenv("CONTRACT_ADDRESS")
-SECRET_KEY = os.getenv("SECRET_KEY")
-ADMIN_KEY = os.getenv("ADMIN_KEY")
-module_dir = os.path.dirname(__file__)
-project_root = os.path.abspath(os.path.join(module_dir, "..", ".."))
-ABI_PATH = os.path.join(project_root, "blockchain", "contracts", "ContractABI.json")
 DATE_TIME_PATTERN = re.compile(r'^\d{2}:\d{2} \d{2}\.\d{2}\.\d{4}$')
+ETHERSCAN_BASE = "https://sepolia.etherscan.io"
 
 router = Router()
 
@@ -229,16 +220,42 @@ async def process_duration(message: Message, state: FSMContext):
             reply_markup=None
         )
 
-@router.callback_query(StateFilter(VotingCreation.waiting_for_confirmation), F.data == "confirm_voting")
-async def confirm_voting(callback_query: CallbackQuery, state: FSMContext):
-    await callback_query.message.edit_text("⏳ Подождите, идет загрузка голосования в блокчейн…\nОбычно это занимает 10-30 секунд.")
+def format_poll_created(question: str, answers: list[str], duration_seconds: int,
+                        start_time: str, poll_id: int, tx_hash: str) -> str:
+    duration_minutes = duration_seconds // 60
+    duration_hours = duration_minutes // 60
+    duration_days = duration_hours // 24
+
+    duration_str = []
+    if duration_days > 0:
+        duration_str.append(f"{duration_days} д.")
+    if duration_hours % 24 > 0:
+        duration_str.append(f"{duration_hours % 24} ч.")
+    if duration_minutes % 60 > 0:
+        duration_str.append(f"{duration_minutes % 60} мин.")
+
+    tx_hash_norm = f"0x{tx_hash}"
+    tx_url = f"{ETHERSCAN_BASE}/tx/{tx_hash_norm}"
+
+    return (
+        f"✅ <b>Голосование создано успешно!</b>\n\n"
+        f"▸ Вопрос: {html.escape(question)}\n"
+        f"▸ Варианты: {', '.join(html.escape(a) for a in answers)}\n"
+        f"▸ Длительность: {' '.join(duration_str)}\n"
+        f"▸ Начало: {start_time}\n"
+        f"▸ ID голосования: <code>{poll_id}</code>\n\n"
+        f"TX Hash: <a href=\"{tx_url}\"><code>{tx_hash_norm}</code></a>\n\n"
+        f"Голосование в обозревателе: <a href=\"{tx_url}\">0x{tx_url}</a>"
+    )
+
+@router.callback_query(StateFilter(VotingCreation.waiting_for_confirmation), F.data == "confirm_voting",
+                       flags={"rpc": "tx"})
+async def confirm_voting(callback_query: CallbackQuery, state: FSMContext, voting_service: AsyncVotingService):
+    await callback_query.message.edit_text("⏳ Подождите, идет загрузка голосования в блокчейн…")
 
     data = await state.get_data()
-    
-    try:
-        voting_service = VotingService(RPC_URL, CONTRACT_ADDRESS, ABI_PATH, SECRET_KEY, ADMIN_KEY)
-        w3 = voting_service.w3
 
+    try:
         required_fields = ['question', 'options', 'multiple_choice', 'start_time', 'duration_seconds']
         for field in required_fields:
             if field not in data:
@@ -253,8 +270,7 @@ async def confirm_voting(callback_query: CallbackQuery, state: FSMContext):
         parsed_time = datetime.strptime(raw_start_time, "%H:%M %d.%m.%Y")
         start_time = int(parsed_time.timestamp())
 
-        current_block = w3.eth.get_block('latest')
-        current_time = current_block.timestamp
+        current_time = await voting_service.get_block_timestamp()
         time_diff = start_time - current_time
 
         if time_diff <= 0:
@@ -265,46 +281,27 @@ async def confirm_voting(callback_query: CallbackQuery, state: FSMContext):
                 f"• Разница: {time_diff} секунд"
             )
 
-        tx_hash = voting_service.create_poll(
+        tx = await voting_service.submit_create_poll(
             question=question,
             answers=answers,
             multiple=multiple_choices,
             start=start_time,
-            duration=duration_seconds
+            duration=duration_seconds,
+            chat_id=callback_query.message.chat.id,
+            message_id=callback_query.message.message_id,
+            meta={
+                "question": question,
+                "answers": answers,
+                "duration_seconds": duration_seconds,
+                "start_time": parsed_time.strftime('%H:%M %d.%m.%Y'),
+            },
         )
 
-        tx_receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
-        contract = voting_service.contract
-        events = contract.events.PollCreated().process_receipt(tx_receipt)
-        if not events:
-            raise RuntimeError("Не удалось получить ID голосования из события PollCreated.")
-        poll_id = events[0]["args"]["id"]
-
-        duration_minutes = duration_seconds // 60
-        duration_hours = duration_minutes // 60
-        duration_days = duration_hours // 24
-
-        duration_str = []
-        if duration_days > 0:
-            duration_str.append(f"{duration_days} д.")
-        if duration_hours % 24 > 0:
-            duration_str.append(f"{duration_hours % 24} ч.")
-        if duration_minutes % 60 > 0:
-            duration_str.append(f"{duration_minutes % 60} мин.")
-
-        ETHERSCAN_BASE = "https://sepolia.etherscan.io"
-        tx_hash_norm = f"0x{tx_hash}"
-        tx_url = f"https://sepolia.etherscan.io/tx/{tx_hash_norm}"
-
+        tx_url = f"{ETHERSCAN_BASE}/tx/0x{tx.tx_hash}"
         await callback_query.message.edit_text(
-            f"✅ <b>Голосование создано успешно!</b>\n\n"
-            f"▸ Вопрос: {html.escape(question)}\n"
-            f"▸ Варианты: {', '.join(html.escape(a) for a in answers)}\n"
-            f"▸ Длительность: {' '.join(duration_str)}\n"
-            f"▸ Начало: {parsed_time.strftime('%H:%M %d.%m.%Y')}\n"
-            f"▸ ID голосования: <code>{poll_id}</code>\n\n"
-            f"TX Hash: <a href=\"{tx_url}\"><code>{tx_hash_norm}</code></a>\n\n"
-            f"Голосование в обозревателе: <a href=\"{tx_url}\">0x{tx_url}</a>",
+            f"⏳ Транзакция отправлена, ожидаем включения в блок…\n"
+            f"Обычно это занимает 10-30 секунд.\n\n"
+            f"TX Hash: <a href=\"{tx_url}\"><code>0x{tx.tx_hash}</code></a>",
             parse_mode="HTML",
             reply_markup=None,
             disable_web_page_preview=True
@@ -1,51 +1,19 @@
 from aiogram import Router, F
 from aiogram.types import Message
 from datetime import datetime
-from dotenv import load_dotenv
 from keyboards.creating_keyboards import get_cancel_keyboard
 from keyboards.menu import get_menu_keyboard
 from aiogram.fsm.context import FSMContext
 from aiogram.types import Message, CallbackQuery
 from aiogram.utils.markdown import hcode
 from FSM.states import Info
-from blockchain.voting_service import *
-import io
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-from aiogram.types import BufferedInputFile
+from blockchain.async_voting_service import AsyncVotingService
+from charts import ChartService
 import os
 import html
 
 router = Router()
 
-load_dotenv()
-
-RPC_URL = os.getenv("RPC_URL")
-CONTRACT_ADDRESS = os.getenv("CONTRACT_ADDRESS")
-SECRET_KEY = os.getenv("SECRET_KEY")
-ADMIN_KEY = os.getenv("ADMIN_KEY")
-module_dir = os.path.dirname(__file__)
-project_root = os.path.abspath(os.path.join(module_dir, "..", ".."))
-ABI_PATH = os.path.join(project_root, "blockchain", "contracts", "ContractABI.json")
-voting_service = VotingService(RPC_URL, CONTRACT_ADDRESS, ABI_PATH, SECRET_KEY, ADMIN_KEY)
-
-def build_votes_chart(answers: list[str], results: list[int], poll_id: int, status_label: str) -> BufferedInputFile:
-    labels = [(a if len(a) <= 24 else a[:21] + "…") for a in answers]
-
-    fig = plt.figure(figsize=(8, 4.5))
-    plt.bar(range(len(results)), results)
-    plt.xticks(range(len(results)), labels, rotation=30, ha="right")
-    plt.ylabel("Голоса")
-    plt.title(f"Голоса по вариантам • #{poll_id} ({status_label})")
-    plt.tight_layout()
-
-    buf = io.BytesIO()
-    plt.savefig(buf, format="png", dpi=200)
-    plt.close(fig)
-    buf.seek(0)
-    return BufferedInputFile(buf.getvalue(), filename=f"poll_{poll_id}_votes.png")
-
 @router.message(F.text == "Открыть голосование")
 async def open_poll_handler(message: Message, state: FSMContext):
     await message.answer(
@@ -55,8 +23,9 @@ async def open_poll_handler(message: Message, state: FSMContext):
     )
     await state.set_state(Info.waiting_for_id_or_hash)
 
-@router.message(Info.waiting_for_id_or_hash)
-async def process_poll_identifier(message: Message, state: FSMContext):
+@router.message(Info.waiting_for_id_or_hash, flags={"rpc": "lookup"})
+async def process_poll_identifier(message: Message, state: FSMContext, voting_service: AsyncVotingService,
+                                  charts: ChartService):
     user_input = message.text.strip()
     await state.clear()
 
@@ -67,7 +36,7 @@ async def process_poll_identifier(message: Message, state: FSMContext):
             poll_id = int(user_input)
 
         elif user_input.startswith("0x") and len(user_input) == 66 and all(c in "0123456789abcdefABCDEF" for c in user_input[2:]):
-            tx_receipt = voting_service.w3.eth.get_transaction_receipt(user_input)
+            tx_receipt = await voting_service.get_transaction_receipt(user_input)
             logs = tx_receipt.get('logs', [])
             if not logs:
                 raise ValueError("🚫 В транзакции нет логов. Возможно, это не создание голосования.")
@@ -87,7 +56,8 @@ async def process_poll_identifier(message: Message, state: FSMContext):
             raise ValueError("Введите корректный ID (число) или хэш (0x...)")
 
         try:
-            info = voting_service.get_poll_info(poll_id)
+            snapshot = await voting_service.get_poll_snapshot(poll_id)
+            info = snapshot["info"]
         except Exception as inner:
             if "Poll does not exist" in str(inner):
                 raise ValueError("Голосование с таким ID не найдено.")
@@ -103,8 +73,6 @@ async def process_poll_identifier(message: Message, state: FSMContext):
         canceled = info['canceled']
         creator = info['creator']
 
-        print("\n\n\n\n", start_time, end_time, question, answers, multiple, canceled, creator)
-
         if canceled:
             status = "❌ Голосование отменено"
         elif now_ts < start_time:
@@ -114,13 +82,14 @@ async def process_poll_identifier(message: Message, state: FSMContext):
         else:
             status = "✅ Активно"
 
+        results = None
         if canceled:
             results_text = "Пока недоступны (голосование отменено)"
         elif now_ts < start_time:
             results_text = "Пока недоступны (голосование ещё не началось)"
         else:
             try:
-                results = voting_service.get_results(poll_id)
+                results = snapshot["results"]
 
                 if answers:
                     results_text = "\n".join(
@@ -145,13 +114,10 @@ async def process_poll_identifier(message: Message, state: FSMContext):
 
         await message.answer(msg, parse_mode="HTML", reply_markup=get_menu_keyboard())
 
-        can_plot = True
-        if canceled or now_ts < start_time:
-            can_plot = False
+        can_plot = results is not None
 
         if can_plot:
             try:
-                results = voting_service.get_results(poll_id)
                 if not answers or len(results) != len(answers):
                     can_plot = False
 
@@ -161,11 +127,12 @@ async def process_poll_identifier(message: Message, state: FSMContext):
                     else:
                         status_label = "Активно"
 
-                    chart = build_votes_chart(answers, results, poll_id, status_label)
-                    await message.answer_photo(
+                    chart, chart_key = await charts.photo(answers, results, poll_id, status_label)
+                    sent = await message.answer_photo(
                         photo=chart,
-                        caption="Диаграмма распределения голосов"
+                        caption=charts.caption(answers)
                     )
+                    charts.remember_file_id(chart_key, sent.photo[-1].file_id)
             except Exception as e:
                 await message.answer(f"⚠️ Не удалось построить диаграмму: {e}")
 
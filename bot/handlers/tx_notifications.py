@@ -0,0 +1,44 @@
+import logging
+from aiogram import Bot
+from blockchain.async_voting_service import AsyncVotingService
+from blockchain.pending_tx import PendingTx
+from .creating_handlers import format_poll_created
+
+logger = logging.getLogger(__name__)
+
+def _vote_text(tx: PendingTx, receipt) -> str:
+    tx_line = f"Tx: <code>0x{tx.tx_hash}</code>"
+    if receipt is None:
+        return f"⚠️ Голос не подтвердился вовремя, попробуйте проголосовать ещё раз.\n{tx_line}"
+    if receipt["status"] == 0:
+        return f"❌ Транзакция с голосом отклонена сетью.\n{tx_line}"
+    return f"✅ Ваш голос учтён!\n{tx_line}"
+
+def _create_poll_text(service: AsyncVotingService, tx: PendingTx, receipt) -> str:
+    tx_line = f"TX Hash: <code>0x{tx.tx_hash}</code>"
+    if receipt is None:
+        return f"⚠️ Транзакция создания голосования не подтвердилась вовремя.\n{tx_line}"
+    if receipt["status"] == 0:
+        return f"❌ Транзакция создания голосования отклонена сетью.\n{tx_line}"
+    events = service.contract.events.PollCreated().process_receipt(receipt)
+    if not events:
+        return f"❌ Не удалось получить ID голосования из события PollCreated.\n{tx_line}"
+    return format_poll_created(poll_id=events[0]["args"]["id"], tx_hash=tx.tx_hash, **tx.meta)
+
+async def notify_tx_result(bot: Bot, service: AsyncVotingService, tx: PendingTx, receipt):
+    if tx.chat_id is None or tx.message_id is None:
+        return
+    if tx.kind == "vote":
+        text = _vote_text(tx, receipt)
+    elif tx.kind == "create_poll":
+        text = _create_poll_text(service, tx, receipt)
+    else:
+        logger.warning("Unknown pending tx kind %s", tx.kind)
+        return
+    await bot.edit_message_text(
+        text,
+        chat_id=tx.chat_id,
+        message_id=tx.message_id,
+        parse_mode="HTML",
+        disable_web_page_preview=True
+    )
@@ -2,24 +2,14 @@ from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 from datetime import datetime
-from dotenv import load_dotenv
 import os, html
 
-from keyboards.creating_keyboards import create_vote_keyboard, get_cancel_keyboard
+from keyboards.creating_keyboards import answer_ids_of, create_vote_keyboard, get_cancel_keyboard
+from keyboards.edit_coalescer import EditCoalescer
 from keyboards.menu import get_menu_keyboard
 from FSM.states import VoteStates
-from blockchain.voting_service import VotingService
-
-load_dotenv()
-RPC_URL = os.getenv("RPC_URL")
-CONTRACT_ADDRESS = os.getenv("CONTRACT_ADDRESS")
-SECRET_KEY = os.getenv("SECRET_KEY")
-ADMIN_KEY = os.getenv("ADMIN_KEY")
-module_dir = os.path.dirname(__file__)
-project_root = os.path.abspath(os.path.join(module_dir, "..", ".."))
-ABI_PATH = os.path.join(project_root, "blockchain", "contracts", "ContractABI.json")
-
-voting_service = VotingService(RPC_URL, CONTRACT_ADDRESS, ABI_PATH, SECRET_KEY, ADMIN_KEY)
+from blockchain.async_voting_service import AsyncVotingService
+
 router = Router()
 
 
@@ -33,8 +23,9 @@ async def start_vote(message: Message, state: FSMContext):
     await state.set_state(VoteStates.waiting_for_id_or_hash)
 
 
-@router.message(VoteStates.waiting_for_id_or_hash)
-async def process_poll_identifier(message: Message, state: FSMContext):
+@router.message(VoteStates.waiting_for_id_or_hash, flags={"rpc": "lookup"})
+async def process_poll_identifier(message: Message, state: FSMContext, voting_service: AsyncVotingService,
+                                  vote_edits: EditCoalescer):
     user_input = message.text.strip()
 
     try:
@@ -42,7 +33,7 @@ async def process_poll_identifier(message: Message, state: FSMContext):
             poll_id = int(user_input)
 
         elif user_input.startswith("0x") and len(user_input) == 66 and all(c in "0123456789abcdefABCDEF" for c in user_input[2:]):
-            receipt = voting_service.w3.eth.get_transaction_receipt(user_input)
+            receipt = await voting_service.get_transaction_receipt(user_input)
             events = voting_service.contract.events.PollCreated().process_receipt(receipt)
             if not events:
                 raise ValueError("🚫 В транзакции нет события создания голосования (PollCreated).")
@@ -56,7 +47,8 @@ async def process_poll_identifier(message: Message, state: FSMContext):
         return
 
     try:
-        info = voting_service.get_poll_info(poll_id)
+        snapshot = await voting_service.get_poll_snapshot(poll_id, user=str(message.from_user.id))
+        info = snapshot["info"]
     except Exception as e:
         await message.answer(f"❌ Не удалось получить голосование #{poll_id}: {e}", reply_markup=get_menu_keyboard())
         return
@@ -86,53 +78,70 @@ async def process_poll_identifier(message: Message, state: FSMContext):
         await state.clear()
         return
 
+    if snapshot["user_votes"]:
+        await message.answer("ℹ️ Вы уже проголосовали в этом голосовании.", reply_markup=get_menu_keyboard())
+        await state.clear()
+        return
+
     answers = info["answers"]
     if not answers:
         await message.answer("❌ В этом голосовании нет вариантов.", reply_markup=get_menu_keyboard())
         await state.clear()
         return
 
+    await voting_service.prefund_voter(str(message.from_user.id))
     await state.update_data(
         poll_id=poll_id,
         answers=answers,
         multiple=info["multiple_choices"],
-        selected=set()
+        selected=0
     )
-    keyboard = create_vote_keyboard(answers, selected=set(), multiple=info["multiple_choices"])
-    await message.answer("Выберите вариант(ы):", reply_markup=keyboard)
+    keyboard = create_vote_keyboard(answers, selected=0, multiple=info["multiple_choices"])
+    sent = await message.answer("Выберите вариант(ы):", reply_markup=keyboard)
+    vote_edits.show((sent.chat.id, sent.message_id), keyboard)
     await state.set_state(VoteStates.waiting_for_vote)
 
 
-@router.callback_query(F.data.startswith("vote_"), VoteStates.waiting_for_vote)
-async def vote_option_callback(callback: CallbackQuery, state: FSMContext):
+@router.callback_query(F.data == "vote_confirm", VoteStates.waiting_for_vote, flags={"rpc": "tx"})
+async def confirm_vote_callback(callback: CallbackQuery, state: FSMContext, voting_service: AsyncVotingService,
+                                vote_edits: EditCoalescer):
     data = await state.get_data()
-    selected = data.get("selected", set())
-    answers  = data["answers"]
-    multiple = data["multiple"]
+    selected = data.get("selected", 0)
     poll_id  = data["poll_id"]
 
-    key = callback.data.removeprefix("vote_")
+    if not selected:
+        await callback.answer("Выберите хотя бы один вариант!", show_alert=True)
+        return
 
-    if key == "confirm":
-        if not selected:
-            await callback.answer("Выберите хотя бы один вариант!", show_alert=True)
-            return
-
-        answer_ids = [i - 1 for i in selected]
-        try:
-            tx_hash = voting_service.vote(poll_id, answer_ids, str(callback.from_user.id))
-        except Exception as e:
-            await callback.answer(f"❌ Ошибка при отправке голоса: {e}", show_alert=True)
-            return
-
-        await callback.message.edit_text(
-            f"✅ Ваш голос учтён!\nTx: <code>0x{tx_hash}</code>",
-            parse_mode="HTML",
-            reply_markup=None
+    vote_edits.cancel((callback.message.chat.id, callback.message.message_id))
+    answer_ids = answer_ids_of(selected)
+    try:
+        tx = await voting_service.submit_vote(
+            poll_id, answer_ids, str(callback.from_user.id),
+            chat_id=callback.message.chat.id,
+            message_id=callback.message.message_id,
         )
-        await state.clear()
+    except Exception as e:
+        await callback.answer(f"❌ Ошибка при отправке голоса: {e}", show_alert=True)
         return
 
+    await callback.message.edit_text(
+        f"⏳ Голос отправлен, ожидаем подтверждения в блокчейне…\nTx: <code>0x{tx.tx_hash}</code>",
+        parse_mode="HTML",
+        reply_markup=None
+    )
+    await state.clear()
+
+
+@router.callback_query(F.data.startswith("vote_"), VoteStates.waiting_for_vote)
+async def vote_option_callback(callback: CallbackQuery, state: FSMContext, vote_edits: EditCoalescer):
+    data = await state.get_data()
+    selected = data.get("selected", 0)
+    answers  = data["answers"]
+    multiple = data["multiple"]
+
+    key = callback.data.removeprefix("vote_")
+
     try:
         idx = int(key)
     except ValueError:
@@ -143,15 +152,14 @@ async def vote_option_callback(callback: CallbackQuery, state: FSMContext):
         await callback.answer("❌ Такого варианта нет", show_alert=True)
         return
 
-    if multiple:
-        if idx in selected:
-            selected.remove(idx)
-        else:
-            selected.add(idx)
-    else:
-        selected = {idx}
+    bit = 1 << (idx - 1)
+    selected = selected ^ bit if multiple else bit
 
     await state.update_data(selected=selected)
-    keyboard = create_vote_keyboard(answers, selected, multiple)
-    await callback.message.edit_reply_markup(reply_markup=keyboard)
     await callback.answer()
+    # частые нажатия склеиваются: в Telegram уходит только последняя клавиатура окна
+    vote_edits.schedule(
+        (callback.message.chat.id, callback.message.message_id),
+        create_vote_keyboard(answers, selected, multiple),
+        lambda markup: callback.message.edit_reply_markup(reply_markup=markup),
+    )
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
 def get_start_keyboard():
@@ -44,13 +45,24 @@ def get_finish_keyboard():
     )
     return keyboard
 
-from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+def answer_ids_of(mask: int) -> list[int]:
+    """Номера вариантов (с 0), отмеченных в битовой маске выбора."""
+    return [i for i in range(mask.bit_length()) if mask >> i & 1]
+
+def create_vote_keyboard(answers: list[str], selected: int, multiple: bool) -> InlineKeyboardMarkup:
+    """Клавиатура бюллетеня; selected — битовая маска, бит i — вариант i (с 0).
+
+    Клавиатуры кэшируются по (варианты, маска): повторные нажатия не
+    собирают разметку заново.
+    """
+    return _vote_keyboard(tuple(answers), selected)
 
-def create_vote_keyboard(answers: list[str], selected: set[int], multiple: bool) -> InlineKeyboardMarkup:
+@lru_cache(maxsize=4096)
+def _vote_keyboard(answers: tuple[str, ...], selected: int) -> InlineKeyboardMarkup:
     # 1) Собираем все кнопки–ответы
     buttons: list[InlineKeyboardButton] = []
     for i, answer in enumerate(answers, start=1):
-        mark = "✅ " if i in selected else ""
+        mark = "✅ " if selected >> (i - 1) & 1 else ""
         buttons.append(
             InlineKeyboardButton(
                 text=f"{mark}{i}. {answer}",
@@ -0,0 +1,76 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Awaitable, Callable, Hashable
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import InlineKeyboardMarkup
+
+logger = logging.getLogger(__name__)
+
+SendEdit = Callable[[InlineKeyboardMarkup], Awaitable[object]]
+
+class EditCoalescer:
+    """Склеивает частые правки клавиатуры одного сообщения.
+
+    Первое нажатие открывает окно window секунд; все нажатия внутри окна
+    только заменяют ожидающую разметку, а по его окончании в Telegram уходит
+    одна правка с последним состоянием. Если оно совпадает с уже показанным
+    (выбор включили и выключили), правка не отправляется вовсе.
+    """
+
+    def __init__(self, window: float = 0.4, max_messages: int = 10_000):
+        self.window = window
+        self.max_messages = max_messages
+        self._pending: dict[Hashable, tuple[InlineKeyboardMarkup, SendEdit]] = {}
+        self._tasks: dict[Hashable, asyncio.Task] = {}
+        self._shown: OrderedDict[Hashable, InlineKeyboardMarkup] = OrderedDict()
+        self.sent = 0
+        self.coalesced = 0
+
+    def show(self, key: Hashable, markup: InlineKeyboardMarkup):
+        """Запоминает разметку, которую пользователь уже видит (например, из answer)."""
+        self._remember(key, markup)
+
+    def _remember(self, key: Hashable, markup: InlineKeyboardMarkup):
+        self._shown[key] = markup
+        self._shown.move_to_end(key)
+        while len(self._shown) > self.max_messages:
+            self._shown.popitem(last=False)
+
+    def schedule(self, key: Hashable, markup: InlineKeyboardMarkup, send: SendEdit):
+        if key in self._pending:
+            self.coalesced += 1
+        self._pending[key] = (markup, send)
+        if key not in self._tasks:
+            self._tasks[key] = asyncio.create_task(self._flush_later(key))
+
+    async def _flush_later(self, key: Hashable):
+        try:
+            await asyncio.sleep(self.window)
+        finally:
+            if self._tasks.get(key) is asyncio.current_task():
+                del self._tasks[key]
+        markup, send = self._pending.pop(key)
+        if self._shown.get(key) is markup:
+            return
+        try:
+            await send(markup)
+            self._remember(key, markup)
+            self.sent += 1
+        except TelegramBadRequest as e:
+            logger.debug("Keyboard edit skipped: %s", e)
+
+    def cancel(self, key: Hashable):
+        """Отменяет ожидающую правку и забывает сообщение (голос подтверждён или отменён)."""
+        task = self._tasks.pop(key, None)
+        if task is not None:
+            task.cancel()
+        self._pending.pop(key, None)
+        self._shown.pop(key, None)
+
+    async def close(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,48 @@
+import asyncio
+
+from keyboards.creating_keyboards import answer_ids_of, create_vote_keyboard
+from keyboards.edit_coalescer import EditCoalescer
+
+ANSWERS = [f"Вариант {i}" for i in range(16)]
+
+
+def test_keyboard_is_memoized_by_answers_and_mask():
+    mask = 1 << 0 | 1 << 15
+    keyboard = create_vote_keyboard(ANSWERS, mask, True)
+    assert create_vote_keyboard(list(ANSWERS), mask, True) is keyboard
+    marked = [b.text for row in keyboard.inline_keyboard for b in row if b.text.startswith("✅ ")]
+    assert marked == ["✅ 1. Вариант 0", "✅ 16. Вариант 15", "✅ Подтвердить"]
+    assert answer_ids_of(mask) == [0, 15]
+
+
+def test_burst_of_taps_sends_only_the_latest_keyboard():
+    async def main():
+        edits = EditCoalescer(window=0.05)
+        sent = []
+
+        async def send(markup):
+            sent.append(markup)
+
+        key = (1, 10)
+        edits.show(key, create_vote_keyboard(ANSWERS, 0, True))
+        mask = 0
+        for i in range(16):
+            mask ^= 1 << i
+            edits.schedule(key, create_vote_keyboard(ANSWERS, mask, True), send)
+        await asyncio.sleep(0.1)
+        assert sent == [create_vote_keyboard(ANSWERS, mask, True)]
+        assert edits.coalesced == 15
+
+        # включили и выключили вариант — клавиатура не изменилась, правки нет
+        edits.schedule(key, create_vote_keyboard(ANSWERS, mask ^ 1, True), send)
+        edits.schedule(key, create_vote_keyboard(ANSWERS, mask, True), send)
+        await asyncio.sleep(0.1)
+        assert len(sent) == 1
+
+        edits.schedule(key, create_vote_keyboard(ANSWERS, 0, True), send)
+        edits.cancel(key)
+        await asyncio.sleep(0.1)
+        assert len(sent) == 1
+        await edits.close()
+
+    asyncio.run(main())
@@ -0,0 +1,2 @@
+from .scenario import LoadTest, run
+from .session import StubSession
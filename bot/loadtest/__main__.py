@@ -0,0 +1,44 @@
+"""Нагрузочный тест бота целиком: хендлеры, FSM, AsyncVotingService и локальная цепочка.
+
+В отличие от blockchain/tests/load-tests.js (вызовы контракта напрямую) здесь
+апдейты проходят через Dispatcher и настоящие vote_handlers/creating_handlers:
+поиск в FSM, клавиатуры, вывод ключа, пополнение и отправку транзакции.
+Bot API заменён заглушкой, цепочка — eth-tester в процессе или TEST_RPC_URL.
+
+    python -m loadtest --users 1000 --polls 10 --rpc-delay 0.02 --api-latency 0.05
+
+Печатает p50/p95/p99 времени хендлеров по шагам, подтверждённые голоса в
+секунду и число JSON-RPC запросов на голос.
+"""
+import argparse
+import asyncio
+import json
+import logging
+
+from .scenario import run
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=100, help="виртуальных голосующих")
+    parser.add_argument("--creators", type=int, default=2, help="пользователей, создающих голосования через бота")
+    parser.add_argument("--polls", type=int, default=4, help="голосований, между которыми делятся голосующие")
+    parser.add_argument("--answers", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, help="одновременно активных пользователей (по умолчанию все)")
+    parser.add_argument("--ramp", type=float, default=0.0, help="секунд на запуск всех пользователей")
+    parser.add_argument("--think", type=float, default=0.0, help="пауза пользователя между шагами, секунд")
+    parser.add_argument("--api-latency", type=float, default=0.0, help="задержка заглушки Bot API, секунд")
+    parser.add_argument("--rpc-delay", type=float, default=0.0, help="добавочная задержка каждого RPC, секунд")
+    parser.add_argument("--admission", action="store_true", help="включить AdmissionMiddleware")
+    parser.add_argument("--fsm", default="memory", help="хранилище FSM, как FSM_STORAGE")
+    parser.add_argument("--vote-on-created", action="store_true",
+                        help="голосовать в созданных через бота голосованиях (ждать их старта)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, force=True)
+    report = asyncio.run(run(
+        users=args.users, creators=args.creators, polls=args.polls, answers=args.answers,
+        concurrency=args.concurrency, ramp=args.ramp, think=args.think,
+        api_latency=args.api_latency, rpc_delay=args.rpc_delay, admission=args.admission,
+        fsm=args.fsm, vote_on_created=args.vote_on_created,
+    ))
+    print(json.dumps(report, indent=2, ensure_ascii=False, default=str))
@@ -0,0 +1,280 @@
+import asyncio
+import itertools
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.default import DefaultBotProperties
+from aiogram.types import Update
+from web3 import Web3
+
+from blockchain.async_voting_service import AsyncVotingService
+from blockchain.rpc_metrics import RpcMetrics
+from blockchain.testchain import ARTIFACT, SECRET_KEY, async_provider, local_chain
+from FSM.storage import make_storage
+from handlers import notify_tx_result, routers
+from keyboards.edit_coalescer import EditCoalescer
+from middlewares import AdmissionMiddleware, RpcTraceMiddleware, TimedStorage, TimingMiddleware
+from webhook.loadgen import make_update, percentile
+
+from .session import StubSession
+
+TOKEN = "123456:LOADTEST"
+CREATOR_IDS = 1_000
+VOTER_IDS = 100_000
+POLL_DURATION = 24 * 3600
+
+def slow_provider(provider, delay: float):
+    """Добавляет к каждому запросу провайдера задержку, как у удалённого узла.
+
+    Подменяет make_request до первого запроса, поэтому вызывается сразу после создания провайдера.
+    """
+    make_request = provider.make_request
+
+    async def delayed(method, params):
+        await asyncio.sleep(delay)
+        return await make_request(method, params)
+
+    provider.make_request = delayed
+
+def calls_by(metrics: RpcMetrics, part: int) -> Counter:
+    """Число RPC-запросов по методу (part=0), хендлеру (1) или методу сервиса (2)."""
+    counts = Counter()
+    for key, n in metrics.calls.items():
+        counts[key[part]] += n
+    return counts
+
+def callback_update(update_id: int, chat_id: int, message_id: int, data: str) -> dict:
+    user = {"id": chat_id, "is_bot": False, "first_name": f"user{chat_id}"}
+    return {
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "from": user,
+            "chat_instance": str(chat_id),
+            "data": data,
+            "message": {
+                "message_id": message_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+            },
+        },
+    }
+
+def summarize(values: list[float]) -> dict:
+    return {
+        "count": len(values),
+        "p50_ms": percentile(values, 0.5) * 1000,
+        "p95_ms": percentile(values, 0.95) * 1000,
+        "p99_ms": percentile(values, 0.99) * 1000,
+    }
+
+class LoadTest:
+    """Виртуальные пользователи, которые проходят настоящие хендлеры через Dispatcher.
+
+    Апдейты подаются в dp.feed_update напрямую, Bot API заменён StubSession,
+    блокчейн — локальная цепочка из blockchain.testchain. Время каждого
+    feed_update записывается по шагам сценария.
+    """
+
+    def __init__(self, bot: Bot, dp: Dispatcher, session: StubSession, service: AsyncVotingService,
+                 chain, think: float = 0.0):
+        self.bot = bot
+        self.dp = dp
+        self.session = session
+        self.service = service
+        self.chain = chain
+        self.think = think
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: Counter[str] = Counter()
+        self.receipts: list[tuple[str, int, float]] = []
+        self.created_polls: list[int] = []
+        self._update_ids = itertools.count(1)
+
+    async def on_receipt(self, tx, receipt):
+        status = -1 if receipt is None else receipt["status"]
+        self.receipts.append((tx.kind, status, time.perf_counter()))
+        if tx.kind == "create_poll" and status == 1:
+            events = self.service.contract.events.PollCreated().process_receipt(receipt)
+            self.created_polls.extend(e["args"]["id"] for e in events)
+        await notify_tx_result(self.bot, self.service, tx, receipt)
+
+    async def feed(self, step: str, update: dict):
+        started = time.perf_counter()
+        try:
+            await self.dp.feed_update(self.bot, Update.model_validate(update, context={"bot": self.bot}))
+        except Exception:
+            self.errors[step] += 1
+        self.latencies[step].append(time.perf_counter() - started)
+        if self.think:
+            await asyncio.sleep(self.think)
+
+    async def send(self, step: str, chat_id: int, text: str):
+        await self.feed(step, make_update(next(self._update_ids), chat_id, text))
+
+    async def press(self, step: str, chat_id: int, data: str):
+        message_id = self.session.last_message.get(chat_id, 1)
+        await self.feed(step, callback_update(next(self._update_ids), chat_id, message_id, data))
+
+    async def creator(self, chat_id: int, answers: int, start: datetime):
+        await self.send("create:menu", chat_id, "Создать голосование")
+        await self.press("create:start", chat_id, "start_voting_creation")
+        await self.send("create:question", chat_id, f"Load test poll from {chat_id}?")
+        for i in range(answers):
+            await self.press("create:add_option", chat_id, "add_option")
+            await self.send("create:option", chat_id, f"Answer {i + 1}")
+        await self.press("create:finish_options", chat_id, "finish_options")
+        await self.press("create:multiple", chat_id, "multiple_choice_no")
+        await self.send("create:start_time", chat_id, start.strftime("%H:%M %d.%m.%Y"))
+        await self.send("create:duration", chat_id, str(POLL_DURATION // 60))
+        await self.press("create:confirm", chat_id, "confirm_voting")
+
+    async def voter(self, chat_id: int, poll_id: int, answer: int):
+        await self.send("vote:menu", chat_id, "Проголосовать")
+        await self.send("vote:poll_id", chat_id, str(poll_id))
+        await self.press("vote:select", chat_id, f"vote_{answer}")
+        await self.press("vote:confirm", chat_id, "vote_confirm")
+
+    async def crowd(self, flows: list, concurrency: int, ramp: float):
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(i: int, flow):
+            await asyncio.sleep(ramp * i / max(len(flows), 1))
+            async with semaphore:
+                await flow
+
+        await asyncio.gather(*(one(i, flow) for i, flow in enumerate(flows)))
+
+    async def drain(self, kind: str, timeout: float):
+        """Ждёт, пока у транзакций вида kind не останется pending."""
+        async with asyncio.timeout(timeout):
+            while any(tx.kind == kind for tx in self.service.pending.snapshot()):
+                await asyncio.sleep(0.05)
+
+    async def seed_polls(self, count: int, answers: int) -> list[int]:
+        """Создаёт голосования напрямую от админа, со стартом через несколько секунд."""
+        # каждая транзакция — отдельный блок на секунду позже предыдущего
+        start = max(self.chain.now(), int(time.time())) + 3 + count
+        hashes = [
+            await self.service.create_poll(f"Seeded {i}?", [f"a{j}" for j in range(answers)], False,
+                                           start, POLL_DURATION)
+            for i in range(count)
+        ]
+        poll_ids = []
+        for tx_hash in hashes:
+            receipt = await self.service.get_transaction_receipt(tx_hash)
+            poll_ids.extend(e["args"]["id"] for e in
+                            self.service.contract.events.PollCreated().process_receipt(receipt))
+        await self.wait_until(start)
+        return poll_ids
+
+    async def wait_until(self, start: int):
+        # хендлер голосования сверяет старт с часами бота, контракт — со временем блока
+        await asyncio.sleep(max(0.0, start + 1 - time.time()))
+        if self.chain.now() <= start:
+            self.chain.advance_time(start + 1 - self.chain.now())
+
+async def run(users: int = 100, creators: int = 2, polls: int = 4, answers: int = 4,
+              concurrency: int | None = None, ramp: float = 0.0, think: float = 0.0,
+              api_latency: float = 0.0, rpc_delay: float = 0.0, admission: bool = False,
+              fsm: str = "memory", edit_window: float = 0.4, receipt_interval: float = 0.2,
+              vote_on_created: bool = False, confirm_timeout: float = 300.0,
+              fund_wei: int = Web3.to_wei(0.1, "ether")) -> dict:
+    """Прогоняет creators по созданию голосования и users по голосованию; возвращает отчёт.
+
+    По умолчанию голосуют в polls голосованиях, созданных админом со стартом
+    через пару секунд: созданные через бота начинаются не раньше следующей
+    минуты. С vote_on_created голосуют в них, дожидаясь старта.
+    """
+    chain = local_chain()
+    provider = async_provider(chain)
+    if rpc_delay:
+        slow_provider(provider, rpc_delay)
+    service = AsyncVotingService(None, chain.contract_address, ARTIFACT, SECRET_KEY, chain.admin_key,
+                                 provider=provider, chain_id=chain.chain_id)
+    # eth-tester проверяет баланс в eth_call/estimate_gas по лимиту газа блока
+    service.funding.amount = fund_wei
+
+    session = StubSession(api_latency)
+    bot = Bot(TOKEN, session=session, default=DefaultBotProperties(parse_mode="HTML"))
+    timing = TimingMiddleware()
+    bot.session.middleware(timing.request_middleware)
+    vote_edits = EditCoalescer(window=edit_window)
+    dp = Dispatcher(storage=TimedStorage(make_storage(fsm)), voting_service=service, vote_edits=vote_edits)
+    dp.message.middleware(timing)
+    dp.callback_query.middleware(timing)
+    middleware = None
+    if admission:
+        middleware = AdmissionMiddleware()
+        dp.message.middleware(middleware)
+        dp.callback_query.middleware(middleware)
+    rpc_trace = RpcTraceMiddleware(service.rpc_metrics)
+    dp.message.middleware(rpc_trace)
+    dp.callback_query.middleware(rpc_trace)
+    for router in routers:
+        dp.include_router(router)
+
+    test = LoadTest(bot, dp, session, service, chain, think=think)
+    await service.connect()
+    service.start_watcher(test.on_receipt, poll_interval=receipt_interval)
+    try:
+        started = time.perf_counter()
+        start = (datetime.now() + timedelta(minutes=2)).replace(second=0, microsecond=0)
+        await test.crowd([test.creator(CREATOR_IDS + i, answers, start) for i in range(creators)],
+                         concurrency or creators, ramp)
+        await test.drain("create_poll", confirm_timeout)
+        create_s = time.perf_counter() - started
+
+        if vote_on_created:
+            poll_ids = list(test.created_polls)
+            await test.wait_until(int(start.timestamp()))
+        else:
+            poll_ids = await test.seed_polls(polls, answers)
+        if not poll_ids:
+            raise RuntimeError("No polls to vote in")
+
+        methods_before = calls_by(service.rpc_metrics, 0)
+        handlers_before = calls_by(service.rpc_metrics, 1)
+        started = time.perf_counter()
+        await test.crowd([test.voter(VOTER_IDS + i, poll_ids[i % len(poll_ids)], 1 + i % answers)
+                          for i in range(users)], concurrency or users, ramp)
+        await test.drain("vote", confirm_timeout)
+        vote_rpc = calls_by(service.rpc_metrics, 0) - methods_before
+        vote_rpc_handlers = calls_by(service.rpc_metrics, 1) - handlers_before
+    finally:
+        await vote_edits.close()
+        await service.close()
+        await dp.storage.close()
+        await bot.session.close()
+
+    votes = [(status, at) for kind, status, at in test.receipts if kind == "vote"]
+    confirmed = [at for status, at in votes if status == 1]
+    vote_s = (max(confirmed) - started) if confirmed else 0.0
+    all_latencies = [t for values in test.latencies.values() for t in values]
+    return {
+        "users": users,
+        "creators": creators,
+        "polls": len(poll_ids),
+        "handler_latency": {"all": summarize(all_latencies),
+                            **{step: summarize(values) for step, values in sorted(test.latencies.items())}},
+        # среднее время хендлера по частям: fsm, blockchain, chart, telegram, other
+        "handler_parts_ms": {
+            name: {part: seconds * 1000 / timing.durations[name].count
+                   for (handler, part), seconds in timing.part_totals.items() if handler == name}
+            for name in sorted(timing.durations)
+        },
+        "handler_errors": dict(test.errors),
+        "polls_created": len(test.created_polls),
+        "create_phase_s": create_s,
+        "votes_submitted": len(votes),
+        "votes_confirmed": len(confirmed),
+        "vote_phase_s": vote_s,
+        "votes_per_s": len(confirmed) / vote_s if vote_s else 0.0,
+        "rpc_calls_per_vote": sum(vote_rpc.values()) / len(confirmed) if confirmed else None,
+        "rpc_calls": dict(vote_rpc.most_common()),
+        # None — фоновые задачи: пополнение, ожидание квитанций, опрос комиссий
+        "rpc_calls_by_handler": {str(k): n for k, n in vote_rpc_handlers.most_common()},
+        "telegram_calls": dict(session.calls),
+        "admission": middleware.metrics() if middleware else None,
+    }
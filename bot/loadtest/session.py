@@ -0,0 +1,45 @@
+import asyncio
+import itertools
+from collections import Counter
+from datetime import datetime
+
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import TelegramMethod
+from aiogram.types import Chat, Message
+
+class StubSession(BaseSession):
+    """Сессия Bot API без сети: send*/edit* возвращают сообщение, остальное — True.
+
+    latency — искусственная задержка каждого вызова, как у настоящего Bot API.
+    Последнее отправленное в чат сообщение запоминается, чтобы виртуальный
+    пользователь мог нажать кнопку под ним.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__()
+        self.latency = latency
+        self.calls: Counter[str] = Counter()
+        self.last_message: dict[int, int] = {}
+        self._message_ids = itertools.count(1)
+
+    async def make_request(self, bot: Bot, method: TelegramMethod, timeout: int | None = None):
+        name = method.__api_method__
+        self.calls[name] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if not name.startswith(("send", "edit")):
+            return True
+        chat_id = getattr(method, "chat_id", None)
+        message_id = getattr(method, "message_id", None) or next(self._message_ids)
+        if name.startswith("send"):
+            self.last_message[chat_id] = message_id
+        return Message(message_id=message_id, date=datetime.now(),
+                       chat=Chat(id=chat_id, type="private")).as_(bot)
+
+    async def stream_content(self, *args, **kwargs):
+        raise NotImplementedError("StubSession does not download files")
+        yield b""
+
+    async def close(self):
+        pass
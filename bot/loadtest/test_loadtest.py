@@ -0,0 +1,17 @@
+import asyncio
+
+from loadtest import run
+
+
+def test_virtual_users_go_through_handlers_to_confirmed_votes():
+    report = asyncio.run(run(users=6, creators=1, polls=1, answers=2, edit_window=0.05))
+
+    assert report["handler_errors"] == {}
+    assert report["polls_created"] == 1
+    assert report["votes_confirmed"] == report["votes_submitted"] == 6
+    assert report["votes_per_s"] > 0
+    assert report["rpc_calls"]["eth_sendRawTransaction"] >= 6
+    assert report["rpc_calls_per_vote"] > 0
+    assert report["handler_latency"]["vote:confirm"]["count"] == 6
+    # уведомление о подтверждении правит сообщение каждого голосующего
+    assert report["telegram_calls"]["editMessageText"] >= 6
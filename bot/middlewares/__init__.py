@@ -0,0 +1,3 @@
+from .rpc_trace import RpcTraceMiddleware
+from .throttling import AdmissionMiddleware
+from .timing import TelegramTiming, TimedStorage, TimingMiddleware
@@ -0,0 +1,22 @@
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from blockchain.rpc_metrics import RpcMetrics
+
+class RpcTraceMiddleware(BaseMiddleware):
+    """Помечает RPC-запросы именем хендлера и собирает их в RpcTrace на каждый апдейт.
+
+    Регистрируется как inner-middleware: хендлер к этому моменту уже выбран.
+    """
+
+    def __init__(self, metrics: RpcMetrics):
+        self.metrics = metrics
+
+    async def __call__(self, handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+                       event: TelegramObject, data: dict[str, Any]) -> Any:
+        handler_object = data.get("handler")
+        action = handler_object.callback.__name__ if handler_object is not None else type(event).__name__
+        with self.metrics.trace(action):
+            return await handler(event, data)
@@ -0,0 +1,134 @@
+import asyncio
+from datetime import datetime
+
+import aiohttp
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.types import Chat, Message, User
+
+from blockchain.rpc_metrics import RpcMetrics
+from middlewares.throttling import AdmissionMiddleware, BucketMap, ConcurrencyLimiter
+from monitoring import start_metrics_server
+
+USER = User(id=1, is_bot=False, first_name="u")
+
+
+def message(text: str) -> Message:
+    return Message(message_id=1, date=datetime.now(), chat=Chat(id=1, type="private"), from_user=USER, text=text)
+
+
+def data(flags: dict | None = None) -> dict:
+    async def callback():
+        pass
+    return {"event_from_user": USER, "handler": HandlerObject(callback, flags=flags or {})}
+
+
+def test_bucket_refills_over_time():
+    buckets = BucketMap(rate=1, burst=2, max_keys=2)
+    assert buckets.allow("a", 0) and buckets.allow("a", 0)
+    assert not buckets.allow("a", 0.5)
+    assert buckets.allow("a", 1.5)
+
+    buckets.allow("b", 2)
+    buckets.allow("c", 2)
+    assert len(buckets) == 2
+
+
+def test_user_limit_drops_extra_events():
+    async def main():
+        admission = AdmissionMiddleware(user_rate=0.001, user_burst=2)
+        calls = []
+
+        async def handler(event, data):
+            calls.append(event.text)
+
+        for _ in range(4):
+            await admission(handler, message("hi"), data())
+        assert len(calls) == 2
+        assert admission.metrics()["rejected"]["user"] == 2
+
+    asyncio.run(main())
+
+
+def test_rpc_handlers_share_concurrency_cap_and_poll_bucket():
+    async def main():
+        admission = AdmissionMiddleware(poll_rate=0.001, poll_burst=2, max_in_flight=1, max_waiting=0)
+        started, release = asyncio.Event(), asyncio.Event()
+
+        async def handler(event, data):
+            started.set()
+            await release.wait()
+            return "done"
+
+        first = asyncio.create_task(admission(handler, message("7"), data({"rpc": "lookup"})))
+        try:
+            await asyncio.wait_for(started.wait(), 1)
+            assert admission.metrics()["in_flight"] == 1
+            assert await admission(handler, message("8"), data({"rpc": "lookup"})) is None
+        finally:
+            release.set()
+        assert await asyncio.wait_for(first, 1) == "done"
+
+        assert await admission(handler, message("7"), data({"rpc": "lookup"})) == "done"
+        assert await admission(handler, message("7"), data({"rpc": "lookup"})) is None
+        metrics = admission.metrics()
+        assert metrics["rejected"] == {"user": 0, "poll": 1, "busy": 1}
+        assert metrics["admitted"] == 2 and metrics["in_flight"] == 0
+
+    asyncio.run(main())
+
+
+def test_waiter_gets_released_slot_and_timeouts_do_not_leak_it():
+    async def main():
+        limiter = ConcurrencyLimiter(limit=1, max_waiting=1, wait_timeout=0.05)
+        assert await limiter.acquire()
+        assert not await limiter.acquire()
+
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.waiting == 1
+        limiter.release()
+        assert await asyncio.wait_for(waiter, 1)
+        assert (limiter.in_flight, limiter.waiting) == (1, 0)
+
+        limiter.release()
+        assert limiter.in_flight == 0
+        assert await limiter.acquire()
+        limiter.release()
+
+    asyncio.run(main())
+
+
+def test_admission_metrics_are_scraped_from_prometheus_endpoint():
+    async def main():
+        admission = AdmissionMiddleware(max_in_flight=1, max_waiting=1, wait_timeout=5)
+        release = asyncio.Event()
+
+        async def handler(event, data):
+            await release.wait()
+
+        first = asyncio.create_task(admission(handler, message("1"), data({"rpc": "lookup"})))
+        await asyncio.sleep(0)
+        waiting = asyncio.create_task(admission(handler, message("2"), data({"rpc": "lookup"})))
+        await asyncio.sleep(0)
+        # очередь заполнена — третий получает отказ сразу
+        await admission(handler, message("3"), data({"rpc": "lookup"}))
+
+        server = await start_metrics_server(RpcMetrics(), "127.0.0.1", 0, admission=admission)
+        port = server.addresses[0][1]
+        try:
+            async with aiohttp.ClientSession() as client:
+                async with client.get(f"http://127.0.0.1:{port}/metrics") as resp:
+                    text = await resp.text()
+        finally:
+            release.set()
+            await asyncio.gather(first, waiting)
+            await server.cleanup()
+        return text
+
+    text = asyncio.run(main())
+    assert "admission_in_flight 1" in text
+    assert "admission_waiting 1" in text
+    assert "admission_admitted_total 1" in text
+    assert 'admission_rejected_total{reason="busy"} 1' in text
+    assert "admission_wait_seconds_count{} 2" in text
+    assert "# TYPE admission_wait_seconds histogram" in text
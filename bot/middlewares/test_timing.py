@@ -0,0 +1,90 @@
+import asyncio
+import json
+from datetime import datetime
+
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.types import Chat, Message, User
+
+from middlewares.timing import TelegramTiming, TimedStorage, TimingMiddleware
+
+USER = User(id=1, is_bot=False, first_name="u")
+KEY = StorageKey(bot_id=1, chat_id=1, user_id=1)
+
+
+def message() -> Message:
+    return Message(message_id=1, date=datetime.now(), chat=Chat(id=1, type="private"), from_user=USER, text="7")
+
+
+class FakeService:
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.name = "svc"
+
+    async def work(self):
+        await asyncio.sleep(self.delay)
+        return self.name
+
+
+def test_handler_time_is_split_into_parts_and_slow_traces_are_kept(tmp_path):
+    async def main():
+        timing = TimingMiddleware(slow_ms=30)
+        storage = TimedStorage(MemoryStorage())
+
+        async def show_poll(event, data):
+            await storage.set_data(KEY, {"poll_id": 7})
+            assert await data["voting_service"].work() == "svc"
+            assert data["voting_service"].name == "svc"
+            await data["charts"].work()
+
+            async def make_request(bot, method):
+                await asyncio.sleep(0.01)
+            await TelegramTiming()(make_request, None, None)
+            await asyncio.sleep(0.01)
+
+        async def quick(event, data):
+            pass
+
+        for callback in (show_poll, quick):
+            data = {"event_from_user": USER, "handler": HandlerObject(callback),
+                    "voting_service": FakeService(0.03), "charts": FakeService(0.02)}
+            await timing(callback, message(), data)
+
+        [slow] = timing.slow_traces
+        assert (slow.handler, slow.user_id) == ("show_poll", 1)
+        assert slow.parts["blockchain"] >= 0.03
+        assert slow.parts["chart"] >= 0.02
+        assert slow.parts["telegram"] >= 0.01
+        assert slow.parts["fsm"] > 0
+        assert slow.other >= 0.01
+        assert timing.durations["quick"].count == 1
+
+        path = tmp_path / "slow.jsonl"
+        assert timing.dump(str(path)) == 1
+        assert json.loads(path.read_text())["handler"] == "show_poll"
+        assert not timing.slow_traces
+        assert 'handler_part_seconds_total{handler="show_poll",part="chart"}' in timing.prometheus()
+
+    asyncio.run(main())
+
+
+def test_profiles_of_slowest_handlers_are_kept():
+    async def main():
+        timing = TimingMiddleware(profiler="cprofile", profile_top=2)
+
+        def handler(delay):
+            async def sleepy(event, data):
+                await asyncio.sleep(delay)
+            return sleepy
+
+        for delay in (0.02, 0.001, 0.03):
+            callback = handler(delay)
+            await timing(callback, message(), {"handler": HandlerObject(callback)})
+
+        slowest = timing.slowest()
+        assert len(slowest) == 2
+        assert slowest[0].total >= 0.03 and 0.02 <= slowest[1].total <= slowest[0].total
+        assert all("function calls" in t.profile for t in slowest)
+
+    asyncio.run(main())
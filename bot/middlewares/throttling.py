@@ -0,0 +1,232 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Hashable
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
+from aiogram.types import CallbackQuery, Message, TelegramObject
+
+from blockchain.rpc_metrics import Histogram, prom_labels
+
+logger = logging.getLogger(__name__)
+
+REJECT_TEXTS = {
+    "user": "⏳ Слишком много запросов. Подождите пару секунд.",
+    "poll": "⏳ Это голосование сейчас перегружено, попробуйте чуть позже.",
+    "busy": "⏳ Сервис перегружен, попробуйте через несколько секунд.",
+}
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def take(self, now: float, cost: float = 1) -> bool:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < cost:
+            return False
+        self.tokens -= cost
+        return True
+
+class BucketMap:
+    """Token bucket на каждый ключ; давно не использованные корзины вытесняются (LRU)."""
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 100_000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[Hashable, TokenBucket] = OrderedDict()
+
+    def allow(self, key: Hashable, now: float | None = None) -> bool:
+        now = time.monotonic() if now is None else now
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.rate, self.burst, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket.take(now)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+class ConcurrencyLimiter:
+    """Глобальный лимит одновременной работы с RPC и транзакциями.
+
+    Сверх limit запросы ждут в очереди не дольше wait_timeout; если очередь
+    уже длиннее max_waiting, acquire сразу возвращает False. Освободившийся
+    слот передаётся первому ожидающему напрямую, поэтому таймаут, совпавший
+    с передачей, не теряет слот.
+    """
+
+    def __init__(self, limit: int, max_waiting: int, wait_timeout: float):
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+        self.in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> bool:
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            return True
+        if len(self._waiters) >= self.max_waiting:
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            async with asyncio.timeout(self.wait_timeout):
+                await asyncio.shield(waiter)
+        except TimeoutError:
+            if waiter.done():
+                return True
+            self._waiters.remove(waiter)
+            return False
+        except asyncio.CancelledError:
+            if waiter.done():
+                self.release()
+            else:
+                self._waiters.remove(waiter)
+            raise
+        return True
+
+    def release(self):
+        if self._waiters:
+            # слот переходит к ожидающему, in_flight не меняется
+            self._waiters.popleft().set_result(None)
+        else:
+            self.in_flight -= 1
+
+class AdmissionMiddleware(BaseMiddleware):
+    """Ограничивает частоту запросов и нагрузку на RPC.
+
+    Каждое сообщение и нажатие кнопки тратит токен из корзины пользователя.
+    Хендлеры с флагом rpc (flags={"rpc": "lookup"} или {"rpc": "tx"}) тратят
+    ещё токен голосования и занимают место в ConcurrencyLimiter. Отказ
+    сообщается пользователю не чаще раза в notice_interval секунд; на
+    остальные нажатия кнопок уходит пустой ответ, сообщения отбрасываются.
+    """
+
+    def __init__(self, user_rate: float = 2, user_burst: float = 10,
+                 poll_rate: float = 20, poll_burst: float = 50,
+                 max_in_flight: int = 32, max_waiting: int = 64, wait_timeout: float = 5,
+                 notice_interval: float = 5):
+        self.users = BucketMap(user_rate, user_burst)
+        self.polls = BucketMap(poll_rate, poll_burst)
+        self.limiter = ConcurrencyLimiter(max_in_flight, max_waiting, wait_timeout)
+        self.notice_interval = notice_interval
+        self._noticed: OrderedDict[int, float] = OrderedDict()
+        self.admitted = 0
+        self.rejected = {reason: 0 for reason in REJECT_TEXTS}
+        # ожидание слота в ConcurrencyLimiter, включая ушедших по таймауту
+        self.wait_seconds = Histogram()
+
+    async def __call__(self, handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+                       event: TelegramObject, data: dict[str, Any]) -> Any:
+        user = data.get("event_from_user")
+        if user is not None and not self.users.allow(user.id):
+            return await self._reject(event, user.id, "user")
+
+        if not get_flag(data, "rpc"):
+            return await handler(event, data)
+
+        poll_id = await self._poll_id(event, data)
+        if poll_id is not None and not self.polls.allow(poll_id):
+            return await self._reject(event, user.id if user else None, "poll")
+        started = time.monotonic()
+        admitted = await self.limiter.acquire()
+        self.wait_seconds.observe(time.monotonic() - started)
+        if not admitted:
+            return await self._reject(event, user.id if user else None, "busy")
+        self.admitted += 1
+        try:
+            return await handler(event, data)
+        finally:
+            self.limiter.release()
+
+    @staticmethod
+    async def _poll_id(event: TelegramObject, data: dict[str, Any]) -> int | None:
+        if isinstance(event, Message):
+            text = (event.text or "").strip()
+            return int(text) if text.isdigit() else None
+        state = data.get("state")
+        if state is not None:
+            return (await state.get_data()).get("poll_id")
+        return None
+
+    async def _reject(self, event: TelegramObject, user_id: int | None, reason: str):
+        self.rejected[reason] += 1
+        text = None
+        now = time.monotonic()
+        last = self._noticed.get(user_id)
+        if user_id is not None and (last is None or now - last >= self.notice_interval):
+            text = REJECT_TEXTS[reason]
+            self._noticed[user_id] = now
+            self._noticed.move_to_end(user_id)
+            while len(self._noticed) > self.users.max_keys:
+                self._noticed.popitem(last=False)
+
+        try:
+            # на нажатие кнопки отвечаем всегда, иначе у пользователя крутится индикатор
+            if isinstance(event, CallbackQuery):
+                await event.answer(text)
+            elif isinstance(event, Message) and text is not None:
+                await event.answer(text)
+        except Exception as e:
+            logger.debug("Failed to send rejection notice: %s", e)
+        return None
+
+    def metrics(self) -> dict[str, Any]:
+        """Снимок состояния: глубина очереди, занятые слоты и счётчики отказов."""
+        return {
+            "in_flight": self.limiter.in_flight,
+            "waiting": self.limiter.waiting,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "tracked_users": len(self.users),
+            "tracked_polls": len(self.polls),
+        }
+
+    def prometheus(self) -> str:
+        """metrics() и время ожидания слота в текстовом формате Prometheus."""
+        metrics = self.metrics()
+        lines = ["# HELP admission_in_flight Handlers holding an RPC slot.",
+                 "# TYPE admission_in_flight gauge",
+                 f"admission_in_flight {metrics['in_flight']}",
+                 "# HELP admission_waiting Handlers queued for an RPC slot.",
+                 "# TYPE admission_waiting gauge",
+                 f"admission_waiting {metrics['waiting']}",
+                 "# HELP admission_admitted_total Handlers admitted to RPC.",
+                 "# TYPE admission_admitted_total counter",
+                 f"admission_admitted_total {metrics['admitted']}",
+                 "# HELP admission_rejected_total Rejected events by reason: user, poll, busy.",
+                 "# TYPE admission_rejected_total counter"]
+        for reason, n in metrics["rejected"].items():
+            lines.append(f"admission_rejected_total{prom_labels(reason=reason)} {n}")
+        lines += ["# HELP admission_wait_seconds Time spent waiting for an RPC slot.",
+                  "# TYPE admission_wait_seconds histogram"]
+        lines += self.wait_seconds.lines("admission_wait_seconds")
+        return "\n".join(lines) + "\n"
+
+    async def report_metrics(self, interval: float = 60):
+        """Периодически пишет metrics() в лог, если очередь непуста или были отказы."""
+        reported = None
+        while True:
+            await asyncio.sleep(interval)
+            metrics = self.metrics()
+            current = (metrics["waiting"], tuple(metrics["rejected"].values()))
+            if metrics["waiting"] or current != reported:
+                logger.info("Admission: %s", metrics)
+            reported = current
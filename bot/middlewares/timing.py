@@ -0,0 +1,260 @@
+import cProfile
+import heapq
+import inspect
+import io
+import itertools
+import json
+import pstats
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from functools import wraps
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from aiogram.types import TelegramObject
+
+from blockchain.rpc_metrics import Histogram, prom_labels
+
+PARTS = ("fsm", "blockchain", "chart", "telegram")
+PROFILERS = {"cprofile", "pyinstrument"}
+
+_current: ContextVar["HandlerTiming | None"] = ContextVar("handler_timing", default=None)
+
+@dataclass
+class HandlerTiming:
+    handler: str
+    event: str
+    user_id: int | None
+    started: float = field(default_factory=time.time)
+    total: float = 0.0
+    parts: dict[str, float] = field(default_factory=lambda: dict.fromkeys(PARTS, 0.0))
+    profile: str | None = None
+    done: bool = False
+
+    @property
+    def other(self) -> float:
+        return max(0.0, self.total - sum(self.parts.values()))
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        del data["done"]
+        return {**data, "other": self.other}
+
+@contextmanager
+def span(part: str):
+    """Добавляет время блока к части part текущего замера хендлера, если он идёт."""
+    timing = _current.get()
+    if timing is None or timing.done:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.parts[part] += time.perf_counter() - started
+
+class TimedProxy:
+    """Прокси сервиса: время его корутин-методов идёт в часть part."""
+
+    __slots__ = ("_target", "_part")
+
+    def __init__(self, target, part: str):
+        self._target = target
+        self._part = part
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._target, name)
+        if not inspect.iscoroutinefunction(attr):
+            return attr
+        part = self._part
+
+        @wraps(attr)
+        async def timed(*args, **kwargs):
+            with span(part):
+                return await attr(*args, **kwargs)
+
+        return timed
+
+class TimedStorage(BaseStorage):
+    """Обёртка хранилища FSM: время операций идёт в часть "fsm"."""
+
+    def __init__(self, storage: BaseStorage):
+        self.storage = storage
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        with span("fsm"):
+            await self.storage.set_state(key, state)
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        with span("fsm"):
+            return await self.storage.get_state(key)
+
+    async def set_data(self, key: StorageKey, data) -> None:
+        with span("fsm"):
+            await self.storage.set_data(key, data)
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        with span("fsm"):
+            return await self.storage.get_data(key)
+
+    async def update_data(self, key: StorageKey, data) -> dict[str, Any]:
+        with span("fsm"):
+            return await self.storage.update_data(key, data)
+
+    async def close(self) -> None:
+        await self.storage.close()
+
+class TelegramTiming(BaseRequestMiddleware):
+    """Middleware сессии бота: время запросов к Bot API идёт в часть "telegram"."""
+
+    async def __call__(self, make_request, bot, method):
+        with span("telegram"):
+            return await make_request(bot, method)
+
+def write_traces(path: str, traces: list[HandlerTiming]):
+    with open(path, "a", encoding="utf-8") as f:
+        for timing in traces:
+            f.write(json.dumps(timing.as_dict(), ensure_ascii=False) + "\n")
+
+class TimingMiddleware(BaseMiddleware):
+    """Замеряет каждый хендлер и раскладывает время на FSM, блокчейн, диаграммы и Bot API.
+
+    Регистрируется inner-middleware первым, до AdmissionMiddleware. Сервисы из
+    services (ключ данных -> часть) подменяются на TimedProxy, хранилище FSM
+    оборачивается в TimedStorage, сессия бота — в TelegramTiming; остальное
+    время — "other". Хендлеры дольше slow_ms попадают в кольцевой буфер slow
+    (последние buffer штук), выгружаемый через dump().
+
+    С profiler="cprofile" или "pyinstrument" хендлеры профилируются по одному
+    (другой в это время не профилируется), и хранятся профили profile_top
+    самых медленных. cProfile не различает задачи asyncio, так что в его
+    профиль попадает и чужая работа во время await; pyinstrument
+    (необязательная зависимость) учитывает только свою задачу.
+    """
+
+    def __init__(self, slow_ms: float = 500, buffer: int = 200, profiler: str | None = None,
+                 profile_top: int = 10, services: dict[str, str] | None = None):
+        if profiler is not None and profiler not in PROFILERS:
+            raise ValueError(f"Unknown profiler: {profiler}")
+        if profiler == "pyinstrument":
+            import pyinstrument  # noqa: F401 — необязательная зависимость, проверяем сразу
+        self.slow = slow_ms / 1000
+        self.slow_traces: deque[HandlerTiming] = deque(maxlen=buffer)
+        self.profiler = profiler
+        self.profile_top = profile_top
+        self.profiles: list[tuple[float, int, HandlerTiming]] = []
+        self._profiling = False
+        self._seq = itertools.count()
+        self.services = services or {"voting_service": "blockchain", "charts": "chart"}
+        self._proxies: dict[str, TimedProxy] = {}
+        self.durations: dict[str, Histogram] = {}
+        self.part_totals: dict[tuple[str, str], float] = {}
+
+    @property
+    def request_middleware(self) -> TelegramTiming:
+        return TelegramTiming()
+
+    def _proxy(self, key: str, target) -> TimedProxy:
+        proxy = self._proxies.get(key)
+        if proxy is None or proxy._target is not target:
+            proxy = self._proxies[key] = TimedProxy(target, self.services[key])
+        return proxy
+
+    async def __call__(self, handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+                       event: TelegramObject, data: dict[str, Any]) -> Any:
+        handler_object = data.get("handler")
+        user = data.get("event_from_user")
+        timing = HandlerTiming(
+            handler=handler_object.callback.__name__ if handler_object is not None else type(event).__name__,
+            event=type(event).__name__,
+            user_id=user.id if user else None,
+        )
+        for key in self.services:
+            if key in data:
+                data[key] = self._proxy(key, data[key])
+
+        profiler = None
+        if self.profiler is not None and not self._profiling:
+            self._profiling = True
+            profiler = self._start_profiler()
+        token = _current.set(timing)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            timing.total = time.perf_counter() - started
+            timing.done = True
+            _current.reset(token)
+            if profiler is not None:
+                self._profiling = False
+                self._keep_profile(timing, profiler)
+            self._record(timing)
+
+    def _start_profiler(self):
+        if self.profiler == "pyinstrument":
+            from pyinstrument import Profiler
+            profiler = Profiler(async_mode="enabled")
+            profiler.start()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        return profiler
+
+    def _keep_profile(self, timing: HandlerTiming, profiler):
+        if self.profiler == "pyinstrument":
+            profiler.stop()
+        else:
+            profiler.disable()
+        if len(self.profiles) >= self.profile_top and timing.total <= self.profiles[0][0]:
+            return
+        if self.profiler == "pyinstrument":
+            timing.profile = profiler.output_text()
+        else:
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(30)
+            timing.profile = out.getvalue()
+        item = (timing.total, next(self._seq), timing)
+        if len(self.profiles) < self.profile_top:
+            heapq.heappush(self.profiles, item)
+        else:
+            heapq.heapreplace(self.profiles, item)
+
+    def _record(self, timing: HandlerTiming):
+        self.durations.setdefault(timing.handler, Histogram()).observe(timing.total)
+        for part, seconds in (*timing.parts.items(), ("other", timing.other)):
+            key = (timing.handler, part)
+            self.part_totals[key] = self.part_totals.get(key, 0.0) + seconds
+        if timing.total >= self.slow:
+            self.slow_traces.append(timing)
+
+    def slowest(self) -> list[HandlerTiming]:
+        """Профили самых медленных хендлеров, от медленного к быстрому."""
+        return [timing for _, _, timing in sorted(self.profiles, reverse=True)]
+
+    def take_slow(self) -> list[HandlerTiming]:
+        """Забирает медленные трассы из буфера."""
+        traces = list(self.slow_traces)
+        self.slow_traces.clear()
+        return traces
+
+    def dump(self, path: str) -> int:
+        """Дописывает медленные трассы в path (JSON lines) и очищает буфер."""
+        traces = self.take_slow()
+        write_traces(path, traces)
+        return len(traces)
+
+    def prometheus(self) -> str:
+        lines = ["# HELP handler_duration_seconds Handler latency.",
+                 "# TYPE handler_duration_seconds histogram"]
+        for name, hist in sorted(self.durations.items()):
+            lines += hist.lines("handler_duration_seconds", handler=name)
+        lines += ["# HELP handler_part_seconds_total Handler time by part: fsm, blockchain, chart, telegram, other.",
+                  "# TYPE handler_part_seconds_total counter"]
+        for (name, part), seconds in sorted(self.part_totals.items()):
+            lines.append(f"handler_part_seconds_total{prom_labels(handler=name, part=part)} {seconds}")
+        return "\n".join(lines) + "\n"
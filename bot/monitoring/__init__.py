@@ -0,0 +1,2 @@
+from .logs import setup_logging
+from .server import metrics_app, start_metrics_server
@@ -0,0 +1,99 @@
+import json
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+# поля из extra=..., которые попадают в запись отдельно от сообщения
+FIELDS = ("poll_id", "tx_hash", "user")
+FORMATS = {"json", "text"}
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(name)s - %(message)s"
+
+def record_fields(record: logging.LogRecord) -> dict:
+    return {name: value for name in FIELDS if (value := getattr(record, name, None)) is not None}
+
+class JsonFormatter(logging.Formatter):
+    """Одна JSON-строка на запись: время, уровень, логгер, сообщение и FIELDS, если заданы."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            **record_fields(record),
+        }
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            data["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+class TextFormatter(logging.Formatter):
+    """Привычный текстовый формат; FIELDS дописываются в конец как key=value."""
+
+    def __init__(self):
+        super().__init__(TEXT_FORMAT)
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        fields = record_fields(record)
+        if not fields:
+            return text
+        return text + " | " + " ".join(f"{k}={v}" for k, v in fields.items())
+
+class LazyQueueHandler(QueueHandler):
+    """Кладёт запись в очередь как есть.
+
+    Стандартный QueueHandler.prepare() склеивает сообщение и traceback в потоке
+    вызывающего, то есть в event loop. Здесь это делает поток QueueListener,
+    поэтому аргументы записи не должны меняться после вызова логгера.
+    """
+
+    listener: QueueListener | None = None
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+def parse_levels(spec: str) -> dict[str, str]:
+    """"blockchain=DEBUG,aiogram.event=WARNING" -> {"blockchain": "DEBUG", "aiogram.event": "WARNING"}"""
+    levels = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        name, sep, level = item.partition("=")
+        if not sep or not name.strip():
+            raise ValueError(f"Bad log level spec: {item!r}")
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+def setup_logging(level: str = "INFO", levels: str = "", fmt: str = "json", stream=None) -> QueueListener:
+    """Настраивает корневой логгер: записи идут в очередь, пишет их поток QueueListener.
+
+    levels — уровни отдельных модулей в виде "blockchain=DEBUG,aiogram=WARNING".
+    Прежние обработчики корневого логгера снимаются. Возвращает запущенный
+    listener; перед выходом его нужно остановить (stop() дописывает очередь).
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown log format: {fmt}")
+    module_levels = parse_levels(levels)
+    root = logging.getLogger()
+    root.setLevel(level.upper())
+    for name, module_level in module_levels.items():
+        logging.getLogger(name).setLevel(module_level)
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+    records = queue.SimpleQueue()
+    listener = QueueListener(records, output, respect_handler_level=True)
+    handler = LazyQueueHandler(records)
+    handler.listener = listener
+
+    for old in root.handlers[:]:
+        root.removeHandler(old)
+        if isinstance(old, LazyQueueHandler) and old.listener is not None:
+            old.listener.stop()
+            old.listener = None
+    root.addHandler(handler)
+    listener.start()
+    return listener
@@ -0,0 +1,50 @@
+from aiohttp import web
+
+from blockchain.rpc_metrics import RpcMetrics
+from middlewares.throttling import AdmissionMiddleware
+from middlewares.timing import TimingMiddleware
+
+def metrics_app(rpc: RpcMetrics, timing: TimingMiddleware | None = None,
+                admission: AdmissionMiddleware | None = None) -> web.Application:
+    """/metrics — метрики в формате Prometheus, /traces — последние RPC-трассы действий в JSON.
+
+    /traces?limit=N&action=confirm_vote_callback ограничивает выдачу. С timing
+    добавляются время хендлеров в /metrics, /slow — медленные хендлеры из
+    кольцевого буфера и /profiles — профили самых медленных. С admission в
+    /metrics попадают очередь за RPC-слотом, отказы и время ожидания.
+    """
+
+    async def metrics(request: web.Request) -> web.Response:
+        text = rpc.prometheus() + (timing.prometheus() if timing is not None else "")
+        if admission is not None:
+            text += admission.prometheus()
+        return web.Response(text=text, content_type="text/plain", charset="utf-8")
+
+    async def traces(request: web.Request) -> web.Response:
+        action = request.query.get("action")
+        limit = int(request.query.get("limit", "50"))
+        selected = [t for t in rpc.traces if action is None or t.action == action]
+        return web.json_response([t.as_dict() for t in selected[-limit:]])
+
+    async def slow(request: web.Request) -> web.Response:
+        return web.json_response([t.as_dict() for t in timing.slow_traces])
+
+    async def profiles(request: web.Request) -> web.Response:
+        return web.json_response([t.as_dict() for t in timing.slowest()])
+
+    app = web.Application()
+    app.router.add_get("/metrics", metrics)
+    app.router.add_get("/traces", traces)
+    if timing is not None:
+        app.router.add_get("/slow", slow)
+        app.router.add_get("/profiles", profiles)
+    return app
+
+async def start_metrics_server(rpc: RpcMetrics, host: str, port: int,
+                               timing: TimingMiddleware | None = None,
+                               admission: AdmissionMiddleware | None = None) -> web.AppRunner:
+    """Запускает metrics_app; остановка — await runner.cleanup()."""
+    runner = web.AppRunner(metrics_app(rpc, timing, admission), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
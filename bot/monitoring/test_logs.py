@@ -0,0 +1,68 @@
+import io
+import json
+import logging
+import threading
+
+import pytest
+
+from monitoring.logs import parse_levels, setup_logging
+
+
+class Formatted:
+    """Запоминает поток, в котором запись превратили в строку."""
+
+    def __init__(self):
+        self.thread = None
+
+    def __str__(self):
+        self.thread = threading.current_thread()
+        return "arg"
+
+
+@pytest.fixture
+def root_logger():
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    yield root
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+    logging.getLogger("blockchain").setLevel(logging.NOTSET)
+
+
+def test_records_are_json_with_fields_and_formatted_off_the_caller_thread(root_logger):
+    out = io.StringIO()
+    listener = setup_logging("INFO", "blockchain=DEBUG", stream=out)
+    arg = Formatted()
+    logging.getLogger("blockchain.async_voting_service").debug(
+        "Sent tx %s", arg, extra={"poll_id": 7, "tx_hash": "0xab", "user": "42"})
+    logging.getLogger("handlers").debug("dropped")
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        logging.getLogger("handlers").exception("failed")
+    listener.stop()
+
+    sent, failed = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert sent["msg"] == "Sent tx arg"
+    assert (sent["poll_id"], sent["tx_hash"], sent["user"]) == (7, "0xab", "42")
+    assert arg.thread is not threading.current_thread()
+    assert failed["level"] == "ERROR" and "RuntimeError: boom" in failed["exc"]
+    assert "poll_id" not in failed
+
+
+def test_text_format_and_level_spec(root_logger):
+    out = io.StringIO()
+    listener = setup_logging("WARNING", fmt="text", stream=out)
+    logging.getLogger("x").warning("slow", extra={"user": "1"})
+    listener.stop()
+    assert out.getvalue().rstrip().endswith("WARNING - x - slow | user=1")
+
+    assert parse_levels(" blockchain=debug, aiogram.event=WARNING,") == {
+        "blockchain": "DEBUG", "aiogram.event": "WARNING"}
+    with pytest.raises(ValueError):
+        parse_levels("blockchain")
+    with pytest.raises(ValueError):
+        setup_logging(fmt="xml")
@@ -0,0 +1,2 @@
+from .dispatch import UpdateQueue, chat_id_of, shard_of
+from .server import front_app, worker_app
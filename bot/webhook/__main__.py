@@ -0,0 +1,114 @@
+"""Запуск бота в webhook-режиме (из каталога bot):
+
+    python -m webhook
+
+При WEBHOOK_WORKERS=1 один процесс принимает webhook и обрабатывает апдейты.
+Иначе этот процесс — фронт: он запускает воркеры на портах
+WEBHOOK_WORKER_PORT + i и раздаёт им апдейты по chat_id, так что FSM и
+очередь апдейтов одного чата всегда в одном процессе, а nonce админского
+аккаунта воркеры выдают из общей базы NONCE_DB. SIGTERM/SIGINT
+останавливает фронт, затем воркеры дожидаются принятых апдейтов и
+pending-транзакций.
+"""
+import logging
+import os
+import signal
+import subprocess
+import sys
+
+from aiohttp import web
+
+import config
+from monitoring import setup_logging
+from .server import front_app, worker_app
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_UPDATES = ["message", "callback_query"]
+
+def _webhook_hooks():
+    from aiogram import Bot
+
+    async def set_webhook():
+        bot = Bot(token=config.TOKEN)
+        try:
+            await bot.set_webhook(
+                config.WEBHOOK_URL.rstrip("/") + config.WEBHOOK_PATH,
+                secret_token=config.WEBHOOK_SECRET,
+                max_connections=config.WEBHOOK_MAX_CONNECTIONS,
+                allowed_updates=ALLOWED_UPDATES,
+            )
+        finally:
+            await bot.session.close()
+
+    return set_webhook if config.WEBHOOK_URL else None
+
+def run_worker(path: str, secret: str | None, host: str, port: int, register_webhook: bool = False):
+    from aiogram.types import Update
+    from bot import bot, dp
+
+    async def handle(update: dict):
+        await dp.feed_update(bot, Update.model_validate(update, context={"bot": bot}))
+
+    set_webhook = _webhook_hooks() if register_webhook else None
+
+    async def on_startup():
+        await dp.emit_startup(bot=bot)
+        if set_webhook is not None:
+            await set_webhook()
+
+    async def on_shutdown():
+        await dp.emit_shutdown(bot=bot)
+        await bot.session.close()
+
+    app = worker_app(
+        handle, path=path, secret=secret,
+        lanes=config.WEBHOOK_LANES, max_pending=config.WEBHOOK_MAX_PENDING,
+        drain_timeout=config.WEBHOOK_DRAIN_TIMEOUT,
+        on_startup=on_startup, on_shutdown=on_shutdown,
+    )
+    web.run_app(app, host=host, port=port, print=None)
+
+def run_front():
+    from blockchain.nonce_manager import NonceStore
+
+    # счётчики прошлого запуска могли остаться выше сети из-за выпавших транзакций
+    store = NonceStore(config.NONCE_DB)
+    store.reset()
+    store.close()
+    workers = []
+    for i in range(config.WEBHOOK_WORKERS):
+        env = {**os.environ, "BOT_WORKER_INDEX": str(i)}
+        workers.append(subprocess.Popen([sys.executable, "-m", "webhook", "worker"], env=env))
+    urls = [f"http://127.0.0.1:{config.WEBHOOK_WORKER_PORT + i}/update" for i in range(len(workers))]
+
+    app = front_app(urls, config.WEBHOOK_PATH, secret=config.WEBHOOK_SECRET,
+                    max_inflight=config.WEBHOOK_WORKERS * config.WEBHOOK_MAX_PENDING,
+                    on_startup=_webhook_hooks())
+    try:
+        web.run_app(app, host=config.WEBHOOK_HOST, port=config.WEBHOOK_PORT, print=None)
+    finally:
+        for proc in workers:
+            proc.send_signal(signal.SIGTERM)
+        for proc in workers:
+            try:
+                proc.wait(timeout=config.WEBHOOK_DRAIN_TIMEOUT + 30)
+            except subprocess.TimeoutExpired:
+                logger.warning("Worker %s did not stop in time, killing", proc.pid)
+                proc.kill()
+
+def main():
+    log_listener = setup_logging(config.LOG_LEVEL, config.LOG_LEVELS, config.LOG_FORMAT)
+    try:
+        if sys.argv[1:] == ["worker"]:
+            run_worker("/update", None, "127.0.0.1", config.WEBHOOK_WORKER_PORT + config.WORKER_INDEX)
+        elif config.WEBHOOK_WORKERS <= 1:
+            run_worker(config.WEBHOOK_PATH, config.WEBHOOK_SECRET, config.WEBHOOK_HOST, config.WEBHOOK_PORT,
+                       register_webhook=True)
+        else:
+            run_front()
+    finally:
+        log_listener.stop()
+
+if __name__ == "__main__":
+    main()
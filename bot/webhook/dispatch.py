@@ -0,0 +1,102 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+HandleUpdate = Callable[[dict[str, Any]], Awaitable[None]]
+
+# поля апдейта, в которых лежит объект с чатом (message) или пользователем (from)
+_CHAT_FIELDS = ("message", "edited_message", "channel_post", "edited_channel_post")
+_USER_FIELDS = ("inline_query", "chosen_inline_result", "shipping_query", "pre_checkout_query",
+                "poll_answer", "my_chat_member", "chat_member", "chat_join_request")
+
+def chat_id_of(update: dict[str, Any]) -> int | None:
+    """chat_id апдейта; для апдейтов без чата — id пользователя."""
+    for field in _CHAT_FIELDS:
+        if field in update:
+            return update[field]["chat"]["id"]
+    callback = update.get("callback_query")
+    if callback is not None:
+        message = callback.get("message")
+        return message["chat"]["id"] if message else callback["from"]["id"]
+    for field in _USER_FIELDS:
+        obj = update.get(field)
+        if obj is not None:
+            chat = obj.get("chat")
+            if chat is not None:
+                return chat["id"]
+            user = obj.get("from") or obj.get("user")
+            if user is not None:
+                return user["id"]
+    return None
+
+def shard_of(update: dict[str, Any], shards: int) -> int:
+    """Номер воркера (или полосы) для апдейта.
+
+    Один и тот же чат всегда попадает в одно место, поэтому его апдейты
+    обрабатываются по порядку и не гоняются за одним FSM-состоянием.
+    """
+    chat_id = chat_id_of(update)
+    if chat_id is None:
+        chat_id = update.get("update_id", 0)
+    return chat_id % shards
+
+class UpdateQueue:
+    """Очередь апдейтов воркера с ограничением по размеру.
+
+    Апдейты раскладываются по lanes полосам по chat_id: внутри полосы они
+    обрабатываются строго по очереди, полосы работают параллельно. Если в
+    очереди уже max_pending апдейтов, submit возвращает False и вызывающий
+    отвечает 503 — Telegram повторит доставку позже.
+    """
+
+    def __init__(self, handle: HandleUpdate, lanes: int = 64, max_pending: int = 1000):
+        self.handle = handle
+        self.max_pending = max_pending
+        self._lanes = [asyncio.Queue() for _ in range(lanes)]
+        self._tasks: list[asyncio.Task] = []
+        self._pending = 0
+        self._closing = False
+        self.processed = 0
+        self.rejected = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._consume(lane)) for lane in self._lanes]
+
+    def submit(self, update: dict[str, Any]) -> bool:
+        if self._closing or self._pending >= self.max_pending:
+            self.rejected += 1
+            return False
+        self._pending += 1
+        self._lanes[shard_of(update, len(self._lanes))].put_nowait(update)
+        return True
+
+    async def _consume(self, lane: asyncio.Queue):
+        while True:
+            update = await lane.get()
+            try:
+                await self.handle(update)
+            except Exception:
+                logger.exception("Failed to process update %s", update.get("update_id"))
+            finally:
+                self._pending -= 1
+                self.processed += 1
+                lane.task_done()
+
+    async def close(self, timeout: float | None = None):
+        """Перестаёт принимать апдейты и дожидается обработки уже принятых."""
+        self._closing = True
+        try:
+            await asyncio.wait_for(asyncio.gather(*(lane.join() for lane in self._lanes)), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Update queue drain timed out with %s updates pending", self._pending)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
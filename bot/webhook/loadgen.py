@@ -0,0 +1,122 @@
+"""Нагрузочный генератор для webhook-режима.
+
+Шлёт синтетические апдейты Telegram на адрес webhook и считает, сколько
+апдейтов в секунду принято, сколько отклонено (503) и задержку ответа.
+С --bot-api-port поднимает заглушку Bot API, чтобы ответы бота не уходили
+в Telegram; бот нужно запустить с TELEGRAM_API_URL=http://127.0.0.1:<порт>.
+
+    python -m webhook.loadgen --url http://127.0.0.1:8080/webhook --updates 20000 --concurrency 200
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import time
+
+import aiohttp
+from aiohttp import web
+
+from .server import SECRET_HEADER
+
+def make_update(update_id: int, chat_id: int, text: str = "/start") -> dict:
+    user = {"id": chat_id, "is_bot": False, "first_name": f"user{chat_id}"}
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private", "first_name": user["first_name"]},
+            "from": user,
+            "text": text,
+        },
+    }
+
+def bot_api_stub() -> web.Application:
+    """Отвечает на любой метод Bot API: send*/edit* — сообщением, остальное — True."""
+    message_ids = itertools.count(1)
+
+    async def handle(request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        if method.startswith(("send", "edit")):
+            data = await request.post()
+            result = {
+                "message_id": next(message_ids),
+                "date": int(time.time()),
+                "chat": {"id": int(data.get("chat_id", 0)), "type": "private"},
+            }
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+    app = web.Application()
+    app.router.add_post("/bot{token}/{method}", handle)
+    return app
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+async def run(url: str, updates: int, concurrency: int, chats: int, secret: str | None = None,
+              text: str = "/start") -> dict:
+    counter = itertools.count(1)
+    statuses: dict[int | str, int] = {}
+    latencies: list[float] = []
+    headers = {"Content-Type": "application/json"}
+    if secret:
+        headers[SECRET_HEADER] = secret
+
+    async def client(session: aiohttp.ClientSession):
+        while (update_id := next(counter)) <= updates:
+            body = json.dumps(make_update(update_id, 1_000_000 + update_id % chats, text))
+            started = time.perf_counter()
+            try:
+                async with session.post(url, data=body, headers=headers) as resp:
+                    status = resp.status
+            except aiohttp.ClientError as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=concurrency)) as session:
+        await asyncio.gather(*(client(session) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "updates": updates,
+        "elapsed_s": elapsed,
+        "accepted_per_s": statuses.get(200, 0) / elapsed,
+        "statuses": statuses,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+async def main(args):
+    runner = None
+    if args.bot_api_port:
+        runner = web.AppRunner(bot_api_stub())
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", args.bot_api_port).start()
+        if args.wait:
+            await asyncio.to_thread(
+                input, f"Bot API stub on 127.0.0.1:{args.bot_api_port}; start the bot and press Enter… ")
+    try:
+        report = await run(args.url, args.updates, args.concurrency, args.chats, args.secret, args.text)
+    finally:
+        if runner is not None:
+            await runner.cleanup()
+    print(json.dumps(report, indent=2, default=str))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8080/webhook")
+    parser.add_argument("--updates", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--chats", type=int, default=1000, help="число разных chat_id")
+    parser.add_argument("--secret")
+    parser.add_argument("--text", default="/start")
+    parser.add_argument("--bot-api-port", type=int)
+    parser.add_argument("--wait", action="store_true", help="ждать Enter после запуска заглушки Bot API")
+    asyncio.run(main(parser.parse_args()))
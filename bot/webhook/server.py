@@ -0,0 +1,106 @@
+import asyncio
+import json
+import logging
+from typing import Awaitable, Callable
+
+import aiohttp
+from aiohttp import web
+
+from .dispatch import HandleUpdate, UpdateQueue, shard_of
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+Hook = Callable[[], Awaitable[None]]
+
+QUEUE = web.AppKey("queue", UpdateQueue)
+
+def _busy() -> web.Response:
+    return web.Response(status=503, headers={"Retry-After": "1"})
+
+def _authorized(request: web.Request, secret: str | None) -> bool:
+    return secret is None or request.headers.get(SECRET_HEADER) == secret
+
+def worker_app(handle: HandleUpdate, path: str = "/update", secret: str | None = None,
+               lanes: int = 64, max_pending: int = 1000, drain_timeout: float = 30,
+               on_startup: Hook | None = None, on_shutdown: Hook | None = None) -> web.Application:
+    """Приложение воркера: принимает апдейты и ставит их в UpdateQueue.
+
+    При остановке сначала перестаёт принимать апдейты и дожидается уже
+    принятых, потом вызывает on_shutdown (там бот дожидается pending-транзакций).
+    """
+    app = web.Application()
+    queue = UpdateQueue(handle, lanes=lanes, max_pending=max_pending)
+    app[QUEUE] = queue
+
+    async def receive(request: web.Request) -> web.Response:
+        if not _authorized(request, secret):
+            return web.Response(status=401)
+        update = await request.json(loads=json.loads)
+        if not queue.submit(update):
+            return _busy()
+        return web.Response()
+
+    async def startup(_):
+        if on_startup is not None:
+            await on_startup()
+        queue.start()
+
+    async def shutdown(_):
+        await queue.close(drain_timeout)
+        if on_shutdown is not None:
+            await on_shutdown()
+
+    app.router.add_post(path, receive)
+    app.on_startup.append(startup)
+    app.on_shutdown.append(shutdown)
+    return app
+
+def front_app(worker_urls: list[str], path: str, secret: str | None = None,
+              max_inflight: int = 1000, on_startup: Hook | None = None,
+              on_shutdown: Hook | None = None) -> web.Application:
+    """Приложение-фронт: принимает webhook от Telegram и пересылает апдейт
+    воркеру по chat_id, возвращая Telegram ответ воркера."""
+    app = web.Application()
+    inflight = 0
+    session: aiohttp.ClientSession | None = None
+
+    async def receive(request: web.Request) -> web.Response:
+        nonlocal inflight
+        if not _authorized(request, secret):
+            return web.Response(status=401)
+        if inflight >= max_inflight:
+            return _busy()
+        body = await request.read()
+        url = worker_urls[shard_of(json.loads(body), len(worker_urls))]
+        inflight += 1
+        try:
+            async with session.post(url, data=body, headers={"Content-Type": "application/json"}) as resp:
+                if resp.status == 503:
+                    return _busy()
+                return web.Response(status=resp.status)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning("Worker %s is unavailable: %s", url, e)
+            return _busy()
+        finally:
+            inflight -= 1
+
+    async def startup(_):
+        nonlocal session
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=max_inflight),
+            timeout=aiohttp.ClientTimeout(total=10),
+        )
+        if on_startup is not None:
+            await on_startup()
+
+    async def cleanup(_):
+        if on_shutdown is not None:
+            await on_shutdown()
+        await session.close()
+
+    app.router.add_post(path, receive)
+    app.on_startup.append(startup)
+    app.on_cleanup.append(cleanup)
+    return app
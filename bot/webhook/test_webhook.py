@@ -0,0 +1,78 @@
+import asyncio
+
+from aiohttp import web
+
+from webhook.dispatch import UpdateQueue, chat_id_of, shard_of
+from webhook.loadgen import make_update, run
+from webhook.server import front_app, worker_app
+
+
+def test_updates_of_one_chat_go_to_one_shard():
+    message = make_update(1, 42)
+    callback = {"update_id": 2, "callback_query": {"id": "1", "from": {"id": 7},
+                                                   "message": message["message"]}}
+    assert chat_id_of(message) == chat_id_of(callback) == 42
+    assert shard_of(message, 4) == shard_of(callback, 4) == 42 % 4
+    assert chat_id_of({"update_id": 3, "poll_answer": {"user": {"id": 9}}}) == 9
+
+
+def test_queue_keeps_chat_order_and_rejects_over_limit():
+    async def main():
+        seen = []
+        release = asyncio.Event()
+
+        async def handle(update):
+            await release.wait()
+            seen.append(update["update_id"])
+
+        queue = UpdateQueue(handle, lanes=4, max_pending=3)
+        queue.start()
+        assert all(queue.submit(make_update(i, 5)) for i in (1, 2, 3))
+        assert not queue.submit(make_update(4, 6))
+        release.set()
+        await queue.close(timeout=1)
+        assert seen == [1, 2, 3]
+        assert (queue.processed, queue.rejected) == (3, 1)
+        assert not queue.submit(make_update(5, 5))
+
+    asyncio.run(main())
+
+
+async def serve(app: web.Application) -> tuple[web.AppRunner, int]:
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner, site._server.sockets[0].getsockname()[1]
+
+
+def test_front_shards_updates_across_workers_and_drains_on_shutdown():
+    async def main():
+        handled = {0: [], 1: []}
+        shutdowns = []
+        runners, urls = [], []
+        for i in (0, 1):
+            async def handle(update, i=i):
+                await asyncio.sleep(0)
+                handled[i].append(chat_id_of(update))
+
+            async def on_shutdown(i=i):
+                shutdowns.append((i, len(handled[i])))
+
+            runner, port = await serve(worker_app(handle, on_shutdown=on_shutdown))
+            runners.append(runner)
+            urls.append(f"http://127.0.0.1:{port}/update")
+
+        front, port = await serve(front_app(urls, "/webhook", secret="s"))
+        report = await run(f"http://127.0.0.1:{port}/webhook", 200, 20, 10, secret="s")
+        denied = await run(f"http://127.0.0.1:{port}/webhook", 1, 1, 1)
+        await front.cleanup()
+        for runner in runners:
+            await runner.cleanup()
+
+        assert report["statuses"] == {200: 200}
+        assert denied["statuses"] == {401: 1}
+        assert all(chat % 2 == i for i in (0, 1) for chat in handled[i])
+        assert sorted(shutdowns) == [(0, 100), (1, 100)]
+
+    asyncio.run(main())